@@ -0,0 +1,80 @@
+import time
+
+from fastapi.responses import JSONResponse
+
+from core.config import SERVER_TIMING_ENABLED
+from services.admission import admission, AdmissionRejected
+from services.metrics import metrics, server_timing_header
+
+
+def _route_label(scope) -> str:
+    # FastAPI alt router'lardaki route'u önek olmadan (`/full-chart`) verir. Yol parametresi yoksa eşleşen
+    # yol zaten sınırlı bir kümedir ve önekli tam şablonla aynıdır; varsa etiket patlamasın diye şablon kullanılır.
+    route = scope.get("route")
+    if route is None: return "unmatched"
+    return getattr(route, "path", "unmatched") if scope.get("path_params") else scope["path"]
+
+
+class MetricsMiddleware:
+    """
+    Her HTTP isteği için aşama sürelerini toplayacak sözlüğü açar, istek süresini route şablonuyla
+    (`/v1/natal/full-chart` gibi) kaydeder ve açıksa yanıt başlıklarına `Server-Timing` ekler.
+    Saf ASGI ara katmanıdır; `BaseHTTPMiddleware`'in görev ve kuyruk maliyetini getirmez.
+    Akışlı yanıtlarda başlık ilk parça gönderilmeden önce yazıldığından o ana kadarki aşamaları içerir.
+    """
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        timings, token = metrics.begin_request()
+        started = time.perf_counter(); status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(timings, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.observe_request(scope["method"], _route_label(scope), status, time.perf_counter() - started)
+            metrics.end_request(token)
+
+
+class AdmissionMiddleware:
+    """
+    İsteği endpoint sınıfının sınırlayıcısından geçirir (`services.admission`). Kabul edilmeyen istek route'a
+    hiç ulaşmaz; hata yakalayıcıyla aynı biçimde 503 + Retry-After döner. Sırada geçen süre `admission_wait`
+    aşaması olarak kaydedilir; bu yüzden `MetricsMiddleware`'in içinde çalışmalıdır. Akışlı yanıtlarda yer,
+    yanıtın son parçası gönderilene kadar tutulur.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limiter = admission.limiter_for(scope["path"]) if scope["type"] == "http" and admission.enabled else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            with metrics.stage("admission_wait"): await limiter.acquire()
+        except AdmissionRejected as e:
+            response = JSONResponse(status_code=503, headers={"Retry-After": str(e.retry_after)},
+                                    content={"status": "error", "message": "Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin."})
+            await response(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
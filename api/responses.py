@@ -0,0 +1,25 @@
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.metrics import metrics
+
+
+def _default(value: Any) -> Any:
+    # orjson'un doğrudan tanımadığı tipler (pydantic modelleri vb.) FastAPI'nin kodlayıcısına bırakılır.
+    return jsonable_encoder(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Gövdeyi orjson ile kodlayan JSON yanıtı. Çıktı, Starlette'in `JSONResponse`'u ile aynı biçimdedir
+    (boşluksuz, UTF-8, ASCII'ye kaçışsız). Endpoint'ler bu sınıfı doğrudan döndürdüğünde FastAPI'nin
+    `jsonable_encoder` geçişi de atlanır; büyük harita yanıtlarında asıl kazanç buradadır.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with metrics.stage("serialize"):
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -1,30 +1,65 @@
+import asyncio
+import itertools
 import json
-from typing import Dict, Any, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable, Iterable, Iterator, Tuple, Union
 
-from fastapi import APIRouter, Response, Depends, HTTPException
-from fastapi_cache.decorator import cache
+import orjson
+from fastapi import APIRouter, Response, Depends, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from core.config import INTERPRETATION_PATH
-from models.pydantic_models import BirthData
-from services.astrology_engine import calculate_natal_data, get_zodiac_sign_details
-from services.chart_drawer import draw_final_professional_chart
+from core.config import (
+    BATCH_MAX_ITEMS,
+    BATCH_PROCESS_WORKERS, BATCH_WINDOW, RENDER_CACHE_MAX_AGE_SECONDS,
+    CHART_DEFAULT_PNG_SIZE, CHART_DEFAULT_SVG_SIZE, CHART_MIN_SIZE, CHART_MAX_SIZE
+)
+from models.pydantic_models import BirthData, ChartFormat
+from services.astrology_engine import calculate_natal_chart, get_zodiac_sign_details, TIMEZONE_NOT_FOUND_ERROR
+from services.chart_model import NatalChart
+from services.timezone_resolver import timezone_resolver
+from services.compute_executor import compute_executor
+from services.chart_cache import chart_cache, chart_fingerprint
+from api.responses import FastJSONResponse
+from services.metrics import metrics, capture_stages
+from services.interpretation_store import interpretation_store
+from services.render_cache import render_cache, make_render_key
+from services.render_pool import render_pool, RenderPoolOverloaded, LazyRenderer
+from services.single_flight import chart_flight, render_flight
+from services.render_spec import natal_render_inputs, png_dpi_for_width, RENDERER_VERSION
+from services.svg_chart_drawer import draw_natal_chart_svg, SVG_RENDERER_VERSION
 
 router = APIRouter()
 
-def load_interpretations(file_name: str) -> Dict:
-    try:
-        with open(INTERPRETATION_PATH / file_name, 'r', encoding='utf-8') as f: return json.load(f)
-    except FileNotFoundError: return {}
+# YENİ: Matplotlib çizicisi API sürecine yüklenmez; çizim süreçlerinde ilk çizimde içe aktarılır.
+draw_final_professional_chart = LazyRenderer("services.chart_drawer", "draw_final_professional_chart")
 
-@cache(expire=600)
-def get_natal_data_dependency(birth_data: BirthData) -> Dict[str, Any]:
-    natal_data = calculate_natal_data(birth_data)
-    if "error" in natal_data: raise HTTPException(status_code=400, detail=natal_data["error"])
-    return natal_data
+# --- DEĞİŞİKLİK: Bağımlılık artık async; haritalar normalleştirilmiş anahtarla L1 + Redis önbelleğinden okunur ---
+# `@cache` dekoratörü POST isteklerini önbelleğe almadığından (yalnızca GET'i destekler) kaldırıldı.
+# Hesaplama, Starlette'in ortak thread havuzu yerine ayrılmış efemeris havuzunda yapılır.
+async def _calculate_and_store(birth_data: BirthData, fingerprint: Optional[str]) -> NatalChart:
+    chart = await compute_executor.run(calculate_natal_chart, birth_data)
+    if isinstance(chart, dict): raise HTTPException(status_code=400, detail=chart["error"])
+    if fingerprint:
+        with metrics.stage("chart_cache"): await chart_cache.set(fingerprint, chart)
+    return chart
 
-# --- GÜNCELLENMİŞ ENDPOINT ---
-@router.post("/full-chart", summary="Tam Doğum Haritası Verisi", description="Bir doğum tarihine ait tüm astrolojik verileri (gezegenler, evler, açılar vb.) JSON formatında döndürür.")
-def get_full_natal_chart(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+async def get_natal_chart(birth_data: BirthData) -> NatalChart:
+    fingerprint = chart_fingerprint(birth_data)
+    if not fingerprint: return await _calculate_and_store(birth_data, None)
+    with metrics.stage("chart_cache"): chart = await chart_cache.get(fingerprint)
+    if chart is None:
+        # YENİ: Aynı harita için eşzamanlı istekler tek hesaplamayı bekler (worker içinde ortak görev, worker'lar arası Redis kilidi).
+        chart = await chart_flight.do(fingerprint, lambda: _calculate_and_store(birth_data, fingerprint), lambda: chart_cache.get(fingerprint))
+    return chart
+
+# DEĞİŞİKLİK: Motor ve önbellek `NatalChart` ile çalışır; endpoint'lerin kullandığı sözlük yapısı burada, yanıttan hemen önce üretilir.
+async def get_natal_data_dependency(birth_data: BirthData) -> Dict[str, Any]:
+    return (await get_natal_chart(birth_data)).to_dict()
+
+def _build_full_chart(natal_data: Dict[str, Any]) -> Dict[str, Any]:
     main_points = {"ascendant": {**get_zodiac_sign_details(natal_data['ascmc'][0])}, "mc": {**get_zodiac_sign_details(natal_data['ascmc'][1])}}
     rich_houses = [{"house": i + 1, **get_zodiac_sign_details(cusp)} for i, cusp in enumerate(natal_data['house_cusps'][:12])]
     return {
@@ -35,10 +70,157 @@ def get_full_natal_chart(natal_data: Dict[str, Any] = Depends(get_natal_data_dep
         "balance": natal_data.get("balance", {}) # YENİ: Denge verisi eklendi
     }
 
-@router.post("/wheel-chart", summary="Doğum Haritası Görseli", description="Profesyonel bir doğum haritası görselini (PNG formatında) üretir.")
-def get_natal_wheel_chart(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    chart_image_bytes = draw_final_professional_chart(natal_data)
-    return Response(content=chart_image_bytes, media_type="image/png")
+# --- GÜNCELLENMİŞ ENDPOINT ---
+@router.post("/full-chart", summary="Tam Doğum Haritası Verisi", description="Bir doğum tarihine ait tüm astrolojik verileri (gezegenler, evler, açılar vb.) JSON formatında döndürür.")
+async def get_full_natal_chart(birth_data: BirthData, natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    # YENİ: Parmak izi, harita önbellekteyken `/v1/synastry/rank` isteklerinde adayı doğum verisi yerine göstermek için kullanılabilir.
+    fingerprint = chart_fingerprint(birth_data)
+    return FastJSONResponse(_build_full_chart(natal_data), headers={"X-Chart-Fingerprint": fingerprint} if fingerprint else None)
+
+# --- YENİ: TOPLU (BATCH) HARİTA ENDPOINT'İ ---
+_batch_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_batch_executor() -> ProcessPoolExecutor:
+    global _batch_executor
+    if _batch_executor is None: _batch_executor = ProcessPoolExecutor(max_workers=BATCH_PROCESS_WORKERS)
+    return _batch_executor
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return " | ".join(f"Alan: '{' -> '.join(map(str, e.get('loc', [])))}', Hata: {e.get('msg')}" for e in exc.errors())
+
+def _parse_batch_record(raw: Any) -> Union[BirthData, str]:
+    """Kaydı doğrular; geçersizse kullanıcıya dönecek hata mesajını döndürür."""
+    if not isinstance(raw, dict): return "Her kayıt bir JSON nesnesi olmalıdır."
+    try: return BirthData(**raw)
+    except ValidationError as e: return _format_validation_error(e)
+
+async def _resolve_batch_item(index: int, birth_data: Union[BirthData, str], timezone_str: Optional[str]) -> Dict[str, Any]:
+    if isinstance(birth_data, str): return {"index": index, "status": "error", "message": birth_data}
+    if not timezone_str: return {"index": index, "status": "error", "message": TIMEZONE_NOT_FOUND_ERROR}
+    fingerprint = chart_fingerprint(birth_data, timezone_str)
+    chart = await chart_cache.get(fingerprint)
+    if chart is None:
+        chart, stages = await asyncio.get_running_loop().run_in_executor(_get_batch_executor(), capture_stages, calculate_natal_chart, birth_data, timezone_str)
+        metrics.merge(stages)
+        if isinstance(chart, dict): return {"index": index, "status": "error", "message": chart["error"]}
+        await chart_cache.set(fingerprint, chart)
+    return {"index": index, "status": "ok", "data": _build_full_chart(chart.to_dict())}
+
+def _batch_line(item: Dict[str, Any]) -> bytes:
+    return orjson.dumps(item) + b"\n"
+
+def _iter_ndjson_records(body: bytes) -> Iterator[Any]:
+    """NDJSON gövdesini satır satır çözer; her dolu satır bir kayıttır, çözülemeyen satırlar None olur."""
+    for line in body.splitlines():
+        if not line.strip(): continue
+        try: yield json.loads(line)
+        except ValueError: yield None
+
+_NO_MORE_RECORDS = object()
+
+async def _stream_batch_results(records: Iterable[Any]) -> AsyncIterator[bytes]:
+    """
+    Kayıtları `BATCH_WINDOW` büyüklüğündeki parçalar halinde doğrular, parçanın zaman dilimlerini
+    tek seferde çözer ve hesaplamayı süreç havuzuna dağıtır. En fazla `BATCH_WINDOW` kayıt aynı anda
+    işlenir; sonuçlar gönderim sırasıyla, hazır oldukça NDJSON satırı olarak yayınlanır.
+    """
+    records = iter(records); pending, index = deque(), 0
+    try:
+        while index < BATCH_MAX_ITEMS:
+            chunk = [_parse_batch_record(raw) for raw in itertools.islice(records, min(BATCH_WINDOW, BATCH_MAX_ITEMS - index))]
+            if not chunk: break
+            zones = iter(timezone_resolver.timezone_at_many((b.lat, b.lon) for b in chunk if isinstance(b, BirthData)))
+            for birth_data in chunk:
+                timezone_str = next(zones) if isinstance(birth_data, BirthData) else None
+                pending.append(asyncio.ensure_future(_resolve_batch_item(index, birth_data, timezone_str))); index += 1
+                while len(pending) >= BATCH_WINDOW: yield _batch_line(await pending.popleft())
+        while pending: yield _batch_line(await pending.popleft())
+        if next(records, _NO_MORE_RECORDS) is not _NO_MORE_RECORDS:
+            yield _batch_line({"index": index, "status": "error", "message": f"Tek istekte en fazla {BATCH_MAX_ITEMS} kayıt işlenebilir; kalan kayıtlar atlandı."})
+    finally:
+        for task in pending: task.cancel()
+
+@router.post(
+    "/batch",
+    summary="Toplu Doğum Haritası (NDJSON)",
+    description="Bir JSON dizisi veya NDJSON gövdesi (`Content-Type: application/x-ndjson`) olarak gönderilen doğum "
+                "verilerinin tam harita verilerini, gönderim sırasıyla ve her satırda bir kayıt olacak şekilde NDJSON "
+                "olarak akıtır. Hatalı kayıtlar tüm partiyi durdurmaz; o satırda `status: error` döner."
+)
+async def get_natal_batch(request: Request):
+    # Not: Gövde, yanıt akışı başlamadan önce okunur; Starlette akış sırasında `receive` kanalını
+    # bağlantı kopmasını dinlemek için kullandığından gövdeyi akış içinde okumak güvenli değildir.
+    # Kayıtlar yine de tek tek çözülür, doğrulanır ve hesaplanır.
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        records = _iter_ndjson_records(body)
+    else:
+        try: records = json.loads(body)
+        except ValueError: raise HTTPException(status_code=400, detail="İstek gövdesi geçerli bir JSON dizisi veya NDJSON olmalıdır.")
+        if not isinstance(records, list): raise HTTPException(status_code=400, detail="İstek gövdesi doğum verilerinden oluşan bir JSON dizisi olmalıdır.")
+        if len(records) > BATCH_MAX_ITEMS: raise HTTPException(status_code=413, detail=f"Tek istekte en fazla {BATCH_MAX_ITEMS} kayıt gönderilebilir.")
+    return StreamingResponse(_stream_batch_results(records), media_type="application/x-ndjson")
+
+# --- YENİ: İÇERİK ADRESLİ GÖRSEL ÖNBELLEĞİ ---
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match: return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+async def cached_chart_response(request: Request, kind: str, renderer_version: str, render_inputs: Any, media_type: str,
+                                render: Callable[..., bytes], *render_args: Any, in_render_pool: bool = True) -> Response:
+    """
+    Harita görselini, çizim girdilerinin özetinden türetilen anahtarla önbellekten sunar; yoksa
+    çizip önbelleğe yazar. Anahtar aynı zamanda ETag'dir: istemci aynı değeri `If-None-Match`
+    ile gönderirse görsel hiç okunmadan gövdesiz 304 döner. Matplotlib çizimleri (`in_render_pool`)
+    ayrı süreç havuzunda yapılır; havuz doluysa beklemeden 503 ve `Retry-After` döner.
+    Aynı görseli aynı anda isteyenler tek çizimi bekler (`render_flight`).
+    """
+    key = make_render_key(kind, renderer_version, render_inputs)
+    headers = {"ETag": f'"{key}"', "Cache-Control": f"private, max-age={RENDER_CACHE_MAX_AGE_SECONDS}"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]): return Response(status_code=304, headers=headers)
+    with metrics.stage("render_cache"): chart_image_bytes = await render_cache.get(key)
+    if chart_image_bytes is None:
+        # YENİ: Aynı görsel için eşzamanlı istekler tek çizimi bekler; worker'lar arası bekleme yalnızca görseller
+        # Redis'te paylaşılıyorsa yapılır (aksi halde diğer worker sonucu okuyamaz).
+        chart_image_bytes = await render_flight.do(key, lambda: _render_and_store(key, render, render_args, in_render_pool),
+                                                   (lambda: render_cache.get(key)) if render_cache.shared else None)
+    return Response(content=chart_image_bytes, media_type=media_type, headers=headers)
+
+async def _render_and_store(key: str, render: Callable[..., bytes], render_args: Tuple[Any, ...], in_render_pool: bool) -> bytes:
+    if not in_render_pool:
+        with metrics.stage("svg_draw"): chart_image_bytes = render(*render_args)
+    else:
+        try: chart_image_bytes = await render_pool.render(render, *render_args)
+        except RenderPoolOverloaded as e:
+            raise HTTPException(status_code=503, detail="Harita çizim kuyruğu dolu, lütfen biraz sonra tekrar deneyin.", headers={"Retry-After": str(e.retry_after)})
+        except BrokenProcessPool:
+            raise HTTPException(status_code=503, detail="Harita çizim servisi geçici olarak kullanılamıyor.", headers={"Retry-After": "1"})
+    await render_cache.set(key, chart_image_bytes)
+    return chart_image_bytes
+
+# YENİ: Görsel endpoint'lerinin ortak `format` ve `size` parametreleri
+CHART_FORMAT_QUERY = Query(ChartFormat.PNG, description="Görsel formatı: 'png' (bilgi panelleriyle tam sayfa) veya 'svg' (yalnızca harita çemberi).")
+CHART_SIZE_QUERY = Query(None, ge=CHART_MIN_SIZE, le=CHART_MAX_SIZE, description="Görsel genişliği (piksel). PNG yalnızca bu boyutta rasterize edilir.")
+
+async def chart_image_response(request: Request, kind: str, chart_format: ChartFormat, size: Optional[int], render_inputs: Any,
+                               png_renderer: Callable[..., bytes], svg_renderer: Callable[..., bytes], *render_args: Any) -> Response:
+    """İstenen formata göre çiziciyi seçer; format ve boyut önbellek anahtarına dahildir."""
+    if chart_format == ChartFormat.SVG:
+        size = size or CHART_DEFAULT_SVG_SIZE
+        # SVG çizimi milisaniyeler sürer ve pyplot kullanmaz; süreç havuzuna gönderilmez.
+        return await cached_chart_response(request, f"{kind}:svg:{size}", SVG_RENDERER_VERSION, render_inputs, "image/svg+xml",
+                                           svg_renderer, *render_args, size, in_render_pool=False)
+    size = size or CHART_DEFAULT_PNG_SIZE
+    return await cached_chart_response(request, f"{kind}:png:{size}", RENDERER_VERSION, render_inputs, "image/png",
+                                       png_renderer, *render_args, png_dpi_for_width(size))
+
+@router.post("/wheel-chart", summary="Doğum Haritası Görseli", description="Profesyonel bir doğum haritası görselini PNG (varsayılan) veya SVG formatında üretir.")
+async def get_natal_wheel_chart(request: Request, natal_data: Dict[str, Any] = Depends(get_natal_data_dependency),
+                                format: ChartFormat = CHART_FORMAT_QUERY, size: Optional[int] = CHART_SIZE_QUERY):
+    return await chart_image_response(request, "natal-wheel", format, size, natal_render_inputs(natal_data),
+                                      draw_final_professional_chart, draw_natal_chart_svg, natal_data)
 
 def _get_planet_from_map(planets_map: Dict, planet_name: str):
     data = planets_map.get(planet_name)
@@ -46,138 +228,154 @@ def _get_planet_from_map(planets_map: Dict, planet_name: str):
         raise HTTPException(status_code=404, detail=f"Haritada '{planet_name}' bilgisi bulunamadı.")
     return data
 
-@router.post("/report/ascendant", summary="Yükselen Burç Raporu", description="Yükselen burcun detaylarını ve astrolojik yorumunu döndürür.")
-def get_ascendant_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    interpretations = load_interpretations("ascendant.json")
-    ascendant_degree = natal_data['ascmc'][0]
-    sign_info = get_zodiac_sign_details(ascendant_degree)
-    interpretation = interpretations.get(sign_info['sign'], "Bu burç için yorum bulunamadı.")
-    return {"report_type": "Ascendant Sign", **sign_info, "interpretation": interpretation}
+# --- DEĞİŞİKLİK: Rapor içerikleri, tekil endpoint'lerin ve `/report/all`'un ortak kullandığı saf fonksiyonlara taşındı ---
+# Her fonksiyon (natal_data, planets_map) alır ve raporu döndürür; eksik veri için HTTPException fırlatır.
+PlanetsMap = Dict[str, Dict[str, Any]]
 
-@router.post("/report/mc-sign", summary="Tepe Noktası (MC) Burç Raporu", description="Tepe Noktası'nın (MC) bulunduğu burcun detaylarını ve kariyerle ilgili astrolojik yorumunu döndürür.")
-def get_mc_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    interpretations = load_interpretations("mc_signs.json")
-    mc_degree = natal_data['ascmc'][1]
-    sign_info = get_zodiac_sign_details(mc_degree)
-    interpretation = interpretations.get(sign_info['sign'], "Bu burç için yorum bulunamadı.")
-    return {"report_type": "Midheaven (MC) Sign", **sign_info, "interpretation": interpretation}
+def _planets_map(natal_data: Dict[str, Any]) -> PlanetsMap:
+    return {p['planet']: p for p in natal_data['planets']}
 
-@router.post("/report/sun-sign", summary="Güneş Burcu Raporu", description="Güneş burcunun detaylarını ve astrolojik yorumunu döndürür.")
-def get_sun_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("sun_sign.json")
-    sun_data = _get_planet_from_map(planets_map, "Sun")
-    interpretation = interpretations.get(sun_data['sign'], "Bu burç için yorum bulunamadı.")
-    return {"report_type": "Sun Sign", **sun_data, "interpretation": interpretation}
+def _planet_sign_report(planets_map: PlanetsMap, planet_name: str, filename: str, report_type: str) -> Dict[str, Any]:
+    planet_data = _get_planet_from_map(planets_map, planet_name)
+    interpretation = interpretation_store.lookup(filename, planet_data['sign'], default="Bu burç için yorum bulunamadı.")
+    return {"report_type": report_type, **planet_data, "interpretation": interpretation}
 
-@router.post("/report/moon-sign", summary="Ay Burcu Raporu", description="Ay burcunun detaylarını ve astrolojik yorumunu döndürür.")
-def get_moon_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("moon_sign.json")
-    moon_data = _get_planet_from_map(planets_map, "Moon")
-    interpretation = interpretations.get(moon_data['sign'], "Bu burç için yorum bulunamadı.")
-    return {"report_type": "Moon Sign", **moon_data, "interpretation": interpretation}
+def _planet_house_report(planets_map: PlanetsMap, planet_name: str, filename: str, report_type: str) -> Dict[str, Any]:
+    planet_data = _get_planet_from_map(planets_map, planet_name)
+    interpretation = interpretation_store.lookup(filename, planet_data.get('house'), default="Bu ev konumu için yorum bulunamadı.")
+    return {"report_type": report_type, **planet_data, "interpretation": interpretation}
 
-@router.post("/report/planets-in-houses", summary="Gezegenlerin Evlerdeki Yorumu", description="Haritadaki her bir gezegenin bulunduğu eve göre astrolojik yorumunu listeler.")
-def get_planets_in_houses_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    interpretations = load_interpretations("planets_in_houses.json")
+def _ascendant_report(natal_data: Dict[str, Any], planets_map: PlanetsMap) -> Dict[str, Any]:
+    sign_info = get_zodiac_sign_details(natal_data['ascmc'][0])
+    interpretation = interpretation_store.lookup("ascendant.json", sign_info['sign'], default="Bu burç için yorum bulunamadı.")
+    return {"report_type": "Ascendant Sign", **sign_info, "interpretation": interpretation}
+
+def _mc_sign_report(natal_data: Dict[str, Any], planets_map: PlanetsMap) -> Dict[str, Any]:
+    sign_info = get_zodiac_sign_details(natal_data['ascmc'][1])
+    interpretation = interpretation_store.lookup("mc_signs.json", sign_info['sign'], default="Bu burç için yorum bulunamadı.")
+    return {"report_type": "Midheaven (MC) Sign", **sign_info, "interpretation": interpretation}
+
+def _planets_in_houses_report(natal_data: Dict[str, Any], planets_map: PlanetsMap) -> Dict[str, Any]:
     report_list = []
     planets_to_interpret = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto']
     for planet_data in natal_data['planets']:
         if planet_data['planet'] in planets_to_interpret:
-            house_number = str(planet_data['house'])
-            planet_interpretations = interpretations.get(planet_data['planet'], {})
-            interpretation = planet_interpretations.get(house_number, "Bu gezegen/ev kombinasyonu için yorum bulunamadı.")
+            interpretation = interpretation_store.lookup("planets_in_houses.json", planet_data['planet'], planet_data['house'],
+                                                         default="Bu gezegen/ev kombinasyonu için yorum bulunamadı.")
             report_list.append({"planet": planet_data['planet'], "house": planet_data['house'], "sign": planet_data['sign'], "interpretation": interpretation})
     return {"report_type": "Planets in Houses", "interpretations": report_list}
 
-@router.post("/report/aspects", summary="Gezegenler Arası Açı Yorumları", description="Haritadaki gezegenler arasında oluşan önemli açıların astrolojik yorumlarını listeler.")
-def get_aspects_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    interpretations = load_interpretations("aspects.json")
+def _aspects_report(natal_data: Dict[str, Any], planets_map: PlanetsMap) -> Dict[str, Any]:
     report_list = []
-    aspect_list = natal_data.get("aspects", [])
-    for aspect in aspect_list:
+    for aspect in natal_data.get("aspects", []):
         p1, p2, aspect_name = aspect['planet1'], aspect['planet2'], aspect['aspect']
         sorted_planets = sorted([p1, p2])
-        aspect_key = f"{sorted_planets[0]}-{sorted_planets[1]}"
-        aspect_group = interpretations.get(aspect_key, {})
-        interpretation = aspect_group.get(aspect_name, "Bu açı kalıbı için özel yorum bulunamadı.")
+        interpretation = interpretation_store.lookup("aspects.json", sorted_planets[0], sorted_planets[1], aspect_name,
+                                                     default="Bu açı kalıbı için özel yorum bulunamadı.")
         if "bulunamadı" not in interpretation: report_list.append({**aspect, "interpretation": interpretation})
     return {"report_type": "Aspect Interpretations", "interpretations": report_list}
 
-@router.post("/report/house-rulers-in-houses", summary="Ev Yöneticileri Raporu", description="Her bir evin yöneticisinin hangi evde olduğunu ve bunun ne anlama geldiğini yorumlar.")
-def get_house_rulers_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    interpretations = load_interpretations("house_rulers_in_houses.json")
+def _house_rulers_report(natal_data: Dict[str, Any], planets_map: PlanetsMap) -> Dict[str, Any]:
     report_list = []
-    house_rulers_data = natal_data.get("house_rulers", [])
-    for ruler_info in house_rulers_data:
-        managed_house = str(ruler_info.get("house"))
-        ruler_in_house = str(ruler_info.get("ruler_in_house"))
-        house_group = interpretations.get(managed_house, {})
-        interpretation = house_group.get(ruler_in_house, "Bu ev yöneticiliği kombinasyonu için özel yorum bulunamadı.")
+    for ruler_info in natal_data.get("house_rulers", []):
+        interpretation = interpretation_store.lookup("house_rulers_in_houses.json", ruler_info.get("house"), ruler_info.get("ruler_in_house"),
+                                                     default="Bu ev yöneticiliği kombinasyonu için özel yorum bulunamadı.")
         if "bulunamadı" not in interpretation: report_list.append({**ruler_info, "interpretation": interpretation})
     return {"report_type": "House Rulerships", "interpretations": report_list}
 
-@router.post("/report/retrogrades", summary="Retro Gezegenler Raporu", description="Doğum haritasında geri harekette (retro) olan gezegenleri ve bunların astrolojik anlamlarını listeler.")
-def get_retrograde_planets_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    interpretations = load_interpretations("retrograde_planets.json")
+def _retrogrades_report(natal_data: Dict[str, Any], planets_map: PlanetsMap) -> Dict[str, Any]:
     report_list = []
     for planet_data in natal_data.get("planets", []):
         if planet_data.get("is_retrograde"):
-            interpretation = interpretations.get(planet_data['planet'], "Bu retro gezegen için özel yorum bulunamadı.")
+            interpretation = interpretation_store.lookup("retrograde_planets.json", planet_data['planet'], default="Bu retro gezegen için özel yorum bulunamadı.")
             if "bulunamadı" not in interpretation: report_list.append({"planet": planet_data['planet'], "interpretation": interpretation})
     return {"report_type": "Retrograde Planets", "interpretations": report_list}
 
+def _balance_report(natal_data: Dict[str, Any], planets_map: PlanetsMap) -> Dict[str, Any]:
+    """Astroloji motorundan gelen 'balance' verisini doğrudan kullanıcıya sunar."""
+    balance_data = natal_data.get("balance")
+    if not balance_data:
+         raise HTTPException(status_code=404, detail="Harita için denge verisi hesaplanamadı.")
+    return {"report_type": "Chart Balance (Insights)", "data": balance_data}
+
+# Anahtarlar, tekil rapor endpoint'lerinin yollarıyla (`/report/<anahtar>`) aynıdır ve `include=` seçicisinde kullanılır.
+REPORT_BUILDERS: Dict[str, Callable[[Dict[str, Any], PlanetsMap], Dict[str, Any]]] = {
+    "ascendant": _ascendant_report,
+    "mc-sign": _mc_sign_report,
+    "sun-sign": lambda natal_data, planets_map: _planet_sign_report(planets_map, "Sun", "sun_sign.json", "Sun Sign"),
+    "moon-sign": lambda natal_data, planets_map: _planet_sign_report(planets_map, "Moon", "moon_sign.json", "Moon Sign"),
+    "planets-in-houses": _planets_in_houses_report,
+    "aspects": _aspects_report,
+    "house-rulers-in-houses": _house_rulers_report,
+    "retrogrades": _retrogrades_report,
+    "north-node-sign": lambda natal_data, planets_map: _planet_sign_report(planets_map, "True Node", "north_node_in_signs.json", "North Node in Sign"),
+    "lilith-sign": lambda natal_data, planets_map: _planet_sign_report(planets_map, "Lilith", "lilith_in_signs.json", "Lilith in Sign"),
+    "chiron-sign": lambda natal_data, planets_map: _planet_sign_report(planets_map, "Chiron", "chiron_in_signs.json", "Chiron in Sign"),
+    "north-node-in-house": lambda natal_data, planets_map: _planet_house_report(planets_map, "True Node", "north_node_in_houses.json", "North Node in House"),
+    "lilith-in-house": lambda natal_data, planets_map: _planet_house_report(planets_map, "Lilith", "lilith_in_houses.json", "Lilith in House"),
+    "chiron-in-house": lambda natal_data, planets_map: _planet_house_report(planets_map, "Chiron", "chiron_in_houses.json", "Chiron in House"),
+    "balance": _balance_report,
+}
+
+def _build_report(name: str, natal_data: Dict[str, Any]) -> Dict[str, Any]:
+    return REPORT_BUILDERS[name](natal_data, _planets_map(natal_data))
+# --- DEĞİŞİKLİK SONU ---
+
+@router.post("/report/ascendant", summary="Yükselen Burç Raporu", description="Yükselen burcun detaylarını ve astrolojik yorumunu döndürür.")
+async def get_ascendant_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("ascendant", natal_data))
+
+@router.post("/report/mc-sign", summary="Tepe Noktası (MC) Burç Raporu", description="Tepe Noktası'nın (MC) bulunduğu burcun detaylarını ve kariyerle ilgili astrolojik yorumunu döndürür.")
+async def get_mc_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("mc-sign", natal_data))
+
+@router.post("/report/sun-sign", summary="Güneş Burcu Raporu", description="Güneş burcunun detaylarını ve astrolojik yorumunu döndürür.")
+async def get_sun_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("sun-sign", natal_data))
+
+@router.post("/report/moon-sign", summary="Ay Burcu Raporu", description="Ay burcunun detaylarını ve astrolojik yorumunu döndürür.")
+async def get_moon_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("moon-sign", natal_data))
+
+@router.post("/report/planets-in-houses", summary="Gezegenlerin Evlerdeki Yorumu", description="Haritadaki her bir gezegenin bulunduğu eve göre astrolojik yorumunu listeler.")
+async def get_planets_in_houses_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("planets-in-houses", natal_data))
+
+@router.post("/report/aspects", summary="Gezegenler Arası Açı Yorumları", description="Haritadaki gezegenler arasında oluşan önemli açıların astrolojik yorumlarını listeler.")
+async def get_aspects_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("aspects", natal_data))
+
+@router.post("/report/house-rulers-in-houses", summary="Ev Yöneticileri Raporu", description="Her bir evin yöneticisinin hangi evde olduğunu ve bunun ne anlama geldiğini yorumlar.")
+async def get_house_rulers_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("house-rulers-in-houses", natal_data))
+
+@router.post("/report/retrogrades", summary="Retro Gezegenler Raporu", description="Doğum haritasında geri harekette (retro) olan gezegenleri ve bunların astrolojik anlamlarını listeler.")
+async def get_retrograde_planets_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("retrogrades", natal_data))
+
 @router.post("/report/north-node-sign", summary="Kuzey Ay Düğümü Raporu", description="Karmik yaşam yolunu gösteren Kuzey Ay Düğümü'nün burcunu ve anlamını yorumlar.")
-def get_north_node_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("north_node_in_signs.json")
-    node_data = _get_planet_from_map(planets_map, "True Node")
-    interpretation = interpretations.get(node_data['sign'], "Bu burç için yorum bulunamadı.")
-    return {"report_type": "North Node in Sign", **node_data, "interpretation": interpretation}
+async def get_north_node_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("north-node-sign", natal_data))
 
 @router.post("/report/lilith-sign", summary="Lilith (Kara Ay) Raporu", description="Bastırılmış gölge yönleri temsil eden Lilith'in burcunu ve anlamını yorumlar.")
-def get_lilith_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("lilith_in_signs.json")
-    lilith_data = _get_planet_from_map(planets_map, "Lilith")
-    interpretation = interpretations.get(lilith_data['sign'], "Bu burç için yorum bulunamadı.")
-    return {"report_type": "Lilith in Sign", **lilith_data, "interpretation": interpretation}
+async def get_lilith_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("lilith-sign", natal_data))
 
 @router.post("/report/chiron-sign", summary="Chiron (Yaralı Şifacı) Raporu", description="En derin yaraları ve şifa potansiyelini gösteren Chiron'un burcunu ve anlamını yorumlar.")
-def get_chiron_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("chiron_in_signs.json")
-    chiron_data = _get_planet_from_map(planets_map, "Chiron")
-    interpretation = interpretations.get(chiron_data['sign'], "Bu burç için yorum bulunamadı.")
-    return {"report_type": "Chiron in Sign", **chiron_data, "interpretation": interpretation}
+async def get_chiron_sign_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("chiron-sign", natal_data))
 
 @router.post("/report/north-node-in-house", summary="Kuzey Ay Düğümü Ev Raporu", description="Karmik yaşam yolunun hangi hayat alanında gelişeceğini yorumlar.")
-def get_north_node_in_house_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("north_node_in_houses.json")
-    node_data = _get_planet_from_map(planets_map, "True Node")
-    house_key = str(node_data.get('house', ''))
-    interpretation = interpretations.get(house_key, "Bu ev konumu için yorum bulunamadı.")
-    return {"report_type": "North Node in House", **node_data, "interpretation": interpretation}
+async def get_north_node_in_house_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("north-node-in-house", natal_data))
 
 @router.post("/report/lilith-in-house", summary="Lilith (Kara Ay) Ev Raporu", description="Bastırılmış gölge yönlerin hangi hayat alanında ortaya çıktığını yorumlar.")
-def get_lilith_in_house_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("lilith_in_houses.json")
-    lilith_data = _get_planet_from_map(planets_map, "Lilith")
-    house_key = str(lilith_data.get('house', ''))
-    interpretation = interpretations.get(house_key, "Bu ev konumu için yorum bulunamadı.")
-    return {"report_type": "Lilith in House", **lilith_data, "interpretation": interpretation}
+async def get_lilith_in_house_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("lilith-in-house", natal_data))
 
 @router.post("/report/chiron-in-house", summary="Chiron (Yaralı Şifacı) Ev Raporu", description="En derin yaraların ve şifa potansiyelinin hangi hayat alanında olduğunu yorumlar.")
-def get_chiron_in_house_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    planets_map = {p['planet']: p for p in natal_data['planets']}
-    interpretations = load_interpretations("chiron_in_houses.json")
-    chiron_data = _get_planet_from_map(planets_map, "Chiron")
-    house_key = str(chiron_data.get('house', ''))
-    interpretation = interpretations.get(house_key, "Bu ev konumu için yorum bulunamadı.")
-    return {"report_type": "Chiron in House", **chiron_data, "interpretation": interpretation}
+async def get_chiron_in_house_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("chiron-in-house", natal_data))
 
 # --- YENİ ENDPOINT ---
 @router.post(
@@ -185,15 +383,37 @@ def get_chiron_in_house_report(natal_data: Dict[str, Any] = Depends(get_natal_da
     summary="Harita Dengesi Raporu (Insights)",
     description="Haritadaki gezegenlerin element ve nitelik dağılımını göstererek, haritanın genel karakteri hakkında bir özet sunar."
 )
-def get_balance_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
-    """
-    Astroloji motorundan gelen 'balance' verisini doğrudan kullanıcıya sunar.
-    """
-    balance_data = natal_data.get("balance")
-    if not balance_data:
-         raise HTTPException(status_code=404, detail="Harita için denge verisi hesaplanamadı.")
-    
-    return {
-        "report_type": "Chart Balance (Insights)",
-        "data": balance_data
-    }
\ No newline at end of file
+async def get_balance_report(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency)):
+    return FastJSONResponse(_build_report("balance", natal_data))
+
+# --- YENİ: TÜM RAPORLAR TEK İSTEKTE ---
+FULL_CHART_SECTION = "full-chart"
+REPORT_SECTIONS = [FULL_CHART_SECTION, *REPORT_BUILDERS]
+
+def _parse_report_include(include: Optional[List[str]]) -> List[str]:
+    """`include` hem tekrarlı (`?include=a&include=b`) hem virgüllü (`?include=a,b`) verilebilir; boşsa tüm bölümler döner."""
+    requested = [name.strip() for value in include or [] for name in value.split(",") if name.strip()]
+    if not requested: return REPORT_SECTIONS
+    unknown = [name for name in requested if name not in REPORT_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Bilinmeyen rapor bölümü: {', '.join(unknown)}. Geçerli bölümler: {', '.join(REPORT_SECTIONS)}")
+    return list(dict.fromkeys(requested))
+
+@router.post(
+    "/report/all",
+    summary="Tüm Raporlar (Tek İstek)",
+    description="Doğum haritasını bir kez hesaplar (veya önbellekten okur) ve istenen tüm rapor bölümlerini tek yanıtta döndürür. "
+                f"`include` ile bölümler seçilebilir: {', '.join(REPORT_SECTIONS)}. Verilmezse tümü döner. "
+                "Tekil endpoint'lerde 404 veren eksik veriler, ilgili bölümde `{\"error\": ...}` olarak belirtilir."
+)
+async def get_all_reports(natal_data: Dict[str, Any] = Depends(get_natal_data_dependency),
+                          include: Optional[List[str]] = Query(None, description="Döndürülecek bölümler (virgülle ayrılmış veya tekrarlı).")):
+    sections = _parse_report_include(include)
+    planets_map = _planets_map(natal_data)
+    reports: Dict[str, Any] = {}
+    for name in sections:
+        if name == FULL_CHART_SECTION: reports[name] = _build_full_chart(natal_data); continue
+        try: reports[name] = REPORT_BUILDERS[name](natal_data, planets_map)
+        except HTTPException as e: reports[name] = {"error": e.detail}
+    return FastJSONResponse({"reports": reports})
+# --- BİTTİ ---
@@ -1,45 +1,59 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, Response, Depends, HTTPException
+import numpy as np
 
-# --- DEĞİŞİKLİK: Caching ve ana natal bağımlılığını import ediyoruz ---
-from fastapi_cache.decorator import cache
-from models.pydantic_models import SynastryData, BirthData
-from services.astrology_engine import calculate_synastry_aspects
-from services.chart_drawer import draw_synastry_biwheel_chart
-from api.v1.natal import get_natal_data_dependency
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+# --- DEĞİŞİKLİK: Ana (önbellekli) natal bağımlılığını import ediyoruz ---
+from models.pydantic_models import SynastryData, BirthData, ChartFormat, SynastryRankRequest
+from core.config import (
+    PLANET_NUMBERS, SYNASTRY_RANK_MAX_CANDIDATES, SYNASTRY_RANK_ASPECT_WEIGHTS, SYNASTRY_RANK_PLANET_WEIGHTS
+)
+from services.astrology_engine import calculate_synastry_aspects, planet_longitudes_many
+from services.aspect_engine import SYNASTRY_ASPECT_TABLE, rank_synastry_candidates
+from services.chart_cache import chart_cache
+from services.chart_model import NatalChart
+from services.compute_executor import compute_executor
+from services.render_pool import LazyRenderer
+from services.render_spec import synastry_render_inputs
+from services.svg_chart_drawer import draw_synastry_biwheel_svg
+from services.metrics import metrics
+from api.v1.natal import get_natal_chart, get_natal_data_dependency, chart_image_response, CHART_FORMAT_QUERY, CHART_SIZE_QUERY
+from api.responses import FastJSONResponse
 
 router = APIRouter()
 
+# YENİ: Matplotlib çizicisi API sürecine yüklenmez; çizim süreçlerinde ilk çizimde içe aktarılır.
+draw_synastry_biwheel_chart = LazyRenderer("services.chart_drawer", "draw_synastry_biwheel_chart")
+
 # --- DEPENDENCIES (BAĞIMLILIKLAR) ---
 
 # YENİ ve GÜNCELLENMİŞ: Bu fonksiyon, iki kişinin natal haritasını,
-# zaten önbelleğe alınmış olan `get_natal_data_dependency`'yi kullanarak hesaplar.
-def get_synastry_charts_dependency(data: SynastryData) -> Dict[str, Any]:
+# Redis önbelleğini kullanan `get_natal_data_dependency` üzerinden hesaplar.
+async def get_synastry_charts_dependency(data: SynastryData) -> Dict[str, Any]:
     """
     İki kişilik doğum verilerini, ana önbellekli bağımlılığı kullanarak hesaplar.
     Bu, eğer haritalardan biri daha önce hesaplandıysa, sonucun doğrudan
-    önbellekten gelmesini sağlar.
+    önbellekten gelmesini sağlar. İki harita eşzamanlı olarak istenir.
     """
     # Not: Burada doğrudan `raise HTTPException` kullanmıyoruz, çünkü
     # `get_natal_data_dependency` zaten hata durumunda bunu bizim için yapıyor.
-    p1_data = get_natal_data_dependency(birth_data=data.person1)
-    p2_data = get_natal_data_dependency(birth_data=data.person2)
+    p1_data, p2_data = await asyncio.gather(get_natal_data_dependency(birth_data=data.person1),
+                                            get_natal_data_dependency(birth_data=data.person2))
 
     return {"p1_data": p1_data, "p2_data": p2_data}
 
-# YENİ ve GÜNCELLENMİŞ: Bu bağımlılık artık kendisi de önbelleğe alınıyor.
-# Aynı iki kişi için sinastri analizi tekrar istendiğinde, tüm sonuç anında dönecektir.
-@cache(expire=600)
-def get_full_synastry_bundle_dependency(charts: Dict[str, Any] = Depends(get_synastry_charts_dependency)) -> Dict[str, Any]:
+# DEĞİŞİKLİK: `@cache` kaldırıldı; POST isteklerinde zaten devreye girmiyordu. Haritalar
+# yukarıdaki bağımlılıkta önbellekten gelir, sinastri açıları ise milisaniyenin altında hesaplanır.
+async def get_full_synastry_bundle_dependency(charts: Dict[str, Any] = Depends(get_synastry_charts_dependency)) -> Dict[str, Any]:
     """
     Hazır hesaplanmış haritaları alıp üzerine sinastri açılarını ekler.
-    Bu fonksiyonun sonucu da 10 dakika boyunca önbellekte tutulur.
     """
     p1_data = charts["p1_data"]
     p2_data = charts["p2_data"]
     
-    synastry_aspects = calculate_synastry_aspects(p1_data['planets'], p2_data['planets'])
+    with metrics.stage("synastry_aspects"): synastry_aspects = calculate_synastry_aspects(p1_data['planets'], p2_data['planets'])
     
     return {**charts, "aspects": synastry_aspects}
 
@@ -53,7 +67,7 @@ def get_full_synastry_bundle_dependency(charts: Dict[str, Any] = Depends(get_syn
     summary="Ev Yerleşimleri (House Overlays)",
     description="Birinci kişinin gezegenlerinin, ikinci kişinin haritasındaki hangi evlere düştüğünü listeler."
 )
-def get_synastry_house_overlays(
+async def get_synastry_house_overlays(
     data: SynastryData,
     charts: Dict[str, Any] = Depends(get_synastry_charts_dependency)
 ):
@@ -84,7 +98,7 @@ def get_synastry_house_overlays(
     summary="Sinastri Açıları",
     description="İki harita arasındaki gezegenlerin birbirleriyle yaptığı açıları listeler."
 )
-def get_synastry_aspects(
+async def get_synastry_aspects(
     data: SynastryData,
     synastry_bundle: Dict[str, Any] = Depends(get_full_synastry_bundle_dependency)
 ):
@@ -97,15 +111,68 @@ def get_synastry_aspects(
 @router.post(
     "/bi-wheel-chart",
     summary="Sinastri Haritası Görseli (Bi-Wheel)",
-    description="İki doğum haritasını iç içe çizen profesyonel bir sinastri haritası (PNG) üretir."
+    description="İki doğum haritasını iç içe çizen profesyonel bir sinastri haritasını PNG (varsayılan) veya SVG formatında üretir."
 )
-def get_synastry_biwheel_chart_endpoint(
-    synastry_bundle: Dict[str, Any] = Depends(get_full_synastry_bundle_dependency)
+async def get_synastry_biwheel_chart_endpoint(
+    request: Request,
+    synastry_bundle: Dict[str, Any] = Depends(get_full_synastry_bundle_dependency),
+    format: ChartFormat = CHART_FORMAT_QUERY,
+    size: Optional[int] = CHART_SIZE_QUERY
 ):
-    chart_image_bytes = draw_synastry_biwheel_chart(
-        p1_data=synastry_bundle['p1_data'],
-        p2_data=synastry_bundle['p2_data'],
-        synastry_aspects=synastry_bundle['aspects']
-    )
-    
-    return Response(content=chart_image_bytes, media_type="image/png")
\ No newline at end of file
+    # YENİ: Aynı çift için görsel yeniden çizilmez; ETag eşleşirse 304 döner.
+    chart_args = (synastry_bundle['p1_data'], synastry_bundle['p2_data'], synastry_bundle['aspects'])
+    return await chart_image_response(request, "synastry-biwheel", format, size, synastry_render_inputs(*chart_args),
+                                      draw_synastry_biwheel_chart, draw_synastry_biwheel_svg, *chart_args)
+
+# --- YENİ: BİRE-ÇOK SİNASTRİ SIRALAMASI ---
+CANDIDATE_NOT_CACHED_ERROR = "Harita önbellekte bulunamadı; adayı doğum verisiyle gönderin."
+
+def _rank_weights(overrides: Optional[Dict[str, float]], defaults: Dict[str, float], allowed: Sequence[str], label: str) -> Dict[str, float]:
+    unknown = sorted(set(overrides or {}) - set(allowed))
+    if unknown: raise HTTPException(status_code=400, detail=f"Bilinmeyen {label}: {', '.join(unknown)}")
+    return {**defaults, **(overrides or {})}
+
+def _rank_candidates(payload: SynastryRankRequest, person_chart: NatalChart, cached_charts: List[Optional[NatalChart]],
+                     names: List[str], aspect_weights: Dict[str, float], planet_weights: Dict[str, float]) -> Tuple[List[Dict], List[Dict]]:
+    """Aday boylam matrisini kurar ve puanlar; efemeris havuzunda çalışır. Dönüş: (sonuçlar, hatalar)."""
+    references = [{"index": i} for i in range(len(payload.candidates))] + [{"fingerprint": f} for f in payload.candidate_fingerprints]
+    with metrics.stage("rank_positions"):
+        positions, errors = planet_longitudes_many(payload.candidates, names)
+        cached_positions = np.full((len(cached_charts), len(names)), np.nan)
+        for row, chart in enumerate(cached_charts):
+            if chart is None: errors.append(CANDIDATE_NOT_CACHED_ERROR); continue
+            errors.append(None); chart_positions = {body.planet: body.longitude for body in chart.bodies}
+            cached_positions[row] = [chart_positions.get(name, np.nan) for name in names]
+        positions = np.concatenate([positions, cached_positions])
+    valid = [i for i, error in enumerate(errors) if error is None]
+    person_positions = {body.planet: body.longitude for body in person_chart.bodies}
+    with metrics.stage("rank_scoring"):
+        ranked = rank_synastry_candidates(names, [person_positions.get(name, np.nan) for name in names], positions[valid],
+                                          aspect_weights, [planet_weights[name] for name in names], payload.top_k)
+    results = [{"rank": rank, **references[valid[row]], "score": score, "aspects": aspects}
+               for rank, (row, score, aspects) in enumerate(ranked, start=1)]
+    return results, [{**references[i], "message": error} for i, error in enumerate(errors) if error is not None]
+
+@router.post(
+    "/rank",
+    summary="Sinastri Uyum Sıralaması (Bire-Çok)",
+    description=f"Bir kişiyi en fazla {SYNASTRY_RANK_MAX_CANDIDATES} adayla (doğum verisi veya harita önbelleği parmak izi) "
+                "sinastri açıları üzerinden puanlar ve en yüksek puanlı `top_k` adayı, puana katkı veren açılarıyla döndürür. "
+                "Puan, her açı için `açı ağırlığı x gökcismi ağırlıklarının çarpımı x (1 - orb / orb sınırı)` toplamıdır; "
+                "ağırlıklar istekte değiştirilebilir. Tüm adaylar tek bir vektörel geçişte puanlanır."
+)
+async def rank_synastry(payload: SynastryRankRequest):
+    total = len(payload.candidates) + len(payload.candidate_fingerprints)
+    if total == 0: raise HTTPException(status_code=400, detail="En az bir aday gönderilmelidir.")
+    if total > SYNASTRY_RANK_MAX_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"Tek istekte en fazla {SYNASTRY_RANK_MAX_CANDIDATES} aday puanlanabilir.")
+    aspect_weights = _rank_weights(payload.aspect_weights, SYNASTRY_RANK_ASPECT_WEIGHTS, SYNASTRY_ASPECT_TABLE.names, "açı")
+    planet_weights = _rank_weights(payload.planet_weights, SYNASTRY_RANK_PLANET_WEIGHTS, list(PLANET_NUMBERS), "gökcismi")
+    # Ağırlığı 0 olan gökcisimleri adaylar için hiç hesaplanmaz.
+    names = [name for name in PLANET_NUMBERS if planet_weights.get(name)]
+    if not names: raise HTTPException(status_code=400, detail="En az bir gökcisminin ağırlığı sıfırdan farklı olmalıdır.")
+    person_chart = await get_natal_chart(payload.person)
+    with metrics.stage("chart_cache"): cached_charts = await chart_cache.get_many(payload.candidate_fingerprints)
+    results, errors = await compute_executor.run(_rank_candidates, payload, person_chart, cached_charts, names, aspect_weights, planet_weights)
+    return FastJSONResponse({"person": payload.person.dict(), "scored": total - len(errors), "results": results, "errors": errors})
+# --- BİTTİ ---
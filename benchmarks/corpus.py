@@ -0,0 +1,57 @@
+import itertools
+from typing import List
+
+from models.pydantic_models import BirthData, HouseSystem, RulershipSystem
+
+# Benchmark'ların kullandığı sabit doğum verisi kümesi. Her çalıştırmada aynı sırayla aynı kayıtlar
+# üretilir; sonuçların sürümler arasında karşılaştırılabilmesi buna bağlıdır. Listeleri değiştirmek
+# mevcut baseline dosyalarını geçersiz kılar.
+
+# (isim, enlem, boylam). Kutup dairesi yakınındaki ve ötesindeki konumlar, Placidus / Koch gibi
+# sistemlerin hata verdiği (ev hesaplanamayan) durumları da kapsar.
+LOCATIONS = [
+    ("İstanbul", 41.0082, 28.9784),
+    ("New York", 40.7128, -74.0060),
+    ("Sydney", -33.8688, 151.2093),
+    ("Tokyo", 35.6762, 139.6503),
+    ("Quito", -0.1807, -78.4678),
+    ("Reykjavik", 64.1466, -21.9426),
+    ("Tromsø", 69.6492, 18.9553),
+    ("Longyearbyen", 78.2232, 15.6267),
+    ("Ushuaia", -54.8019, -68.3030),
+    ("McMurdo", -77.8419, 166.6863),
+]
+
+# (tarih, saat)
+DATES = [
+    ("1955-03-21", "04:15"),
+    ("1972-07-04", "23:59"),
+    ("1990-05-15", "10:30"),
+    ("2000-01-01", "00:00"),
+    ("2012-12-21", "11:11"),
+]
+
+# Merkür-Chiron arasındaki dokuz gökcisminden en az yedisinin retro olduğu günler (1900-2050 taraması).
+RETROGRADE_HEAVY_DATES = [
+    ("1944-01-08", "12:00"),
+    ("2018-08-16", "12:00"),
+    ("2020-09-10", "12:00"),
+    ("2021-10-05", "12:00"),
+    ("2022-09-30", "12:00"),
+    ("2023-09-13", "12:00"),
+    ("2034-10-18", "12:00"),
+    ("2037-12-16", "12:00"),
+]
+
+
+def build_corpus() -> List[BirthData]:
+    """Her ev sistemi her konumla bir kez eşleşir; tarih ve yöneticilik sistemi sırayla dönüştürülür."""
+    dates = itertools.cycle(DATES + RETROGRADE_HEAVY_DATES)
+    rulerships = itertools.cycle(list(RulershipSystem))
+    corpus = []
+    for house_system in HouseSystem:
+        for _, lat, lon in LOCATIONS:
+            birth_date, birth_time = next(dates)
+            corpus.append(BirthData(date=birth_date, time=birth_time, lat=lat, lon=lon,
+                                    house_system=house_system, rulership_system=next(rulerships)))
+    return corpus
@@ -0,0 +1,310 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from unittest import mock
+
+import fakeredis
+import httpx
+import numpy as np
+import swisseph as swe
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.corpus import build_corpus
+from core.config import (
+    API_KEY, CHART_DEFAULT_PNG_SIZE, CHART_DEFAULT_SVG_SIZE, SYNASTRY_RANK_ASPECT_WEIGHTS, SYNASTRY_RANK_PLANET_WEIGHTS
+)
+from models.pydantic_models import BirthData
+from services.astrology_engine import (
+    calculate_natal_chart, calculate_natal_data, birth_moment_utc, recognize_aspect_patterns,
+    _body_positions, _natal_aspects
+)
+from services.aspect_engine import rank_synastry_candidates
+from services.chart_drawer import draw_final_professional_chart, png_dpi_for_width
+from services.compute_executor import ensure_ephe_path, swe_lock
+from services.daily_horoscope import calculate_active_transits
+from services.sky_snapshot import compute_sky
+from services.svg_chart_drawer import draw_natal_chart_svg
+from services.timezone_resolver import TimezoneResolver, timezone_resolver
+
+# Motor aşamaları, iki çizici ve uçtan uca HTTP istekleri için benchmark'lar. HTTP istekleri uygulamaya
+# süreç içinden (ASGI) gönderilir; Redis yerine fakeredis kullanılır, yani ağ ve gerçek Redis ölçüme girmez.
+# Sonuçlar JSON olarak yazılır; `--baseline` verilirse medyanı eşiği aşan benchmark'lar çıkış kodunu 1 yapar.
+#
+#   python -m benchmarks.run --output results.json
+#   python -m benchmarks.run --baseline results.json --threshold 0.2
+
+DEFAULT_THRESHOLD = float(os.getenv("BENCHMARK_REGRESSION_THRESHOLD", "0.2"))
+# Mikro saniyelik aşamalarda gürültünün regresyon sayılmaması için mutlak alt sınır (ms)
+DEFAULT_MIN_DELTA_MS = float(os.getenv("BENCHMARK_MIN_DELTA_MS", "0.05"))
+DRAWER_SAMPLE_SIZE = 6
+HEADERS = {"X-API-Key": API_KEY}
+
+
+def _summary(samples_ms: List[float], errors: int) -> Dict[str, Any]:
+    ordered = sorted(samples_ms)
+    if not ordered: return {"samples": 0, "errors": errors}
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {"median_ms": round(statistics.median(ordered), 4), "p95_ms": round(p95, 4), "mean_ms": round(statistics.fmean(ordered), 4),
+            "min_ms": round(ordered[0], 4), "samples": len(ordered), "errors": errors}
+
+
+def _measure(func: Callable[[Any], Any], items: List[Any], rounds: int) -> Dict[str, Any]:
+    """Her öğe için `func` bir kez ısınma amaçlı, ardından `rounds` kez ölçülerek çalıştırılır. İstisnalar hata sayılır."""
+    samples, errors = [], 0
+    for round_index in range(rounds + 1):
+        for item in items:
+            started = time.perf_counter()
+            try: func(item)
+            except Exception:
+                errors += round_index > 0
+                continue
+            if round_index: samples.append((time.perf_counter() - started) * 1000)
+    return _summary(samples, errors)
+
+
+async def _measure_async(func: Callable[[Any, int], Awaitable[bool]], items: List[Any], rounds: int, warmup: bool = True) -> Dict[str, Any]:
+    """`func(item, round)` başarı durumunu döndürür. `warmup=False` ise ısınma turu atlanır (soğuk önbellek ölçümleri)."""
+    samples, errors = [], 0
+    for round_index in range(0 if warmup else 1, rounds + 1):
+        for item in items:
+            started = time.perf_counter()
+            ok = await func(item, round_index)
+            elapsed = (time.perf_counter() - started) * 1000
+            if not round_index: continue
+            if ok: samples.append(elapsed)
+            else: errors += 1
+    return _summary(samples, errors)
+
+
+def _engine_inputs(corpus: List[BirthData]) -> List[Dict[str, Any]]:
+    """Aşamaların ayrı ayrı ölçülebilmesi için her kaydın ara sonuçlarını bir kez hazırlar."""
+    ensure_ephe_path()
+    inputs = []
+    for birth_data in corpus:
+        item: Dict[str, Any] = {"birth_data": birth_data, "timezone": timezone_resolver.timezone_at(birth_data.lat, birth_data.lon)}
+        utc_dt = birth_moment_utc(birth_data, item["timezone"])
+        with swe_lock:
+            item["julian_day"] = swe.utc_to_jd(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour, utc_dt.minute, utc_dt.second, 1)[0]
+        item["utc"] = utc_dt
+        chart = calculate_natal_chart(birth_data, item["timezone"])
+        item["chart"] = None if isinstance(chart, dict) else chart
+        inputs.append(item)
+    return inputs
+
+
+def run_engine(corpus: List[BirthData], rounds: int) -> Dict[str, Dict[str, Any]]:
+    inputs = _engine_inputs(corpus)
+    charts = [item for item in inputs if item["chart"] is not None]
+    uncached_resolver = TimezoneResolver(cache_size=0).load()
+
+    def utc_to_jd(item):
+        utc_dt = item["utc"]
+        with swe_lock: swe.utc_to_jd(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour, utc_dt.minute, utc_dt.second, 1)
+
+    def positions(item):
+        with swe_lock: _body_positions(item["julian_day"])
+
+    def houses(item):
+        birth_data = item["birth_data"]
+        with swe_lock: swe.houses(item["julian_day"], birth_data.lat, birth_data.lon, bytes(birth_data.house_system.value, "utf-8"))
+
+    def patterns(item):
+        chart = item["chart"]
+        recognize_aspect_patterns(chart.bodies, _natal_aspects(chart.bodies, chart.ascmc)[1])
+
+    # Sinastri sıralaması: her harita, kümedeki tüm haritalarla (aday) puanlanır.
+    rank_names = list(SYNASTRY_RANK_PLANET_WEIGHTS); rank_weights = list(SYNASTRY_RANK_PLANET_WEIGHTS.values())
+    rank_rows = {id(item): [{body.planet: body.longitude for body in item["chart"].bodies}.get(name, np.nan) for name in rank_names]
+                 for item in charts}
+    rank_candidates = np.array(list(rank_rows.values()))
+
+    def synastry_rank(item):
+        rank_synastry_candidates(rank_names, rank_rows[id(item)], rank_candidates, SYNASTRY_RANK_ASPECT_WEIGHTS, rank_weights, 10)
+
+    # Günlük transitler: sabit bir anın gökyüzü tablosuna her haritanın natal boylamlarıyla bakılır.
+    transit_sky = compute_sky(datetime(2025, 1, 1, 6, tzinfo=timezone.utc))
+    transit_natal = {id(item): [{"planet": body.planet, "longitude": body.longitude} for body in item["chart"].bodies] for item in charts}
+
+    return {
+        "engine.timezone_lookup": _measure(lambda item: uncached_resolver.timezone_at(item["birth_data"].lat, item["birth_data"].lon), inputs, rounds),
+        "engine.utc_to_jd": _measure(utc_to_jd, inputs, rounds),
+        "engine.positions": _measure(positions, inputs, rounds),
+        # Kutup bölgelerinde bazı ev sistemleri hata verir; bunlar `errors` sayısında görünür.
+        "engine.houses": _measure(houses, inputs, rounds),
+        "engine.aspects": _measure(lambda item: _natal_aspects(item["chart"].bodies, item["chart"].ascmc), charts, rounds),
+        "engine.aspect_patterns": _measure(patterns, charts, rounds),
+        "engine.to_dict": _measure(lambda item: item["chart"].to_dict(), charts, rounds),
+        "engine.synastry_rank": _measure(synastry_rank, charts, rounds),
+        "engine.transit_aspects": _measure(lambda item: calculate_active_transits(transit_natal[id(item)], transit_sky), charts, rounds),
+        "engine.calculate_natal_data": _measure(lambda item: calculate_natal_data(item["birth_data"], item["timezone"]), inputs, rounds),
+    }
+
+
+def run_drawers(corpus: List[BirthData], rounds: int) -> Dict[str, Dict[str, Any]]:
+    natal_data = [data for data in (calculate_natal_data(birth_data) for birth_data in corpus) if "error" not in data]
+    # Çiziciler yavaştır; her ev sistemini kapsamak için örnekler küme boyunca eşit aralıklarla seçilir.
+    step = max(1, len(natal_data) // DRAWER_SAMPLE_SIZE)
+    sample = natal_data[::step][:DRAWER_SAMPLE_SIZE]
+    dpi = png_dpi_for_width(CHART_DEFAULT_PNG_SIZE)
+    return {
+        "drawer.png": _measure(lambda data: draw_final_professional_chart(data, dpi), sample, rounds),
+        "drawer.svg": _measure(lambda data: draw_natal_chart_svg(data, CHART_DEFAULT_SVG_SIZE), sample, rounds),
+    }
+
+
+def _fake_redis_factory(server: fakeredis.FakeServer):
+    def from_url(url: str, **kwargs):
+        return fakeredis.aioredis.FakeRedis(server=server, decode_responses=kwargs.get("decode_responses", False))
+    return from_url
+
+
+def _unique(birth_data: BirthData, offset: int) -> Dict[str, Any]:
+    # Soğuk ölçümlerde doğum saati `offset` dakika kaydırılır; böylece harita ve çizim önbellekleri isabet etmez.
+    body = jsonable_encoder(birth_data)
+    hour, minute = divmod(birth_data.time.hour * 60 + birth_data.time.minute + offset, 60)
+    body["time"] = f"{hour % 24:02d}:{minute:02d}"
+    return body
+
+
+async def _run_http(corpus: List[BirthData], rounds: int) -> Dict[str, Dict[str, Any]]:
+    import main # Yorum dosyalarını da yüklediği için yalnızca HTTP grubu çalışırken içe aktarılır.
+    # Ev hesaplanamayan (400 dönen) kayıtlar HTTP ölçümlerine alınmaz.
+    valid_corpus = [birth_data for birth_data in corpus if "error" not in calculate_natal_data(birth_data)]
+    valid = [jsonable_encoder(birth_data) for birth_data in valid_corpus]
+    pairs = [{"person1": valid[i], "person2": valid[(i + 1) % len(valid)]} for i in range(len(valid))]
+    drawer_corpus = valid_corpus[::max(1, len(valid_corpus) // DRAWER_SAMPLE_SIZE)][:DRAWER_SAMPLE_SIZE]
+
+    with mock.patch.object(main.aioredis, "from_url", _fake_redis_factory(fakeredis.FakeServer())):
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=HEADERS, timeout=120) as client:
+                def post(path: str, make_body: Callable[[Any, int], Any]) -> Callable[[Any, int], Awaitable[bool]]:
+                    async def request(item, round_index):
+                        response = await client.post(path, json=make_body(item, round_index))
+                        return response.status_code == 200
+                    return request
+
+                same = lambda body, round_index: body
+                # Soğuk ölçümler farklı dakika aralıkları kullanır; önceki bir ölçümün önbelleğe aldığı haritaya denk gelmezler.
+                def cold(offset: int): return lambda birth_data, round_index: _unique(birth_data, offset + round_index)
+                results = {
+                    "http.natal.full_chart.cold": await _measure_async(
+                        post("/v1/natal/full-chart", cold(0)), valid_corpus, rounds, warmup=False),
+                    "http.natal.full_chart.warm": await _measure_async(post("/v1/natal/full-chart", same), valid, rounds),
+                    "http.natal.report_all.warm": await _measure_async(post("/v1/natal/report/all", same), valid, rounds),
+                    "http.natal.report_sun_sign.warm": await _measure_async(post("/v1/natal/report/sun-sign", same), valid, rounds),
+                    "http.natal.wheel_chart_svg.cold": await _measure_async(
+                        post("/v1/natal/wheel-chart?format=svg", cold(rounds)), drawer_corpus, rounds, warmup=False),
+                    "http.natal.wheel_chart_png.cold": await _measure_async(
+                        post("/v1/natal/wheel-chart", cold(2 * rounds)), drawer_corpus, rounds, warmup=False),
+                    "http.transit.daily_aspects.warm": await _measure_async(post("/v1/transit/daily-aspects", same), valid, rounds),
+                    "http.synastry.aspects.warm": await _measure_async(post("/v1/synastry/aspects", same), pairs, rounds),
+                }
+    return results
+
+
+def run_http(corpus: List[BirthData], rounds: int) -> Dict[str, Dict[str, Any]]:
+    return asyncio.run(_run_http(corpus, rounds))
+
+
+# Soğuk başlangıç: her ölçüm yeni bir Python sürecinde `import main` süresidir (yorumlayıcının açılışı hariç).
+# API sürecine yüklenmemesi gereken modüllerden biri yüklenirse ölçüm hata sayılır.
+_STARTUP_FORBIDDEN_MODULES = ("matplotlib", "fastapi_cache")
+_STARTUP_SCRIPT = ("import sys, time; started = time.perf_counter(); import main; print(time.perf_counter() - started); "
+                   f"print(','.join(m for m in {_STARTUP_FORBIDDEN_MODULES!r} if m in sys.modules))")
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_main_ms(environment: Dict[str, str]) -> float:
+    completed = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], env={**os.environ, **environment}, cwd=_REPO_ROOT,
+                               capture_output=True, text=True, check=True)
+    # Son iki satır: süre ve yüklenen yasak modüller (ısınma çıktısı bunlardan önce gelir).
+    seconds, loaded = completed.stdout.splitlines()[-2:]
+    if loaded: raise RuntimeError(f"Başlangıçta yüklenmemesi gereken modüller: {loaded}")
+    return float(seconds) * 1000
+
+
+def run_startup(corpus: List[BirthData], rounds: int) -> Dict[str, Dict[str, Any]]:
+    variants = {
+        "startup.import_main": {"EPHEMERIS_WARMUP_ENABLED": "0"},
+        "startup.import_main_background_warmup": {"EPHEMERIS_WARMUP_BACKGROUND": "1"},
+        "startup.import_main_preload_warmup": {"EPHEMERIS_WARMUP_ENABLED": "1", "EPHEMERIS_WARMUP_BACKGROUND": "0"},
+    }
+    results = {}
+    for name, environment in variants.items():
+        samples, errors = [], 0
+        # İlk süreç dosya önbelleğini ısıttığı için ölçülmez.
+        for round_index in range(max(rounds, 5) + 1):
+            try: sample = _import_main_ms(environment)
+            except (subprocess.CalledProcessError, RuntimeError, ValueError): errors += 1; continue
+            if round_index: samples.append(sample)
+        results[name] = _summary(samples, errors)
+    return results
+
+
+SUITES = {"engine": run_engine, "drawer": run_drawers, "http": run_http, "startup": run_startup}
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float, min_delta_ms: float) -> List[str]:
+    """Medyanı baseline'a göre hem oransal eşiği hem mutlak alt sınırı aşan benchmark'ları listeler."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or "median_ms" not in previous or "median_ms" not in current: continue
+        delta = current["median_ms"] - previous["median_ms"]
+        if delta > min_delta_ms and current["median_ms"] > previous["median_ms"] * (1 + threshold):
+            regressions.append(f"{name}: {previous['median_ms']:.3f} ms -> {current['median_ms']:.3f} ms (+{delta / previous['median_ms']:.0%})")
+    return regressions
+
+
+def _print_table(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]):
+    print(f"{'benchmark':<36}{'median':>11}{'p95':>11}{'n':>7}{'err':>5}{'baseline':>11}")
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("median_ms")
+        print(f"{name:<36}{result.get('median_ms', float('nan')):>11.3f}{result.get('p95_ms', float('nan')):>11.3f}"
+              f"{result['samples']:>7}{result['errors']:>5}{'' if base is None else f'{base:.3f}':>11}")
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CosmicAPI benchmark'ları")
+    parser.add_argument("--suite", action="append", choices=list(SUITES), help="Çalıştırılacak grup (tekrarlanabilir); verilmezse hepsi.")
+    parser.add_argument("--rounds", type=int, default=3, help="Isınma turundan sonraki ölçüm turu sayısı.")
+    parser.add_argument("--quick", action="store_true", help="Kümenin yalnızca her dördüncü kaydını kullanır.")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası.")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="İzin verilen oransal medyan artışı (0.2 = %%20).")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS, help="Regresyon sayılacak en küçük mutlak artış (ms).")
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus()
+    if args.quick: corpus = corpus[::4]
+    results: Dict[str, Dict[str, Any]] = {}
+    for suite in args.suite or list(SUITES):
+        results.update(SUITES[suite](corpus, args.rounds))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f: baseline = json.load(f)["results"]
+    _print_table(results, baseline)
+
+    report = {"meta": {"created_at": datetime.now(timezone.utc).isoformat(), "python": platform.python_version(),
+                       "platform": platform.platform(), "corpus_size": len(corpus), "rounds": args.rounds},
+              "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: json.dump(report, f, indent=2, ensure_ascii=False)
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms) if baseline else []
+    for line in regressions: print(f"REGRESYON: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
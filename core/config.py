@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 import swisseph as swe
 
@@ -82,6 +83,7 @@ DECLINATION_ASPECTS = {
     "Parallel": {"orb": 1.2, "type": "Declination"},
     "Contra-Parallel": {"orb": 1.2, "type": "Declination"}
 }
+TRANSIT_PLANETS = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto']
 
 # --- YENİ: Günlük Yorum Motoru İçin Gezegen İlişkileri ---
 PLANET_ASSOCIATIONS = {
@@ -93,4 +95,190 @@ PLANET_ASSOCIATIONS = {
     "Jupiter": {"color": "Mor", "number": 3, "theme": "şans"},
     "Saturn": {"color": "Siyah", "number": 8, "theme": "sorumluluk"}
 }
-# --- BİTTİ ---
\ No newline at end of file
+# --- BİTTİ ---
+
+# --- YENİ: Anlık Gökyüzü (Sky Snapshot) Ayarları ---
+# Transit gezegen konumları bu süre (saniye) boyunca tüm kullanıcılar için aynı kabul edilir.
+SKY_SNAPSHOT_QUANTUM_SECONDS = int(os.getenv("SKY_SNAPSHOT_QUANTUM_SECONDS", "60"))
+# Açıksa, hesaplanan gökyüzü Redis üzerinden tüm worker'larla paylaşılır.
+SKY_SNAPSHOT_USE_REDIS = os.getenv("SKY_SNAPSHOT_USE_REDIS", "1") == "1"
+
+# --- YENİ: Önbellek ve Toplu (Batch) Harita Ayarları ---
+# Hesaplanmış doğum haritalarının Redis'te (L2) tutulma süresi (saniye).
+NATAL_CACHE_EXPIRE_SECONDS = 600
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50000"))
+BATCH_PROCESS_WORKERS = int(os.getenv("BATCH_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Aynı anda işlenen en fazla kayıt sayısı; böylece partinin tamamı hafızada biriktirilmez.
+BATCH_WINDOW = int(os.getenv("BATCH_WINDOW", "64"))
+
+# --- YENİ: Zaman Dilimi Çözümleyici Ayarları ---
+TIMEZONE_CACHE_SIZE = int(os.getenv("TIMEZONE_CACHE_SIZE", "100000"))
+# Koordinatlar önbellek anahtarı için bu kadar ondalık haneye yuvarlanır (4 hane ≈ 11 metre).
+TIMEZONE_CACHE_PRECISION = 4
+
+# --- YENİ: Yorum Deposu Ayarları ---
+# Yorum dosyalarının değişip değişmediği (mtime) en fazla bu sıklıkta (saniye) kontrol edilir.
+INTERPRETATION_RELOAD_CHECK_SECONDS = float(os.getenv("INTERPRETATION_RELOAD_CHECK_SECONDS", "5"))
+
+# --- YENİ: Harita Görseli Önbelleği Ayarları ---
+# Worker başına hafızada tutulacak en fazla görsel boyutu (byte).
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RENDER_CACHE_REDIS_TTL_SECONDS = int(os.getenv("RENDER_CACHE_REDIS_TTL_SECONDS", "86400"))
+# Açıksa, üretilen görseller Redis üzerinden tüm worker'larla paylaşılır.
+RENDER_CACHE_USE_REDIS = os.getenv("RENDER_CACHE_USE_REDIS", "1") == "1"
+# İstemcilere gönderilen `Cache-Control: max-age` değeri (saniye).
+RENDER_CACHE_MAX_AGE_SECONDS = int(os.getenv("RENDER_CACHE_MAX_AGE_SECONDS", "86400"))
+
+# --- YENİ: Harita Görseli Format ve Boyut Ayarları ---
+# `size` parametresi verilmezse kullanılacak genişlikler (piksel). PNG için 3400 px, eski 200 dpi çıktıya eşittir.
+CHART_DEFAULT_PNG_SIZE = 3400
+CHART_DEFAULT_SVG_SIZE = 800
+CHART_MIN_SIZE = 200
+CHART_MAX_SIZE = 4000
+
+# --- YENİ: Çizim (Render) Süreç Havuzu Ayarları ---
+# Her API worker'ı kendi çizim süreçlerini açar; toplam süreç sayısı = gunicorn worker sayısı x bu değer.
+RENDER_POOL_WORKERS = int(os.getenv("RENDER_POOL_WORKERS", "1"))
+# Çizim süreçleri meşgulken sırada bekleyebilecek en fazla istek; fazlası 503 + Retry-After ile reddedilir.
+RENDER_QUEUE_SIZE = int(os.getenv("RENDER_QUEUE_SIZE", "8"))
+# YENİ: Matplotlib yalnızca çizim süreçlerinde, ilk çizimde yüklenir. 1 ise süreçler uygulama başlarken arka planda
+# başlatılıp çizici önceden içe aktarılır (ilk PNG isteği hızlanır; boşta bekleyen worker'lar da süreç açar).
+RENDER_POOL_PREWARM = os.getenv("RENDER_POOL_PREWARM", "0") == "1"
+
+# --- YENİ: Efemeris Hesaplama Havuzu ---
+# Swiss Ephemeris hesaplamalarını yürüten, worker başına ayrılmış thread sayısı.
+COMPUTE_EXECUTOR_WORKERS = int(os.getenv("COMPUTE_EXECUTOR_WORKERS", "1"))
+
+# --- YENİ: Transit Zaman Çizelgesi Ayarları ---
+# Tek istekte sorgulanabilecek en uzun tarih aralığı (gün).
+TRANSIT_TIMELINE_MAX_DAYS = int(os.getenv("TRANSIT_TIMELINE_MAX_DAYS", "366"))
+# Kaba örnekleme adımı (gün). Adım, gezegenin en dar orb penceresini (Sextile: 8°) atlayamayacağı kadar
+# küçük olmalıdır: Ay günde ~15° ilerlediği için 6 saat, diğerleri (en hızlısı Merkür, ~2.2°/gün) için 1 gün.
+TRANSIT_TIMELINE_STEP_DAYS = {"Moon": 0.25}
+TRANSIT_TIMELINE_DEFAULT_STEP_DAYS = 1.0
+# Orb giriş/çıkış ve tam açı anları bu hassasiyete (gün; ≈ 5 saniye) kadar inceltilir.
+TRANSIT_TIMELINE_TOLERANCE_DAYS = 5e-5
+TRANSIT_TIMELINE_MAX_ITERATIONS = 30
+
+# --- YENİ: Önceden Hesaplanmış (Chebyshev) Efemeris Tablosu ---
+# `python -m services.ephemeris_table build` ile üretilir; açıksa kapsanan tarihlerde gezegen konumları
+# Swiss Ephemeris yerine bu tablodan (mmap, vektörel) okunur. Kapsam dışı tarihler Swiss Ephemeris'e düşer.
+EPHEMERIS_TABLE_ENABLED = os.getenv("EPHEMERIS_TABLE_ENABLED", "0") == "1"
+EPHEMERIS_TABLE_PATH = Path(os.getenv("EPHEMERIS_TABLE_PATH", str(BASE_DIR / "data" / "ephe_tables")))
+EPHEMERIS_TABLE_START_YEAR = 1800
+EPHEMERIS_TABLE_END_YEAR = 2200
+# `check` komutunun kabul ettiği en büyük boylam/deklinasyon hatası (yay saniyesi). Tipik (p99) hata 0.1"in altındadır;
+# en büyük hatalar, Swiss Ephemeris'in kendi sıkıştırılmış segment sınırlarındaki kırılmalardan gelir (birkaç ").
+EPHEMERIS_TABLE_MAX_ERROR_ARCSEC = 5.0
+
+# --- YENİ: Doğum Haritası Önbelleği (L1 + Redis) Ayarları ---
+# Worker başına hafızada tutulacak en fazla harita sayısı (L1).
+CHART_CACHE_L1_SIZE = int(os.getenv("CHART_CACHE_L1_SIZE", "4096"))
+# Önbellek anahtarında koordinatlar bu kadar ondalık haneye yuvarlanır (4 hane ≈ 11 metre).
+CHART_CACHE_COORD_PRECISION = 4
+# Harita önbelleğinin Redis istemcisi için bağlantı/okuma zaman aşımı (saniye); yavaş Redis istekleri bekletmesin.
+CHART_CACHE_REDIS_TIMEOUT_SECONDS = float(os.getenv("CHART_CACHE_REDIS_TIMEOUT_SECONDS", "0.25"))
+# Art arda bu kadar Redis hatasında devre kesici açılır ve önbellek `RESET` süresi boyunca yalnızca L1 ile çalışır.
+CHART_CACHE_BREAKER_FAILURES = int(os.getenv("CHART_CACHE_BREAKER_FAILURES", "3"))
+CHART_CACHE_BREAKER_RESET_SECONDS = float(os.getenv("CHART_CACHE_BREAKER_RESET_SECONDS", "30"))
+
+# --- YENİ: Aşama Süresi Ölçümleri (Prometheus / Server-Timing) ---
+# Açıkken motor, çizici ve router aşamalarının süreleri histogramlarda toplanır ve `/metrics` üzerinden sunulur.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Açıkken her yanıta, o isteğin aşama sürelerini içeren `Server-Timing` başlığı eklenir (tarayıcı geliştirici araçlarında görünür).
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "0") == "1"
+# Histogram kova sınırları (saniye)
+METRICS_BUCKETS_SECONDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# --- YENİ: Sinastri Sıralama (Bire-Çok Uyum Puanı) Ayarları ---
+# Tek istekte puanlanabilecek en fazla aday sayısı (doğum verisi + önbellek parmak izi toplamı).
+SYNASTRY_RANK_MAX_CANDIDATES = int(os.getenv("SYNASTRY_RANK_MAX_CANDIDATES", "10000"))
+# Adaylar bu büyüklükteki parçalar halinde (parça x gökcismi x gökcismi x açı) tensörüyle puanlanır; hafıza kullanımını sınırlar.
+SYNASTRY_RANK_CHUNK_SIZE = 1024
+# Varsayılan açı ağırlıkları. Her isabet `ağırlık x (1 - orb / orb sınırı)` kadar puan katar; uyumsuz açılar eksidir.
+SYNASTRY_RANK_ASPECT_WEIGHTS = {"Conjunction": 1.0, "Trine": 1.0, "Sextile": 0.6, "Square": -0.7, "Opposition": -0.4}
+# Varsayılan gökcismi ağırlıkları; bir çiftin ağırlığı iki gökcisminin ağırlıklarının çarpımıdır. Listede olmayan
+# veya ağırlığı 0 olan gökcisimleri puana katılmaz ve adaylar için hesaplanmaz.
+SYNASTRY_RANK_PLANET_WEIGHTS = {
+    "Sun": 1.0, "Moon": 1.0, "Mercury": 0.5, "Venus": 1.0, "Mars": 0.8, "Jupiter": 0.5, "Saturn": 0.6,
+    "Uranus": 0.2, "Neptune": 0.2, "Pluto": 0.2, "True Node": 0.3
+}
+
+# --- YENİ: Önceden Üretilmiş Günlük Yorumlar (`python -m jobs.daily`) ---
+# Toplu işin yazdığı ve `/v1/transit/daily-horoscope`'un önce baktığı depo: "sqlite" (yerel dosya), "redis" veya "off".
+DAILY_HOROSCOPE_STORE = os.getenv("DAILY_HOROSCOPE_STORE", "sqlite")
+DAILY_HOROSCOPE_DB_PATH = Path(os.getenv("DAILY_HOROSCOPE_DB_PATH", str(BASE_DIR / "data" / "daily_horoscopes.sqlite3")))
+# Redis'teki yorumların ömrü (saniye); yerel depoda bu kadar günden eski kayıtlar her çalıştırmada silinir.
+DAILY_HOROSCOPE_REDIS_TTL_SECONDS = int(os.getenv("DAILY_HOROSCOPE_REDIS_TTL_SECONDS", str(2 * 86400)))
+DAILY_HOROSCOPE_KEEP_DAYS = 2
+# Günün gökyüzünün hesaplandığı an (UTC, SS:DD). Önceden üretilen yorumlar gün boyunca bu anın transitlerini kullanır.
+DAILY_HOROSCOPE_SKY_TIME_UTC = os.getenv("DAILY_HOROSCOPE_SKY_TIME_UTC", "06:00")
+# Süreç havuzuna tek seferde gönderilen kayıt sayısı; her parça tamamlandığında depoya yazılır (kaldığı yerden devam birimi).
+DAILY_HOROSCOPE_CHUNK_SIZE = int(os.getenv("DAILY_HOROSCOPE_CHUNK_SIZE", "256"))
+
+# --- YENİ: Transit Derece Tablosu ---
+# Gökyüzü görüntüsü başına kurulan tablonun derece başına kova sayısı (2 -> 720 kova). Sonucu değiştirmez; yalnızca
+# kesin hesaplanan aday çifti sayısını belirler.
+TRANSIT_LOOKUP_BINS_PER_DEGREE = int(os.getenv("TRANSIT_LOOKUP_BINS_PER_DEGREE", "2"))
+# Hafızada tutulan tablo sayısı (ardışık quantum'lar ve toplu işin günlük gökyüzü için).
+TRANSIT_LOOKUP_CACHE_SIZE = 8
+
+# --- YENİ: Başlangıç Isınması (Gunicorn `--preload`) ---
+# Uygulama yüklenirken (master süreçte) efemeris dosyalarının bu tarih aralığı ve gökcisimleri için gereken kısımları
+# okunur; worker'lar fork sonrası sayfaları paylaşır. Aralık doğum tarihlerinin ve transitlerin çoğunu kapsamalıdır.
+EPHEMERIS_WARMUP_ENABLED = os.getenv("EPHEMERIS_WARMUP_ENABLED", "1") == "1"
+# 1 ise ısınma uygulama yüklenirken değil, başlangıçtan sonra arka planda yapılır: süreç istekleri hemen karşılar
+# (sıfıra ölçeklenen, tek worker'lı örnekler için). Worker'lar bu durumda ısınmış sayfaları paylaşmaz.
+EPHEMERIS_WARMUP_BACKGROUND = os.getenv("EPHEMERIS_WARMUP_BACKGROUND", "0") == "1"
+EPHEMERIS_WARMUP_START_YEAR = int(os.getenv("EPHEMERIS_WARMUP_START_YEAR", "1900"))
+EPHEMERIS_WARMUP_END_YEAR = int(os.getenv("EPHEMERIS_WARMUP_END_YEAR", "2035"))
+# Örnekleme adımı (gün). Küçüldükçe daha fazla dosya bloğu okunur ve ısınma uzar.
+EPHEMERIS_WARMUP_STEP_DAYS = float(os.getenv("EPHEMERIS_WARMUP_STEP_DAYS", "30"))
+# Virgülle ayrılmış gökcismi listesi; boşsa `PLANET_NUMBERS`'taki tüm gökcisimleri.
+EPHEMERIS_WARMUP_BODIES = [name.strip() for name in os.getenv("EPHEMERIS_WARMUP_BODIES", "").split(",") if name.strip()] or list(PLANET_NUMBERS)
+
+# --- YENİ: Kabul Kontrolü ve Yük Atma (worker başına) ---
+# İstekler yol önekine göre sınıflara ayrılır (ilk eşleşen önek); eşleşmeyen yollar (/, /health, /stats, /metrics,
+# /docs) sınırlanmaz. "bulk" sınıfı uzun süren akışlı/toplu istekler içindir; servis süresi tahminini bozmasın diye ayrıdır.
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "1") == "1"
+ADMISSION_ROUTES = (
+    ("/v1/natal/wheel-chart", "render"), ("/v1/synastry/bi-wheel-chart", "render"),
+    ("/v1/natal/batch", "bulk"), ("/v1/synastry/rank", "bulk"), ("/v1/transit/timeline", "bulk"),
+    ("/v1/natal/report/", "read"), ("/v1/transit/daily-horoscope", "read"),
+    ("/v1/", "compute"),
+)
+# Sınıf başına: aynı anda işlenen istek (`concurrency`), sırada bekleyebilecek istek (`queue`), sırada en fazla bekleme
+# (`queue_timeout`, sn) ve gecikme hedefi (`slo`, sn). Tahmini bekleme + ortalama servis süresi hedefi aşacaksa istek
+# sıraya alınmadan 503 + Retry-After ile reddedilir; sırada `queue_timeout`'u aşan istek de 503 alır.
+ADMISSION_CLASSES = {
+    "render": {"concurrency": int(os.getenv("ADMISSION_RENDER_CONCURRENCY", "4")), "queue": int(os.getenv("ADMISSION_RENDER_QUEUE", "16")),
+               "queue_timeout": float(os.getenv("ADMISSION_RENDER_QUEUE_TIMEOUT", "5")), "slo": float(os.getenv("ADMISSION_RENDER_SLO", "8"))},
+    "compute": {"concurrency": int(os.getenv("ADMISSION_COMPUTE_CONCURRENCY", "16")), "queue": int(os.getenv("ADMISSION_COMPUTE_QUEUE", "64")),
+                "queue_timeout": float(os.getenv("ADMISSION_COMPUTE_QUEUE_TIMEOUT", "1")), "slo": float(os.getenv("ADMISSION_COMPUTE_SLO", "2"))},
+    "read": {"concurrency": int(os.getenv("ADMISSION_READ_CONCURRENCY", "64")), "queue": int(os.getenv("ADMISSION_READ_QUEUE", "256")),
+             "queue_timeout": float(os.getenv("ADMISSION_READ_QUEUE_TIMEOUT", "0.5")), "slo": float(os.getenv("ADMISSION_READ_SLO", "1"))},
+    "bulk": {"concurrency": int(os.getenv("ADMISSION_BULK_CONCURRENCY", "2")), "queue": int(os.getenv("ADMISSION_BULK_QUEUE", "4")),
+             "queue_timeout": float(os.getenv("ADMISSION_BULK_QUEUE_TIMEOUT", "10")), "slo": float(os.getenv("ADMISSION_BULK_SLO", "120"))},
+}
+# Ortalama servis süresinin üssel hareketli ortalama katsayısı (yeni ölçümün ağırlığı).
+ADMISSION_EWMA_ALPHA = 0.2
+
+# --- YENİ: API Anahtarı Başına Hız Sınırı (Redis Token Bucket, tüm worker'lar ortak) ---
+# Kapalıysa yalnızca worker başına eşzamanlılık sınırları uygulanır. Redis'e ulaşılamazsa istekler sınırlanmaz.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "0") == "1"
+# Saniyede eklenen jeton ve kovanın alabileceği en fazla jeton (ani yük payı).
+RATE_LIMIT_TOKENS_PER_SECOND = float(os.getenv("RATE_LIMIT_TOKENS_PER_SECOND", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))
+# Sınıf başına istek maliyeti (jeton); pahalı istekler kovadan daha fazla düşer.
+RATE_LIMIT_COSTS = {"render": 5.0, "compute": 1.0, "read": 0.5, "bulk": 20.0}
+
+# --- YENİ: Aynı Hesaplamaların Birleştirilmesi (Single-Flight) ---
+# Açıkken aynı haritayı/görseli aynı anda isteyenler tek bir hesaplamayı bekler: worker içinde ortak bir görev,
+# worker'lar arasında kısa ömürlü bir Redis kilidi (SET NX PX) ile. Kilidi alamayan worker sonucu önbellekten okur.
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "1"
+# Kilidin ömrü (saniye); kilidi tutan worker çökerse kilit bu süre sonunda kendiliğinden düşer. En uzun çizimden uzun olmalıdır.
+SINGLE_FLIGHT_LOCK_TTL_SECONDS = float(os.getenv("SINGLE_FLIGHT_LOCK_TTL_SECONDS", "10"))
+# Kilidi alamayan worker'ın sonucu en fazla bekleyeceği süre (saniye); dolarsa hesaplamayı kendisi yapar.
+SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS", "8"))
+# Beklerken kilidin düşüp düşmediğine bakma aralığı (saniye).
+SINGLE_FLIGHT_POLL_INTERVAL_SECONDS = 0.05
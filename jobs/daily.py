@@ -0,0 +1,160 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+import swisseph as swe
+from pydantic import ValidationError
+
+from core.config import (
+    DAILY_HOROSCOPE_CHUNK_SIZE, DAILY_HOROSCOPE_DB_PATH, DAILY_HOROSCOPE_KEEP_DAYS, DAILY_HOROSCOPE_SKY_TIME_UTC, EPHE_PATH
+)
+from models.pydantic_models import BirthData
+from services.astrology_engine import calculate_natal_chart
+from services.chart_cache import chart_fingerprint
+from services.daily_horoscope import calculate_active_transits, daily_horoscope_payload
+from services.horoscope_store import open_writer
+from services.interpretation_store import interpretation_store
+from services.sky_snapshot import compute_sky
+from services.timezone_resolver import timezone_resolver
+
+# Kayıtlı kullanıcıların günlük yorumlarını gece önceden üreten toplu iş. Günün gökyüzü bir kez hesaplanır;
+# her doğum haritası süreç havuzunda hesaplanıp aynı gökyüzüyle karşılaştırılır. Sonuçlar parça parça depoya
+# yazıldığından iş yarıda kesilirse yeniden çalıştırıldığında depoda olan kayıtlar atlanır (`--force` hariç).
+#
+#   python -m jobs.daily users.ndjson --date 2026-10-19 --workers 8
+#   python -m jobs.daily users.json --store redis --redis-url redis://localhost:6379
+
+# Havuza aynı anda gönderilen parça sayısı, worker sayısının bu katıyla sınırlanır.
+_IN_FLIGHT_PER_WORKER = 2
+_PROGRESS_INTERVAL_SECONDS = 5.0
+
+# Süreç havuzundaki worker'ların gün boyunca ortak kullandığı gökyüzü (initializer ile bir kez verilir).
+_worker_sky: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(sky: Dict[str, Any]):
+    global _worker_sky
+    _worker_sky = sky
+    # Gökyüzü ana süreçte hesaplandığı için efemeris dosyaları açık halde fork edilir; ortak dosya konumunu
+    # paylaşan worker'lar birbirinin okumasını bozar ("file is damaged"). Devralınan durum kapatılıp yol yeniden ayarlanır.
+    swe.close(); swe.set_ephe_path(str(EPHE_PATH))
+    interpretation_store.load_all()
+
+
+def _generate_chunk(items: List[Tuple[str, BirthData, str]]) -> Tuple[List[Tuple[str, bytes]], List[str]]:
+    """Worker tarafı: parçadaki her kişi için yorumu üretir ve orjson ile kodlar."""
+    results, errors = [], []
+    for fingerprint, birth_data, timezone_str in items:
+        chart = calculate_natal_chart(birth_data, timezone_str)
+        if isinstance(chart, dict):
+            errors.append(chart["error"]); continue
+        natal_planets = [{"planet": body.planet, "longitude": body.longitude} for body in chart.bodies]
+        active_transits = calculate_active_transits(natal_planets, _worker_sky)
+        results.append((fingerprint, orjson.dumps(daily_horoscope_payload(active_transits, _worker_sky["time_utc"]))))
+    return results, errors
+
+
+def _iter_records(path: Path) -> Iterator[Any]:
+    """Girdi bir JSON dizisi ya da NDJSON (her satırda bir kayıt) olabilir. Çözülemeyen satırlar None olur."""
+    with open(path, "rb") as handle:
+        head = handle.read(1024).lstrip()
+        handle.seek(0)
+        if head.startswith(b"["):
+            yield from json.load(handle); return
+        for line in handle:
+            if not line.strip(): continue
+            try: yield orjson.loads(line)
+            except orjson.JSONDecodeError: yield None
+
+
+def _parse_record(raw: Any) -> Optional[BirthData]:
+    if not isinstance(raw, dict): return None
+    try: return BirthData(**raw)
+    except ValidationError: return None
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m jobs.daily", description="Günlük burç yorumlarını önceden üretip depoya yazar.")
+    parser.add_argument("input", type=Path, help="Doğum verileri: JSON dizisi veya NDJSON dosyası (BirthData alanları).")
+    parser.add_argument("--date", type=date.fromisoformat, default=datetime.now(timezone.utc).date(), help="Yorumların günü (UTC, YYYY-MM-DD). Varsayılan: bugün.")
+    parser.add_argument("--time", default=DAILY_HOROSCOPE_SKY_TIME_UTC, help="Günün gökyüzünün hesaplanacağı UTC saati (HH:MM).")
+    parser.add_argument("--store", choices=("sqlite", "redis"), default="sqlite", help="Yazılacak depo.")
+    parser.add_argument("--db", type=Path, default=DAILY_HOROSCOPE_DB_PATH, help="SQLite dosyası (--store sqlite).")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL"), help="Redis adresi (--store redis).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Süreç havuzundaki worker sayısı.")
+    parser.add_argument("--chunk-size", type=int, default=DAILY_HOROSCOPE_CHUNK_SIZE, help="Worker'a tek seferde gönderilen kayıt sayısı.")
+    parser.add_argument("--force", action="store_true", help="Depoda olan kayıtları da yeniden üretir.")
+    parser.add_argument("--report", type=Path, help="Özet istatistiklerin JSON olarak yazılacağı dosya.")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    day = args.date.isoformat()
+    sky_time = datetime.combine(args.date, datetime.strptime(args.time, "%H:%M").time(), tzinfo=timezone.utc)
+    if not interpretation_store.get("daily_transits.json"):
+        raise RuntimeError("Günlük transit yorum dosyası 'daily_transits.json' bulunamadı veya boş.")
+    sky = compute_sky(sky_time)
+    store = open_writer(args.store, args.db, args.redis_url)
+    pruned = store.prune((args.date - timedelta(days=DAILY_HOROSCOPE_KEEP_DAYS)).isoformat())
+    counts = {"written": 0, "skipped": 0, "invalid": 0, "errors": 0}
+    records = _iter_records(args.input); started = last_report = time.perf_counter(); seen = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(sky,)) as pool:
+        pending = deque()
+
+        def drain_one():
+            results, errors = pending.popleft().result()
+            store.put_many(day, results)
+            counts["written"] += len(results); counts["errors"] += len(errors)
+            for message in errors[:1]: print(f"UYARI: {len(errors)} kaydın haritası hesaplanamadı. Örnek: {message}")
+
+        while True:
+            raw_chunk = list(itertools.islice(records, args.chunk_size))
+            if not raw_chunk: break
+            seen += len(raw_chunk)
+            chunk = [b for b in map(_parse_record, raw_chunk) if b is not None]
+            counts["invalid"] += len(raw_chunk) - len(chunk)
+            items = []
+            for birth_data, timezone_str in zip(chunk, timezone_resolver.timezone_at_many((b.lat, b.lon) for b in chunk)):
+                fingerprint = chart_fingerprint(birth_data, timezone_str) if timezone_str else None
+                if fingerprint is None: counts["errors"] += 1
+                else: items.append((fingerprint, birth_data, timezone_str))
+            # Aynı kişi girdide birden çok kez geçebilir; parça içinde tekilleştirilir.
+            items = list({fingerprint: (fingerprint, b, tz) for fingerprint, b, tz in items}.values())
+            if not args.force:
+                done = store.existing(day, [fingerprint for fingerprint, _, _ in items])
+                counts["skipped"] += len(done); items = [item for item in items if item[0] not in done]
+            if items: pending.append(pool.submit(_generate_chunk, items))
+            while len(pending) >= args.workers * _IN_FLIGHT_PER_WORKER: drain_one()
+            now = time.perf_counter()
+            if now - last_report >= _PROGRESS_INTERVAL_SECONDS:
+                print(f"İlerleme: {seen} kayıt okundu, {counts['written']} yazıldı, {counts['skipped']} atlandı ({seen / (now - started):.0f} kayıt/sn)")
+                last_report = now
+        while pending: drain_one()
+    elapsed = time.perf_counter() - started
+    return {"day": day, "sky_time_utc": sky["time_utc"], "store": args.store, "records": seen, **counts, "pruned": pruned,
+            "elapsed_seconds": round(elapsed, 2), "records_per_second": round(seen / elapsed, 1) if elapsed else 0.0}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    try: summary = run(args)
+    except (RuntimeError, OSError, ValueError) as e:
+        print(f"HATA: Günlük yorum üretimi başarısız. Detay: {e}")
+        return 1
+    print(f"Tamamlandı: {summary['records']} kayıt, {summary['written']} yazıldı, {summary['skipped']} atlandı, "
+          f"{summary['invalid']} geçersiz, {summary['errors']} hata; {summary['elapsed_seconds']} sn ({summary['records_per_second']} kayıt/sn)")
+    if args.report: args.report.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
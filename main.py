@@ -1,24 +1,50 @@
 import os # YENİ: Ortam değişkenlerini okumak için
 from fastapi import FastAPI, Request, status, Security, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError, HTTPException
 from fastapi.security import APIKeyHeader
 
 from redis import asyncio as aioredis
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 
 from api.v1 import natal, synastry, transit
-from core.config import API_KEY
+from api.responses import FastJSONResponse
+from api.middleware import MetricsMiddleware, AdmissionMiddleware
+from core.config import API_KEY, RENDER_CACHE_USE_REDIS, RENDER_POOL_PREWARM, CHART_CACHE_REDIS_TIMEOUT_SECONDS, CHART_CACHE_BREAKER_RESET_SECONDS
+from services.sky_snapshot import sky_snapshot
+from services.timezone_resolver import timezone_resolver
+from services.render_cache import render_cache
+from services.render_pool import render_pool
+from services.compute_executor import compute_executor
+from services.ephemeris_table import ephemeris_table
+from services.chart_cache import chart_cache
+from services.horoscope_store import daily_horoscope_reader
+from services.metrics import metrics
+from services.admission import admission, api_rate_limiter
+from services.single_flight import chart_flight, render_flight
+from services.warmup import ephemeris_warmup, memory_usage
+
+# YENİ: Yorum dosyaları modül yüklenirken bir kez okunur. Gunicorn `--preload` ile çalıştığında
+# bu işlem ana süreçte yapılır ve worker'lar aynı hafıza sayfalarını paylaşır.
+# DEĞİŞİKLİK: Yorum dosyalarıyla birlikte zaman dilimi poligonları ve efemeris dosyaları da ısınmada yüklenir.
+# `EPHEMERIS_WARMUP_BACKGROUND=1` ise ısınma başlangıçtan sonra arka planda yapılır (soğuk başlangıç kısalır).
+if not ephemeris_warmup.background: ephemeris_warmup.run()
 
 # ... (Güvenlik Mekanizması aynı kalıyor) ...
 api_key_header = APIKeyHeader(name="X-API-Key")
-async def get_api_key(api_key: str = Security(api_key_header)):
+async def get_api_key(request: Request, api_key: str = Security(api_key_header)):
     if api_key != API_KEY:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Geçersiz veya eksik API Anahtarı."
         )
+    # YENİ: API anahtarı başına hız sınırı (RATE_LIMIT_ENABLED=1 ve Redis bağlıysa; tüm worker'lar ortak kovayı kullanır)
+    retry_after = await api_rate_limiter.check(api_key, admission.class_for(request.url.path))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="İstek sınırı aşıldı, lütfen biraz sonra tekrar deneyin.",
+            headers={"Retry-After": str(retry_after)}
+        )
 
 app = FastAPI(
     title="CosmicAPI - Gelişmiş Astroloji Motoru",
@@ -29,9 +55,24 @@ app = FastAPI(
         "url": "https://github.com/cosmicapi",
         "email": "iletisim@cosmicapi.com",
     },
-    dependencies=[Depends(get_api_key)]
+    dependencies=[Depends(get_api_key)],
+    default_response_class=FastJSONResponse # YENİ: Yanıtlar orjson ile kodlanır
 )
 
+# YENİ: Endpoint sınıfı başına eşzamanlılık sınırı ve yük atma (503). Sonra eklenen ara katman dışta çalışır;
+# reddedilen istekler ve sırada bekleme süresi de ölçümlere girsin diye ölçüm katmanı en dışta kalır.
+app.add_middleware(AdmissionMiddleware)
+# YENİ: İstek ve aşama süreleri (`/metrics`) ile isteğe bağlı `Server-Timing` başlığı
+app.add_middleware(MetricsMiddleware)
+metrics.register_cache("chart_l1", lambda: (chart_cache.l1_hits, chart_cache.l1_misses))
+metrics.register_cache("chart_redis", lambda: (chart_cache.redis_hits, chart_cache.redis_misses))
+metrics.register_cache("render", lambda: (render_cache.memory_hits + render_cache.redis_hits, render_cache.misses))
+metrics.register_cache("timezone", lambda: (timezone_resolver.hits, timezone_resolver.misses))
+metrics.register_cache("daily_horoscope", lambda: (daily_horoscope_reader.hits, daily_horoscope_reader.misses))
+# YENİ: Süren bir hesaplamayı/çizimi bekleyerek kendi hesaplamasını yapmayan istekler (worker içi ve Redis kilidi üzerinden)
+for flight in (chart_flight, render_flight):
+    metrics.register_counter("cosmicapi_singleflight_coalesced_total", "Süren bir hesaplamanın sonucunu bekleyen istekler.", flight.counters)
+
 # --- DEĞİŞTİRİLDİ: UYGULAMA BAŞLANGICINDA CACHING'İ BAŞLATMA ---
 @app.on_event("startup")
 async def startup():
@@ -42,17 +83,60 @@ async def startup():
     # Eğer bu değişken varsa (yani kod Render'da çalışıyorsa) onu kullan.
     # Eğer yoksa (yani kod kendi bilgisayarımızda çalışıyorsa) "redis://localhost" kullan.
     redis_url = os.getenv("REDIS_URL", "redis://localhost")
+
+    # YENİ: Hesaplama thread'i efemeris dosyalarını ilk istekten önce açar (dosya sayfaları master'ın ısınmasından önbellekte).
+    if ephemeris_warmup.enabled and ephemeris_warmup.background:
+        ephemeris_warmup.start_background()
+    else:
+        # YENİ: Zaman dilimi poligonlarını her istekte değil, süreç başında bir kez hafızaya yükle.
+        timezone_resolver.load()
+        if ephemeris_warmup.enabled:
+            await compute_executor.run(ephemeris_warmup.warm_worker)
+            print(f"Worker {os.getpid()} hazır. Hafıza (MB): {memory_usage()}")
+    # YENİ: Çizim süreçleri ve matplotlib, istenirse arka planda; aksi halde ilk PNG isteğinde yüklenir.
+    if RENDER_POOL_PREWARM: render_pool.start_prewarm()
     
+    # YENİ: Harita önbelleği Redis'e başlangıçta ulaşılamasa da bağlanır; devre kesici açık başlar (yalnızca L1)
+    # ve Redis ayağa kalktığında bağlantı kendiliğinden yeniden denenir. Kısa zaman aşımı, yavaş bir Redis'in
+    # istekleri bekletmesini önler.
+    chart_cache_redis = aioredis.from_url(redis_url, encoding="utf8", decode_responses=True,
+                                          socket_timeout=CHART_CACHE_REDIS_TIMEOUT_SECONDS, socket_connect_timeout=CHART_CACHE_REDIS_TIMEOUT_SECONDS)
+
+    redis = None
     try:
         redis = aioredis.from_url(redis_url, encoding="utf8", decode_responses=True)
         # Redis sunucusuna gerçekten ulaşıp ulaşamadığımızı kontrol et
         await redis.ping()
         
-        FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
-        print(f"Redis bağlantısı {redis_url} adresine başarıyla kuruldu ve FastAPI-Cache başlatıldı.")
+        # DEĞİŞİKLİK: FastAPI-Cache başlatılmıyor; `@cache` dekoratörleri kaldırıldığından kullanan bir endpoint
+        # kalmamıştı ve içe aktarılması (pendulum, jinja2) soğuk başlangıca ~70 ms ekliyordu.
+        print(f"Redis bağlantısı {redis_url} adresine başarıyla kuruldu.")
+        chart_cache.attach_redis(chart_cache_redis)
+        # YENİ: Hız sınırı da kısa zaman aşımlı istemciyi kullanır; yavaş Redis istekleri bekletmez.
+        api_rate_limiter.attach_redis(chart_cache_redis)
+        # YENİ: Worker'lar arası single-flight kilitleri
+        chart_flight.attach_redis(chart_cache_redis); render_flight.attach_redis(chart_cache_redis)
+        # YENİ: Görseller ham byte olarak saklandığı için ayrı, decode etmeyen bir istemci kullanılır.
+        if RENDER_CACHE_USE_REDIS: render_cache.attach_redis(aioredis.from_url(redis_url))
+        # YENİ: `DAILY_HOROSCOPE_STORE=redis` ise önceden üretilmiş günlük yorumlar buradan okunur.
+        daily_horoscope_reader.attach_redis(redis)
     except Exception as e:
         # Redis'e bağlanamazsa, bunu terminalde açıkça belirt.
-        print(f"HATA: Redis'e ({redis_url}) bağlanılamadı. Önbellekleme devre dışı kalacak. Detay: {e}")
+        print(f"HATA: Redis'e ({redis_url}) bağlanılamadı. Harita önbelleği yalnızca hafızada çalışacak ve bağlantı "
+              f"{CHART_CACHE_BREAKER_RESET_SECONDS:g} saniyede bir yeniden denenecek. Detay: {e}")
+        chart_cache.attach_redis(chart_cache_redis, reachable=False)
+        api_rate_limiter.attach_redis(chart_cache_redis, reachable=False)
+        chart_flight.attach_redis(chart_cache_redis, reachable=False); render_flight.attach_redis(chart_cache_redis, reachable=False)
+        redis = None
+
+    # YENİ: Transit endpoint'lerinin okuduğu ortak gökyüzü görüntüsünü arka planda güncel tut.
+    sky_snapshot.start(redis)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await sky_snapshot.stop()
+    render_pool.shutdown()
+    compute_executor.shutdown()
 
 # ... (Hata Yakalayıcılar ve API Rotaları aynı kalıyor) ...
 @app.exception_handler(RequestValidationError)
@@ -71,16 +155,30 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(status_code=exc.status_code, content={"status": "error", "message": exc.detail})
+    # Retry-After gibi başlıklar (ör. çizim kuyruğu dolu olduğunda) istemciye iletilir.
+    return JSONResponse(status_code=exc.status_code, content={"status": "error", "message": exc.detail}, headers=getattr(exc, "headers", None))
 
 app.include_router(natal.router, prefix="/v1/natal", tags=["1. Natal Harita"])
 app.include_router(synastry.router, prefix="/v1/synastry", tags=["2. Sinastri (İlişki) Haritası"])
 app.include_router(transit.router, prefix="/v1/transit", tags=["3. Transit (Anlık) Harita"])
 
 @app.get("/", tags=["Root"])
-def read_root():
+async def read_root():
     return {"message": "CosmicAPI'ye hoş geldiniz! API dokümantasyonu için /docs adresine gidin."}
 
 @app.get("/health", tags=["Root"], status_code=status.HTTP_200_OK)
-def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+async def health_check():
+    return {"status": "ok"}
+
+# YENİ: Worker içi önbellek ve servis sayaçları
+@app.get("/stats", tags=["Root"])
+async def get_stats():
+    return {"timezone_resolver": timezone_resolver.stats(), "render_cache": render_cache.stats(),
+            "render_pool": render_pool.stats(), "ephemeris_table": ephemeris_table.stats(), "chart_cache": chart_cache.stats(),
+            "daily_horoscope_store": daily_horoscope_reader.stats(), "warmup": ephemeris_warmup.stats(),
+            "admission": admission.stats(), "single_flight": {"natal_chart": chart_flight.stats(), "render": render_flight.stats()}}
+
+# YENİ: Prometheus biçiminde aşama/istek süresi histogramları ve önbellek isabet sayaçları (worker başına)
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
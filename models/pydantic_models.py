@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import date as DateType, time as TimeType
+from typing import Dict, List, Optional
 
 class HouseSystem(str, Enum):
     PLACIDUS = "P"
@@ -27,6 +28,17 @@ class RulershipSystem(str, Enum):
     MODERN = "modern"
 # --- BİTTİ ---
 
+# --- YENİ: Harita Görseli Formatı ---
+class ChartFormat(str, Enum):
+    """
+    Harita görsellerinin çıktı formatı.
+    - PNG: Bilgi panelleriyle birlikte tam sayfa raster görsel (matplotlib).
+    - SVG: Yalnızca harita çemberi; hafif ve istemcide ölçeklenebilir vektör görsel.
+    """
+    PNG = "png"
+    SVG = "svg"
+# --- BİTTİ ---
+
 class BirthData(BaseModel):
     date: DateType = Field(..., example="1990-01-01", description="Doğum tarihi (YYYY-MM-DD formatında).")
     time: TimeType = Field(..., example="12:00", description="Doğum saati (HH:MM formatında).")
@@ -48,4 +60,24 @@ class BirthData(BaseModel):
 
 class SynastryData(BaseModel):
     person1: BirthData
-    person2: BirthData
\ No newline at end of file
+    person2: BirthData
+# --- YENİ: Transit Zaman Çizelgesi İsteği ---
+class TransitTimelineRequest(BaseModel):
+    birth_data: BirthData
+    start_date: DateType = Field(..., example="2025-01-01", description="Aralığın ilk günü (UTC, dahil).")
+    end_date: DateType = Field(..., example="2025-12-31", description="Aralığın son günü (UTC, dahil).")
+# --- BİTTİ ---
+
+# --- YENİ: Sinastri Sıralama (Bire-Çok) İsteği ---
+class SynastryRankRequest(BaseModel):
+    person: BirthData
+    candidates: List[BirthData] = Field(default_factory=list, description="Puanlanacak adayların doğum verileri.")
+    candidate_fingerprints: List[str] = Field(
+        default_factory=list,
+        description="Daha önce hesaplanıp harita önbelleğine girmiş adayların parmak izleri (`chart_fingerprint`). "
+                    "Önbellekte bulunamayanlar `errors` listesinde döner."
+    )
+    top_k: int = Field(default=10, ge=1, le=1000, description="Döndürülecek en yüksek puanlı aday sayısı.")
+    aspect_weights: Optional[Dict[str, float]] = Field(default=None, description="Varsayılan açı ağırlıklarının üzerine yazılır (ör. {\"Square\": -1.0}).")
+    planet_weights: Optional[Dict[str, float]] = Field(default=None, description="Varsayılan gökcismi ağırlıklarının üzerine yazılır; 0 gökcismini puandan çıkarır.")
+# --- BİTTİ ---
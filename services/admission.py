@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import math
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from core.config import (
+    ADMISSION_CONTROL_ENABLED, ADMISSION_ROUTES, ADMISSION_CLASSES, ADMISSION_EWMA_ALPHA,
+    RATE_LIMIT_ENABLED, RATE_LIMIT_TOKENS_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_COSTS
+)
+from services.chart_cache import CircuitBreaker
+
+# İstekler endpoint sınıfına (render, compute, read, bulk) göre worker başına sınırlanır. Her sınıfın kendi
+# eşzamanlılık sınırı ve sırası vardır: pahalı çizimler hafif okumaların önünü tıkamaz. Sıra sonsuz değildir;
+# sıra doluysa, tahmini bekleme gecikme hedefini (SLO) aşıyorsa veya istek sırada `queue_timeout`'tan uzun
+# beklerse 503 + Retry-After döner. İsteğe bağlı Redis token bucket ise API anahtarı başına, tüm worker'lar
+# genelinde hız sınırı uygular (429).
+
+
+class AdmissionRejected(Exception):
+    """İstek kabul edilmediğinde fırlatılır; `retry_after` istemciye önerilecek bekleme süresidir (saniye)."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClassLimiter:
+    """
+    Bir endpoint sınıfının sınırlayıcısı. Aynı anda en fazla `concurrency` istek işlenir; fazlası FIFO sırada
+    bekler ve biten istek yerini doğrudan sıradaki ilk isteğe devreder. Servis süresi üssel hareketli ortalama
+    ile izlenir; yeni gelen isteğin bekleme süresi (önündeki istek sayısı / eşzamanlılık) x ortalama olarak tahmin edilir.
+    Olay döngüsünde çalışır; kilit gerektirmez.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float, slo: float, alpha: float = ADMISSION_EWMA_ALPHA):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, queue)
+        self.queue_timeout = queue_timeout
+        self.slo = slo
+        self.alpha = alpha
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._service_seconds: Optional[float] = None
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.shed_slo = 0
+        self.timed_out = 0
+        self._wait_seconds = 0.0
+
+    def estimated_wait(self) -> float:
+        """Şimdi gelen bir isteğin sırada bekleyeceği tahmini süre (saniye); ortalama henüz yoksa 0."""
+        if self._service_seconds is None or self.in_flight < self.concurrency: return 0.0
+        return math.ceil((len(self._waiters) + 1) / self.concurrency) * self._service_seconds
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.estimated_wait()))
+
+    async def acquire(self):
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1; self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected("queue_full", self.retry_after())
+        wait = self.estimated_wait()
+        if wait + (self._service_seconds or 0.0) > self.slo or wait > self.queue_timeout:
+            self.shed_slo += 1
+            raise AdmissionRejected("slo", self.retry_after())
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future); self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Yer devredildiği anda süre dolduysa veya istek iptal edildiyse yer sıradakine aktarılır.
+            if future.done() and not future.cancelled(): self._hand_over()
+            if isinstance(e, asyncio.CancelledError): raise
+            self.timed_out += 1
+            raise AdmissionRejected("queue_timeout", self.retry_after())
+        finally:
+            # İstemci bağlantıyı kopardıysa veya süre dolduysa iptal edilen bekleyen sıradan çıkarılır.
+            if not future.done() or future.cancelled():
+                try: self._waiters.remove(future)
+                except ValueError: pass
+            self._wait_seconds += time.perf_counter() - started
+        self.admitted += 1
+
+    def release(self, service_seconds: float):
+        self._service_seconds = service_seconds if self._service_seconds is None else (
+            self.alpha * service_seconds + (1 - self.alpha) * self._service_seconds)
+        self._hand_over()
+
+    def _hand_over(self):
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                # Yer doğrudan devredilir; `in_flight` değişmez.
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"concurrency": self.concurrency, "max_queue": self.max_queue, "queue_timeout": self.queue_timeout, "slo": self.slo,
+                "in_flight": self.in_flight, "queue_depth": len(self._waiters), "admitted": self.admitted, "queued": self.queued,
+                "rejected_queue_full": self.rejected_queue_full, "shed_slo": self.shed_slo, "timed_out": self.timed_out,
+                "avg_service_ms": round(self._service_seconds * 1000, 1) if self._service_seconds is not None else None,
+                "avg_queue_wait_ms": round(self._wait_seconds / self.queued * 1000, 1) if self.queued else 0.0}
+
+
+class AdmissionController:
+    """Yol önekinden endpoint sınıfını bulur ve sınıfın sınırlayıcısını döndürür (worker başına)."""
+
+    def __init__(self, enabled: bool = ADMISSION_CONTROL_ENABLED, routes: Sequence[Tuple[str, str]] = ADMISSION_ROUTES,
+                 classes: Dict[str, Dict[str, Any]] = ADMISSION_CLASSES):
+        self.enabled = enabled
+        self.routes = tuple(routes)
+        self.limiters = {name: ClassLimiter(name, **settings) for name, settings in classes.items()}
+
+    def class_for(self, path: str) -> Optional[str]:
+        for prefix, name in self.routes:
+            if path.startswith(prefix): return name
+        return None
+
+    def limiter_for(self, path: str) -> Optional[ClassLimiter]:
+        name = self.class_for(path)
+        return self.limiters.get(name) if name is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "classes": {name: limiter.stats() for name, limiter in self.limiters.items()},
+                "rate_limit": api_rate_limiter.stats()}
+
+
+# Kovanın durumu (jeton, son güncelleme) Redis'te tek bir hash'tir; okuma-hesaplama-yazma atomik olsun diye Lua ile yapılır.
+# Zaman istemciden gelir (worker saatleri arasındaki küçük fark önemsizdir). Kesirli sayılar Lua'dan string olarak döner.
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1]); local burst = tonumber(ARGV[2]); local cost = tonumber(ARGV[3]); local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0; local retry = 0
+if tokens >= cost then tokens = tokens - cost; allowed = 1 else retry = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisTokenBucket:
+    """
+    API anahtarı başına token bucket. Anahtar Redis'e açık yazılmaz; özetinin bir kısmı kullanılır.
+    Redis bağlı değilse veya hata verirse istek sınırlanmaz (hız sınırı hizmeti durdurmamalı); art arda
+    hatalarda devre kesici Redis'i bir süre devre dışı bırakır.
+    """
+
+    def __init__(self, enabled: bool = RATE_LIMIT_ENABLED, rate: float = RATE_LIMIT_TOKENS_PER_SECOND,
+                 burst: float = RATE_LIMIT_BURST, costs: Dict[str, float] = RATE_LIMIT_COSTS):
+        self.enabled = enabled
+        self.rate = rate
+        self.burst = burst
+        self.costs = costs
+        self._redis = None
+        self._script = None
+        self.breaker = CircuitBreaker()
+        self.allowed = 0
+        self.limited = 0
+        self.redis_errors = 0
+        self.skipped = 0
+
+    def attach_redis(self, redis, reachable: bool = True):
+        """Başlangıçta Redis'e ulaşılamadıysa devre kesici açık başlar; istekler sınırlanmaz, bağlantı sonra yeniden denenir."""
+        if not self.enabled: return
+        self._redis = redis; self._script = redis.register_script(_TOKEN_BUCKET_LUA)
+        if not reachable: self.breaker.trip()
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        return f"ratelimit:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
+
+    async def check(self, api_key: str, endpoint_class: Optional[str]) -> Optional[int]:
+        """İstek sınırı aşıyorsa önerilen bekleme süresini (saniye), aşmıyorsa None döndürür."""
+        if self._script is None or endpoint_class is None: return None
+        if not self.breaker.allow():
+            self.skipped += 1
+            return None
+        cost = self.costs.get(endpoint_class, 1.0)
+        try:
+            allowed, retry = await self._script(keys=[self._key(api_key)], args=[self.rate, self.burst, cost, time.time()])
+        except Exception as e:
+            self.redis_errors += 1; self.breaker.record_failure()
+            print(f"UYARI: Hız sınırı Redis'te kontrol edilemedi; istek sınırlanmadan işleniyor. Detay: {e}")
+            return None
+        self.breaker.record_success()
+        if int(allowed):
+            self.allowed += 1
+            return None
+        self.limited += 1
+        return max(1, math.ceil(float(retry)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "attached": self._redis is not None, "tokens_per_second": self.rate, "burst": self.burst,
+                "allowed": self.allowed, "limited": self.limited, "redis_errors": self.redis_errors, "skipped": self.skipped,
+                "breaker_state": self.breaker.state}
+
+
+# Worker başına tek bir kabul denetleyicisi ve hız sınırlayıcı
+admission = AdmissionController()
+api_rate_limiter = RedisTokenBucket()
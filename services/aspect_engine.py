@@ -0,0 +1,240 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import ASPECTS, DECLINATION_ASPECTS, SYNASTRY_RANK_CHUNK_SIZE
+
+
+class AspectTable:
+    """
+    Bir açı sözlüğünü (ör. `ASPECTS`) vektörel eşleştirme için dizilere çevirir.
+    Sözlükteki sıra korunur; bir çift birden fazla açıya uyarsa ilk açı seçilir.
+    """
+    __slots__ = ("names", "types", "angles", "orbs", "orb_limits")
+
+    def __init__(self, aspects: Dict[str, Dict[str, Any]]):
+        self.names = list(aspects)
+        self.types = [aspects[name].get('type') for name in self.names]
+        self.orb_limits = [aspects[name]['orb'] for name in self.names]
+        self.angles = np.array([aspects[name]['angle'] for name in self.names], dtype=float)
+        self.orbs = np.array(self.orb_limits, dtype=float)
+
+
+# Natal açı sözlüklerinin alan sırası; satır (demet) döndüren fonksiyonlar da bu sırayı kullanır.
+ASPECT_FIELDS = ("planet1", "aspect", "planet2", "orb", "type", "nature")
+
+NATAL_ASPECT_TABLE = AspectTable(ASPECTS)
+SYNASTRY_ASPECT_TABLE = AspectTable({k: v for k, v in ASPECTS.items() if v['type'] == 'Major'})
+
+# Orb değeri karşılaştırmadan önce 2 haneye yuvarlandığı için, sınırı en fazla bu kadar aşan
+# ham farklar da aday sayılır; kesin karar aday başına Python'un `round` fonksiyonuyla verilir.
+_ROUNDING_SLACK = 0.005 + 1e-9
+
+
+def angular_distance(lon_a: np.ndarray, lon_b: np.ndarray) -> np.ndarray:
+    """İki boylam dizisi arasındaki en kısa açısal mesafeyi (0-180) döndürür."""
+    angle = np.abs(lon_a - lon_b)
+    return np.where(angle > 180, 360 - angle, angle)
+
+
+def _match_aspects(angles: np.ndarray, table: AspectTable) -> Tuple[Tuple[np.ndarray, ...], List[int], List[float]]:
+    """
+    Açı tensörünü (herhangi bir şekil) açı tablosuyla tek geçişte karşılaştırır.
+    Dönüş: (isabet indeksleri, açı indeksleri, yuvarlanmış orb'lar); isabetler satır öncelikli sıradadır.
+    """
+    diffs = np.abs(angles[..., None] - table.angles)
+    candidates = diffs <= table.orbs + _ROUNDING_SLACK
+    hit_positions = np.nonzero(candidates.any(axis=-1))
+    hit_candidates, hit_diffs = candidates[hit_positions], diffs[hit_positions]
+    first_candidates = hit_candidates.argmax(axis=-1).tolist()
+    first_diffs = hit_diffs[np.arange(len(first_candidates)), first_candidates].tolist()
+    kept, aspect_indices, orbs = [], [], []
+    for n, (k, diff) in enumerate(zip(first_candidates, first_diffs)):
+        orb = round(diff, 2)
+        if orb > table.orb_limits[k]:
+            # Nadir durum: ilk aday yuvarlama payı içinde kaldı ama sınırı aştı; sıradaki adaylara bakılır.
+            for k in np.flatnonzero(hit_candidates[n])[1:].tolist():
+                orb = round(float(hit_diffs[n, k]), 2)
+                if orb <= table.orb_limits[k]: break
+            else: continue
+        kept.append(n); aspect_indices.append(k); orbs.append(orb)
+    return tuple(axis[kept] for axis in hit_positions), aspect_indices, orbs
+
+
+def _group_by_layout(charts: Sequence[Sequence[Dict[str, Any]]]) -> Dict[Tuple[str, ...], List[int]]:
+    """Aynı gökcisimlerini aynı sırada içeren haritaları tek bir tensörde işlemek için gruplar."""
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    for index, chart in enumerate(charts):
+        groups.setdefault(tuple(p['planet'] for p in chart), []).append(index)
+    return groups
+
+
+def _longitude_aspect_rows(names: Sequence[str], longitudes: np.ndarray, speeds: np.ndarray) -> List[List[Tuple]]:
+    """
+    Aynı gökcismi düzenine sahip haritaların (harita, nokta) boylam ve hız matrislerinden açı satırlarını
+    üretir. Satırlar `ASPECT_FIELDS` sırasındadır; çift sırası `itertools.combinations` sırasıdır.
+    """
+    rows: List[List[Tuple]] = [[] for _ in range(len(longitudes))]
+    table = NATAL_ASPECT_TABLE
+    first, second = np.triu_indices(len(names), k=1)
+    angles = angular_distance(longitudes[:, first], longitudes[:, second])
+    (chart_hits, pair_hits), aspect_indices, orbs = _match_aspects(angles, table)
+    if not aspect_indices: return rows
+    # Applying/Separating: iki gökcismi de hızlarıyla kısa bir an ilerletilir ve orb'un daralıp daralmadığına bakılır.
+    i, j = first[pair_hits], second[pair_hits]
+    has_speed = ~(np.isnan(speeds[chart_hits, i]) | np.isnan(speeds[chart_hits, j]))
+    future_i = (longitudes[chart_hits, i] + speeds[chart_hits, i] * 0.01) % 360
+    future_j = (longitudes[chart_hits, j] + speeds[chart_hits, j] * 0.01) % 360
+    future_orbs = np.abs(angular_distance(future_i, future_j) - table.angles[aspect_indices]).tolist()
+    for c, p1, p2, k, orb, speed_known, future_orb in zip(chart_hits.tolist(), i.tolist(), j.tolist(), aspect_indices, orbs,
+                                                         has_speed.tolist(), future_orbs):
+        nature = "N/A"
+        if speed_known: nature = "Applying" if future_orb < orb else "Separating"
+        rows[c].append((names[p1], table.names[k], names[p2], orb, table.types[k], nature))
+    return rows
+
+
+def calculate_aspect_rows(names: Sequence[str], longitudes: Sequence[float], speeds: Sequence[Optional[float]]) -> List[Tuple]:
+    """Tek bir haritanın boylam açılarını sözlük yerine `ASPECT_FIELDS` sıralı demetler olarak döndürür; hızı bilinmeyen noktalar için None verilir."""
+    if len(names) < 2: return []
+    speed_row = [np.nan if speed is None else speed for speed in speeds]
+    return _longitude_aspect_rows(names, np.array([longitudes], dtype=float), np.array([speed_row], dtype=float))[0]
+
+
+def calculate_aspects_batch(charts: Sequence[Sequence[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+    """
+    Birden fazla haritanın boylam açılarını tek çağrıda hesaplar. Her harita için sonuç,
+    `calculate_aspects` ile birebir aynı listedir (çift sırası `itertools.combinations` sırasıdır).
+    """
+    results: List[List[Dict[str, Any]]] = [[] for _ in charts]
+    for names, chart_indices in _group_by_layout(charts).items():
+        if len(names) < 2: continue
+        stack = [charts[i] for i in chart_indices]
+        longitudes = np.array([[p['longitude'] for p in chart] for chart in stack], dtype=float)
+        speeds = np.array([[np.nan if p.get('speed') is None else p['speed'] for p in chart] for chart in stack], dtype=float)
+        for chart_index, rows in zip(chart_indices, _longitude_aspect_rows(names, longitudes, speeds)):
+            results[chart_index] = [dict(zip(ASPECT_FIELDS, row)) for row in rows]
+    return results
+
+
+def calculate_aspects(planets_and_points: list) -> List[Dict[str, Any]]:
+    return calculate_aspects_batch([planets_and_points])[0]
+
+
+def calculate_synastry_aspects_batch(pairs: Sequence[Tuple[List[Dict], List[Dict]]]) -> List[List[Dict]]:
+    """
+    Birden fazla harita çifti için sinastri (A×B) açılarını hesaplar. Çiftler, gökcismi
+    düzenleri aynıysa tek bir (çift, A, B) açı tensöründe işlenir.
+    """
+    results: List[List[Dict]] = [[] for _ in pairs]
+    table = SYNASTRY_ASPECT_TABLE
+    groups: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[int]] = {}
+    for index, (planets1, planets2) in enumerate(pairs):
+        groups.setdefault((tuple(p['planet'] for p in planets1), tuple(p['planet'] for p in planets2)), []).append(index)
+    for (names1, names2), pair_indices in groups.items():
+        if not names1 or not names2: continue
+        longitudes1 = np.array([[p['longitude'] for p in pairs[i][0]] for i in pair_indices], dtype=float)
+        longitudes2 = np.array([[p['longitude'] for p in pairs[i][1]] for i in pair_indices], dtype=float)
+        angles = angular_distance(longitudes1[:, :, None], longitudes2[:, None, :])
+        (pair_hits, hits1, hits2), aspect_indices, orbs = _match_aspects(angles, table)
+        for c, p1, p2, k, orb in zip(pair_hits.tolist(), hits1.tolist(), hits2.tolist(), aspect_indices, orbs):
+            results[pair_indices[c]].append({"planet1": names1[p1], "aspect": table.names[k], "planet2": names2[p2], "orb": orb})
+    return results
+
+
+def calculate_synastry_aspects(planets1: List[Dict], planets2: List[Dict]) -> List[Dict]:
+    return calculate_synastry_aspects_batch([(planets1, planets2)])[0]
+
+
+def _synastry_matches(longitudes: np.ndarray, candidate_longitudes: np.ndarray, table: AspectTable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (aday, kişinin gökcismi, adayın gökcismi) tensörü için eşleşen açının tablo indeksini (-1: açı yok) ve açısal
+    farkı döndürür. Orb, sinastri açılarında olduğu gibi iki haneye yuvarlanmış haliyle sınırla karşılaştırılır;
+    bir çift birden fazla açıya uyarsa tablodaki ilk açı seçilir. Boylamı NaN olan gökcismi hiçbir açıya girmez.
+    """
+    angles = angular_distance(longitudes[None, :, None], candidate_longitudes[:, None, :])
+    matched = np.full(angles.shape, -1, dtype=np.int8); diffs = np.zeros(angles.shape)
+    for k, (angle, limit) in enumerate(zip(table.angles.tolist(), table.orb_limits)):
+        diff = np.abs(angles - angle)
+        hit = (diff < limit + 0.005) & (matched < 0)
+        matched = np.where(hit, k, matched); diffs = np.where(hit, diff, diffs)
+    return matched, diffs
+
+
+def _synastry_contributions(matched: np.ndarray, diffs: np.ndarray, table: AspectTable, weights: np.ndarray, pair_weights: np.ndarray) -> np.ndarray:
+    """Çift başına puan katkısı; -1 indeksi, sona eklenen sıfır ağırlığa düşer."""
+    weights = np.append(weights, 0.0); limits = np.append(table.orbs, 1.0)
+    return weights[matched] * np.maximum(1.0 - diffs / limits[matched], 0.0) * pair_weights
+
+
+def rank_synastry_candidates(names: Sequence[str], longitudes: Sequence[float], candidate_longitudes: np.ndarray,
+                             aspect_weights: Dict[str, float], planet_weights: Sequence[float], top_k: int,
+                             chunk_size: int = SYNASTRY_RANK_CHUNK_SIZE) -> List[Tuple[int, float, List[Dict]]]:
+    """
+    Bir kişiyi N adayla sinastri açıları üzerinden puanlar ve en yüksek `top_k` adayı döndürür.
+    `candidate_longitudes` (aday, gökcismi) matrisidir ve sütunları `names` sırasındadır. Puan, her açı isabeti için
+    `açı ağırlığı x gökcismi ağırlıklarının çarpımı x (1 - orb / orb sınırı)` toplamıdır; tüm adaylar parça parça
+    tek bir tensör işlemiyle puanlanır, açı listeleri yalnızca seçilen adaylar için üretilir.
+    Dönüş: (aday indeksi, puan, katkı veren açılar) listesi; puana göre azalan, eşitlikte indekse göre artan sıradadır.
+    """
+    table = SYNASTRY_ASPECT_TABLE
+    longitudes = np.asarray(longitudes, dtype=float); candidate_longitudes = np.asarray(candidate_longitudes, dtype=float)
+    weights = np.array([aspect_weights.get(name, 0.0) for name in table.names], dtype=float)
+    pair_weights = np.outer(planet_weights, planet_weights)
+    scores = np.empty(len(candidate_longitudes))
+    for start in range(0, len(candidate_longitudes), max(1, chunk_size)):
+        matched, diffs = _synastry_matches(longitudes, candidate_longitudes[start:start + chunk_size], table)
+        scores[start:start + chunk_size] = _synastry_contributions(matched, diffs, table, weights, pair_weights).sum(axis=(1, 2))
+    count = min(top_k, len(scores))
+    if count <= 0: return []
+    top = np.argpartition(-scores, count - 1)[:count]
+    top = top[np.lexsort((top, -scores[top]))]
+    matched, diffs = _synastry_matches(longitudes, candidate_longitudes[top], table)
+    contributions = _synastry_contributions(matched, diffs, table, weights, pair_weights)
+    # Ağırlığı 0 olan açılar puana katkı vermediği için listelenmez.
+    listed = (matched >= 0) & (np.append(weights, 0.0)[matched] != 0)
+    results = []
+    for row, index in enumerate(top.tolist()):
+        aspects = [{"planet1": names[i], "aspect": table.names[matched[row, i, j]], "planet2": names[j],
+                    "orb": round(float(diffs[row, i, j]), 2), "score": round(float(contributions[row, i, j]), 4)}
+                   for i, j in zip(*(axis.tolist() for axis in np.nonzero(listed[row])))]
+        aspects.sort(key=lambda aspect: -abs(aspect["score"]))
+        results.append((index, round(float(scores[index]), 4), aspects))
+    return results
+
+
+def _declination_aspect_rows(names: Sequence[str], declinations: np.ndarray) -> List[List[Tuple]]:
+    """(harita, nokta) deklinasyon matrisinden Paralel / Kontra-Paralel satırlarını (`ASPECT_FIELDS` sırası) üretir."""
+    rows: List[List[Tuple]] = [[] for _ in range(len(declinations))]
+    parallel_orb = DECLINATION_ASPECTS["Parallel"]["orb"]; contra_orb = DECLINATION_ASPECTS["Contra-Parallel"]["orb"]
+    first, second = np.triu_indices(len(names), k=1)
+    dec1, dec2 = declinations[:, first], declinations[:, second]
+    same_side = ((dec1 >= 0) & (dec2 >= 0)) | ((dec1 < 0) & (dec2 < 0))
+    distance = np.where(same_side, np.abs(dec1 - dec2), np.abs(np.abs(dec1) - np.abs(dec2)))
+    hits = np.nonzero(distance <= np.where(same_side, parallel_orb, contra_orb))
+    for c, p in zip(*(axis.tolist() for axis in hits)):
+        aspect_name = "Parallel" if same_side[c, p] else "Contra-Parallel"
+        rows[c].append((names[first[p]], aspect_name, names[second[p]], round(float(distance[c, p]), 2), "Declination", "N/A"))
+    return rows
+
+
+def calculate_declination_aspect_rows(names: Sequence[str], declinations: Sequence[float]) -> List[Tuple]:
+    """Tek bir haritanın deklinasyon açılarını demet olarak döndürür; uygun olmayan noktaları (Part of Fortune) çağıran eler."""
+    if len(names) < 2: return []
+    return _declination_aspect_rows(names, np.array([declinations], dtype=float))[0]
+
+
+def calculate_declination_aspects_batch(charts: Sequence[Sequence[Dict[str, Any]]]) -> List[List[Dict]]:
+    """Birden fazla haritanın Paralel / Kontra-Paralel açılarını tek çağrıda hesaplar."""
+    eligible_charts = [[p for p in chart if 'declination' in p and p['planet'] != 'Part of Fortune'] for chart in charts]
+    results: List[List[Dict]] = [[] for _ in charts]
+    for names, chart_indices in _group_by_layout(eligible_charts).items():
+        if len(names) < 2: continue
+        declinations = np.array([[p['declination'] for p in eligible_charts[i]] for i in chart_indices], dtype=float)
+        for chart_index, rows in zip(chart_indices, _declination_aspect_rows(names, declinations)):
+            results[chart_index] = [dict(zip(ASPECT_FIELDS, row)) for row in rows]
+    return results
+
+
+def calculate_declination_aspects(planets: List[Dict]) -> List[Dict]:
+    return calculate_declination_aspects_batch([planets])[0]
@@ -0,0 +1,105 @@
+from typing import Dict, Iterator, List, Sequence
+
+from services.chart_model import ChartBody, ChartAspect
+
+# Kalıplarda kullanılan açı türleri. Her tür için gökcismi başına bir komşuluk bit maskesi tutulur:
+# `graph[aspect][i]`'nin j. biti, i. ve j. gökcisimleri arasında o açı varsa 1'dir.
+PATTERN_ASPECTS = ("Opposition", "Trine", "Square", "Sextile", "Quincunx")
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Maskedeki 1 bitlerinin indekslerini küçükten büyüğe verir."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AspectGraph:
+    """
+    Açı listesini açı türü başına komşuluk bit maskelerine çevirir. Bir kalıbın kenar sorgusu tek bir
+    `&` işlemidir; kalıp aramaları kenar başına sabit iş ve bulunan kalıp sayısı kadar sürer.
+    İndeksler `bodies` sırasındadır; eşit durumlarda sonuç sırası bu sıraya göre belirlenir.
+    """
+    __slots__ = ("bodies", "index", "masks", "edges")
+
+    def __init__(self, bodies: Sequence[ChartBody], aspects: Sequence[ChartAspect]):
+        self.bodies = bodies
+        self.index = {body.planet: i for i, body in enumerate(bodies)}
+        self.masks: Dict[str, List[int]] = {name: [0] * len(bodies) for name in PATTERN_ASPECTS}
+        # Kenarlar açı listesindeki sırayla, (küçük indeks, büyük indeks) olarak tutulur.
+        self.edges: Dict[str, List[tuple]] = {name: [] for name in PATTERN_ASPECTS}
+        for aspect in aspects:
+            masks = self.masks.get(aspect.aspect)
+            i, j = self.index.get(aspect.planet1), self.index.get(aspect.planet2)
+            if masks is None or i is None or j is None or i == j: continue
+            masks[i] |= 1 << j; masks[j] |= 1 << i
+            self.edges[aspect.aspect].append((min(i, j), max(i, j)))
+
+    def names(self, *indices: int) -> List[str]:
+        return sorted(self.bodies[i].planet for i in indices)
+
+
+def _stelliums(bodies: Sequence[ChartBody]) -> List[Dict]:
+    patterns, sign_counts, house_counts = [], {}, {}
+    for body in bodies:
+        sign_counts.setdefault(body.sign, []).append(body.planet)
+        house_counts.setdefault(body.house, []).append(body.planet)
+    for sign, p_list in sign_counts.items():
+        if len(p_list) >= 3: patterns.append({"pattern": "Stellium", "type": "Sign", "location": sign, "planets": p_list})
+    for house, p_list in house_counts.items():
+        if len(p_list) >= 3: patterns.append({"pattern": "Stellium", "type": "House", "location": f"House {house}", "planets": p_list})
+    return patterns
+
+
+def _grand_trines(graph: AspectGraph) -> List[tuple]:
+    """Üçgen (3'lü klik) araması: i < j < k; her üçgen yalnızca en küçük kenarından bir kez bulunur."""
+    trine, triangles = graph.masks["Trine"], []
+    for i in range(len(graph.bodies)):
+        higher_i = trine[i] >> (i + 1) << (i + 1)
+        for j in _bits(higher_i):
+            for k in _bits(higher_i & trine[j] >> (j + 1) << (j + 1)): triangles.append((i, j, k))
+    return triangles
+
+
+def recognize_aspect_patterns(bodies: List[ChartBody], aspects: List[ChartAspect]) -> List[Dict]:
+    """
+    Stellium, Grand Trine, T-Square, Grand Cross, Yod, Kite ve Mystic Rectangle kalıplarını bulur.
+    Her kalıp, kendisini tek biçimde tanımlayan bir kenardan (ör. en küçük indeksli karşıt açı)
+    üretildiği için aynı gezegen kümesi iki kez eklenmez; kalıp listesi taranmaz.
+    Bir kalıbın parçası olan daha küçük kalıplar da (Kite içindeki Grand Trine gibi) ayrıca listelenir.
+    """
+    graph = AspectGraph(bodies, aspects)
+    opposition, square, sextile = graph.masks["Opposition"], graph.masks["Square"], graph.masks["Sextile"]
+    trine, quincunx = graph.masks["Trine"], graph.masks["Quincunx"]
+    patterns = _stelliums(bodies)
+    triangles = _grand_trines(graph)
+    for i, j, k in triangles:
+        patterns.append({"pattern": "Grand Trine", "planets": graph.names(i, j, k), "element": bodies[i].element})
+    # T-Square: karşıt açının iki ucuna da kare yapan tepe gezegeni. Üçlüde tek karşıt açı olabildiğinden tekildir.
+    for a, b in graph.edges["Opposition"]:
+        for apex in _bits(square[a] & square[b]):
+            patterns.append({"pattern": "T-Square", "planets": graph.names(a, b, apex), "apex_planet": bodies[apex].planet})
+    # Grand Cross: iki karşıt açı ve aralarında dört kare. Haç, en küçük indeksi içeren karşıt açıdan üretilir.
+    for a, b in graph.edges["Opposition"]:
+        candidates = square[a] & square[b]
+        for c in _bits(candidates >> (a + 1) << (a + 1)):
+            for d in _bits(opposition[c] & candidates >> (c + 1) << (c + 1)):
+                patterns.append({"pattern": "Grand Cross", "planets": graph.names(a, b, c, d), "modality": bodies[a].modality})
+    # Yod: sekstil yapan iki gezegenin ikisine de quincunx yapan tepe gezegeni.
+    for a, b in graph.edges["Sextile"]:
+        for apex in _bits(quincunx[a] & quincunx[b]):
+            patterns.append({"pattern": "Yod", "planets": graph.names(a, b, apex), "apex_planet": bodies[apex].planet})
+    # Kite: Grand Trine'in bir köşesine karşıt, diğer iki köşesine sekstil yapan dördüncü gezegen.
+    for i, j, k in triangles:
+        for corner, other1, other2 in ((i, j, k), (j, i, k), (k, i, j)):
+            for apex in _bits(opposition[corner] & sextile[other1] & sextile[other2]):
+                patterns.append({"pattern": "Kite", "planets": graph.names(i, j, k, apex), "apex_planet": bodies[apex].planet,
+                                 "element": bodies[i].element})
+    # Mystic Rectangle: iki karşıt açı; uçlar birbirine sırayla sekstil ve üçgen. Dikdörtgen, en küçük indeksi
+    # içeren karşıt açıdan üretilir.
+    for a, b in graph.edges["Opposition"]:
+        for c in _bits(sextile[a] & trine[b] >> (a + 1) << (a + 1)):
+            for d in _bits(opposition[c] & trine[a] & sextile[b] >> (a + 1) << (a + 1)):
+                patterns.append({"pattern": "Mystic Rectangle", "planets": graph.names(a, b, c, d)})
+    return patterns
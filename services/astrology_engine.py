@@ -1,26 +1,31 @@
 import swisseph as swe
 from datetime import datetime
 import pytz
-from timezonefinder import TimezoneFinder
-from typing import Dict, Any, List
-import itertools
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 
 from models.pydantic_models import BirthData
-from core.config import (
-    EPHE_PATH, ZODIAC_SIGNS, ZODIAC_GLYPHS, SIGN_TO_ELEMENT,
-    SIGN_TO_MODALITY, SIGN_RULERS, PLANET_NUMBERS, ASPECTS,
-    DECLINATION_ASPECTS
+from core.config import PLANET_NUMBERS
+# Açı hesapları vektörel motorda yapılır; eski isimler geriye dönük uyumluluk için buradan da sunulur.
+from services.aspect_engine import (
+    calculate_aspects, calculate_synastry_aspects, calculate_declination_aspects,
+    calculate_aspect_rows, calculate_declination_aspect_rows
 )
+# Harita modeli ve burç yardımcıları `chart_model` modülündedir; eski isimler buradan da sunulur.
+from services.chart_model import (
+    NatalChart, ChartBody, ChartAspect, PART_OF_FORTUNE, format_declination, get_zodiac_sign_details
+)
+# Kalıp tanıma, açı grafı üzerinde çalışan `aspect_patterns` modülündedir.
+from services.aspect_patterns import recognize_aspect_patterns
+from services.timezone_resolver import timezone_resolver
+from services.compute_executor import ensure_ephe_path, swe_lock
+from services.ephemeris_table import ephemeris_table, longitudes
+from services.metrics import metrics
 
-def format_declination(dec: float) -> str:
-    direction = "N" if dec >= 0 else "S"; dec = abs(dec); degrees = int(dec); minutes = int((dec - degrees) * 60)
-    return f"{degrees:02d}° {direction} {minutes:02d}'"
-
-def get_zodiac_sign_details(degree: float) -> Dict[str, Any]:
-    sign_index = int(degree / 30); degree_in_sign = degree % 30; sign_name = ZODIAC_SIGNS[sign_index]
-    return {"sign": sign_name, "sign_glyph": ZODIAC_GLYPHS[sign_index], "degree": int(degree_in_sign),
-            "minute": int((degree_in_sign - int(degree_in_sign)) * 60), "element": SIGN_TO_ELEMENT.get(sign_name),
-            "modality": SIGN_TO_MODALITY.get(sign_name)}
+TIMEZONE_NOT_FOUND_ERROR = "Geçersiz koordinatlar için zaman dilimi bulunamadı."
+# YENİ: `calculate_natal_data` çıktısını veya `NatalChart.to_compact` biçimini değiştiren her düzenlemede
+# artırılmalıdır (harita önbelleği anahtarının parçasıdır).
+NATAL_ENGINE_VERSION = "3"
 
 def _find_planet_in_house(planet_longitude: float, house_cusps: List[float]) -> int:
     for i in range(12):
@@ -31,161 +36,105 @@ def _find_planet_in_house(planet_longitude: float, house_cusps: List[float]) ->
             if house_start <= planet_longitude < house_end: return i + 1
     return 0
 
-def calculate_aspects(planets_and_points: list) -> List[Dict[str, Any]]:
-    found_aspects = []
-    for p1, p2 in itertools.combinations(planets_and_points, 2):
-        angle = abs(p1['longitude'] - p2['longitude'])
-        if angle > 180: angle = 360 - angle
-        for aspect_name, aspect_info in ASPECTS.items():
-            orb = round(abs(angle - aspect_info['angle']), 2)
-            if orb <= aspect_info['orb']:
-                nature = "N/A"
-                if p1.get('speed') is not None and p2.get('speed') is not None:
-                    p1_speed = p1.get('speed', 0.0); p2_speed = p2.get('speed', 0.0)
-                    p_fast = p1 if abs(p1_speed) > abs(p2_speed) else p2; p_slow = p2 if abs(p1_speed) > abs(p2_speed) else p1
-                    future_lon_fast = (p_fast['longitude'] + (p_fast.get('speed', 0.0) * 0.01)) % 360
-                    future_lon_slow = (p_slow['longitude'] + (p_slow.get('speed', 0.0) * 0.01)) % 360
-                    future_angle = abs(future_lon_fast - future_lon_slow)
-                    if future_angle > 180: future_angle = 360 - future_angle
-                    future_orb = abs(future_angle - aspect_info['angle'])
-                    nature = "Separating"
-                    if future_orb < orb: nature = "Applying"
-                found_aspects.append({"planet1": p1['planet'], "aspect": aspect_name, "planet2": p2['planet'], "orb": orb, "type": aspect_info['type'], "nature": nature})
-                break
-    return found_aspects
+def birth_moment_utc(birth_data: BirthData, timezone_str: str) -> datetime:
+    """Yerel doğum tarih ve saatini, verilen zaman dilimine göre UTC'ye çevirir."""
+    local_tz = timezone_resolver.get_zone(timezone_str); naive_dt = datetime.combine(birth_data.date, birth_data.time)
+    local_dt = local_tz.localize(naive_dt)
+    return local_tz.normalize(local_dt).astimezone(pytz.utc)
 
-def recognize_aspect_patterns(planets: List[Dict], aspects: List[Dict]) -> List[Dict]:
-    patterns, sign_counts, house_counts = [], {}, {}
-    for p in planets:
-        sign, house = p['sign'], p['house']
-        sign_counts[sign] = sign_counts.get(sign, []) + [p['planet']]
-        house_counts[house] = house_counts.get(house, []) + [p['planet']]
-    for sign, p_list in sign_counts.items():
-        if len(p_list) >= 3: patterns.append({"pattern": "Stellium", "type": "Sign", "location": sign, "planets": p_list})
-    for house, p_list in house_counts.items():
-        if len(p_list) >= 3: patterns.append({"pattern": "Stellium", "type": "House", "location": f"House {house}", "planets": p_list})
-    trines = [a for a in aspects if a['aspect'] == 'Trine']
-    for p1, p2, p3 in itertools.combinations(planets, 3):
-        p_names = {p1['planet'], p2['planet'], p3['planet']}
-        if any(a for a in trines if {p1['planet'], p2['planet']}.issubset(a.values())) and \
-           any(a for a in trines if {p1['planet'], p3['planet']}.issubset(a.values())) and \
-           any(a for a in trines if {p2['planet'], p3['planet']}.issubset(a.values())):
-            if not any(p.get('pattern') == 'Grand Trine' and set(p.get('planets')) == p_names for p in patterns):
-                patterns.append({"pattern": "Grand Trine", "planets": sorted(list(p_names)), "element": SIGN_TO_ELEMENT.get(p1['sign'])})
-    oppositions = [a for a in aspects if a['aspect'] == 'Opposition']
-    squares = [a for a in aspects if a['aspect'] == 'Square']
-    for opp in oppositions:
-        p1_opp, p2_opp = opp['planet1'], opp['planet2']
-        for apex_planet in planets:
-            p_apex = apex_planet['planet']
-            if p_apex in [p1_opp, p2_opp]: continue
-            if any(a for a in squares if {p1_opp, p_apex}.issubset(a.values())) and \
-               any(a for a in squares if {p2_opp, p_apex}.issubset(a.values())):
-                p_names = {p1_opp, p2_opp, p_apex}
-                if not any(p.get('pattern') == 'T-Square' and set(p.get('planets')) == p_names for p in patterns):
-                    patterns.append({"pattern": "T-Square", "planets": sorted(list(p_names)), "apex_planet": p_apex})
-    return patterns
+# --- YENİ: Toplu Doğum Anı ve Gezegen Boylamları (Sinastri Sıralaması) ---
+def birth_julian_days(birth_datas: Sequence[BirthData], timezones: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Doğum anlarının Julian günlerini `calculate_natal_chart` ile aynı yoldan (`swe.utc_to_jd`) hesaplar; zaman dilimi
+    olmayan kayıtlar NaN'dır. UTC anı `birth_moment_utc` ile aynıdır, ancak yalnızca UTC farkı alınır (binlerce kayıtta ~2 kat hızlı).
+    """
+    julian_days = np.full(len(birth_datas), np.nan); moments = []
+    for i, (birth_data, timezone_str) in enumerate(zip(birth_datas, timezones)):
+        if not timezone_str: continue
+        naive_dt = datetime.combine(birth_data.date, birth_data.time)
+        moments.append((i, naive_dt - timezone_resolver.get_zone(timezone_str).localize(naive_dt).utcoffset()))
+    with swe_lock:
+        for i, utc_dt in moments:
+            julian_days[i] = swe.utc_to_jd(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour, utc_dt.minute, utc_dt.second, 1)[0]
+    return julian_days
 
-def calculate_synastry_aspects(planets1: List[Dict], planets2: List[Dict]) -> List[Dict]:
-    SYNASTRY_MAJOR_ASPECTS = {k: v for k, v in ASPECTS.items() if v['type'] == 'Major'}
-    synastry_aspects = []
-    for p1 in planets1:
-        for p2 in planets2:
-            angle = abs(p1['longitude'] - p2['longitude'])
-            if angle > 180: angle = 360 - angle
-            for aspect_name, aspect_info in SYNASTRY_MAJOR_ASPECTS.items():
-                orb = round(abs(angle - aspect_info['angle']), 2)
-                if orb <= aspect_info['orb']:
-                    synastry_aspects.append({"planet1": p1['planet'], "aspect": aspect_name, "planet2": p2['planet'], "orb": orb})
-                    break
-    return synastry_aspects
-
-def _find_house_rulers(house_cusps: List[float], planets: List[Dict], rulership_system: str) -> List[Dict]:
-    rulerships = []
-    planets_map = {p['planet']: p for p in planets}
-    for i in range(12):
-        house_num = i + 1; cusp_sign_details = get_zodiac_sign_details(house_cusps[i]); cusp_sign = cusp_sign_details['sign']
-        ruler_info = SIGN_RULERS.get(cusp_sign)
-        if not ruler_info: continue
-        ruler_planet_name = ruler_info['traditional']
-        if rulership_system == 'modern' and ruler_info['modern'] is not None: ruler_planet_name = ruler_info['modern']
-        ruler_planet_data = planets_map.get(ruler_planet_name)
-        if ruler_planet_data:
-            ruler_in_house = ruler_planet_data.get('house')
-            rulerships.append({"house": house_num, "sign": cusp_sign, "ruler_planet": ruler_planet_name,
-                               "ruler_in_house": ruler_in_house, "rulership_system_used": rulership_system})
-    return rulerships
+def planet_longitudes_many(birth_datas: Sequence[BirthData], names: Sequence[str]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Yalnızca gezegen boylamlarına ihtiyaç duyan toplu işler için (ev, açı ve kalıp hesaplanmaz). Dönüş, sütunları
+    `names` sırasında olan (kayıt, gökcismi) boylam matrisi ve kayıt başına hata mesajıdır (yoksa None); hatalı
+    kayıtların satırı NaN'dır. Efemeris tablosu açıksa her gökcismi tüm kayıtlar için tek vektörel geçişte okunur.
+    """
+    timezones = timezone_resolver.timezone_at_many((birth_data.lat, birth_data.lon) for birth_data in birth_datas)
+    julian_days = birth_julian_days(birth_datas, timezones); valid = ~np.isnan(julian_days)
+    positions = np.full((len(birth_datas), len(names)), np.nan)
+    for column, name in enumerate(names): positions[valid, column] = longitudes(name, julian_days[valid])
+    return positions, [None if timezone_str else TIMEZONE_NOT_FOUND_ERROR for timezone_str in timezones]
+# --- BİTTİ ---
 
-def calculate_declination_aspects(planets: List[Dict]) -> List[Dict]:
-    found_aspects = []; orb = DECLINATION_ASPECTS["Parallel"]["orb"]
-    for p1, p2 in itertools.combinations(planets, 2):
-        if 'declination' not in p1 or 'declination' not in p2 or p1['planet'] == 'Part of Fortune' or p2['planet'] == 'Part of Fortune': continue
-        dec1 = p1['declination']; dec2 = p2['declination']
-        if (dec1 >= 0 and dec2 >= 0) or (dec1 < 0 and dec2 < 0):
-            if abs(dec1 - dec2) <= orb:
-                found_aspects.append({"planet1": p1['planet'], "aspect": "Parallel", "planet2": p2['planet'],
-                                      "orb": round(abs(dec1 - dec2), 2), "type": "Declination", "nature": "N/A"})
+def _body_positions(julian_day_utc: float) -> List[Tuple[str, float, bool, float, float]]:
+    """Gökcisimlerinin (isim, boylam, retro, hız, deklinasyon) değerleri. Çağıran `swe_lock`'u tutmalıdır."""
+    raw_bodies = []
+    # YENİ: Efemeris tablosu açıksa ve tarihi kapsıyorsa konumlar tablodan tek geçişte okunur
+    table_positions = ephemeris_table.evaluate_bodies(list(PLANET_NUMBERS), julian_day_utc) if ephemeris_table.enabled else {}
+    for name, num in PLANET_NUMBERS.items():
+        if name in table_positions:
+            longitude, speed, declination = table_positions[name]
         else:
-            if abs(abs(dec1) - abs(dec2)) <= orb:
-                found_aspects.append({"planet1": p1['planet'], "aspect": "Contra-Parallel", "planet2": p2['planet'],
-                                      "orb": round(abs(abs(dec1) - abs(dec2)), 2), "type": "Declination", "nature": "N/A"})
-    return found_aspects
+            pos_data, ret_flag = swe.calc_ut(julian_day_utc, num, 0) if name == 'Lilith' else swe.calc_ut(julian_day_utc, num, swe.FLG_SPEED)
+            if ret_flag < 0: continue
+            longitude, speed = pos_data[0], pos_data[3] if len(pos_data) > 3 else 0.0
+            eq_data, ret_flag_eq = swe.calc_ut(julian_day_utc, num, swe.FLG_EQUATORIAL)
+            declination = eq_data[1] if ret_flag_eq >= 0 else 0.0
+        is_retrograde = False
+        if name == 'Lilith': speed = 0.0
+        elif name not in ['True Node', 'Sun', 'Moon'] and speed < 0: is_retrograde = True
+        raw_bodies.append((name, longitude, is_retrograde, speed, declination))
+    return raw_bodies
 
-def _calculate_balance(planets_with_details: List[Dict]) -> Dict[str, Any]:
-    elements = {'Fire': 0, 'Earth': 0, 'Air': 0, 'Water': 0}
-    modalities = {'Cardinal': 0, 'Fixed': 0, 'Mutable': 0}
-    planets_for_balance = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto']
-    for p in planets_with_details:
-        if p['planet'] in planets_for_balance:
-            if p.get('element'): elements[p['element']] += 1
-            if p.get('modality'): modalities[p['modality']] += 1
-    return {"elements": elements, "modalities": modalities}
+def _natal_aspects(bodies: List[ChartBody], ascmc: Sequence[float]) -> Tuple[List[ChartAspect], List[ChartAspect]]:
+    """Haritanın tüm açılarını ve kalıp tanıma için yalnızca gökcisimleri arasındaki boylam açılarını döndürür."""
+    # DEĞİŞİKLİK: Boylam açıları Yükselen ve MC ile birlikte tek seferde hesaplanır; kalıplar için bu iki nokta ayıklanır.
+    names = [body.planet for body in bodies] + ["Ascendant", "Midheaven"]
+    longitude_rows = calculate_aspect_rows(names, [body.longitude for body in bodies] + [ascmc[0], ascmc[1]],
+                                           [body.speed for body in bodies] + [None, None])
+    declination_bodies = [body for body in bodies if body.planet != PART_OF_FORTUNE]
+    declination_rows = calculate_declination_aspect_rows([body.planet for body in declination_bodies], [body.declination for body in declination_bodies])
+    longitude_aspects = [ChartAspect(*row) for row in longitude_rows]
+    angles = ("Ascendant", "Midheaven")
+    planet_to_planet_aspects = [a for a in longitude_aspects if a.planet1 not in angles and a.planet2 not in angles]
+    return longitude_aspects + [ChartAspect(*row) for row in declination_rows], planet_to_planet_aspects
 
-def calculate_natal_data(birth_data: BirthData) -> Dict[str, Any]:
-    tf = TimezoneFinder(); timezone_str = tf.timezone_at(lng=birth_data.lon, lat=birth_data.lat)
-    if not timezone_str: return {"error": "Geçersiz koordinatlar için zaman dilimi bulunamadı."}
-    local_tz = pytz.timezone(timezone_str); naive_dt = datetime.combine(birth_data.date, birth_data.time)
-    local_dt = local_tz.localize(naive_dt); utc_dt = local_tz.normalize(local_dt).astimezone(pytz.utc)
-    julian_day_utc = swe.utc_to_jd(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour, utc_dt.minute, utc_dt.second, 1)[0]
-    swe.set_ephe_path(str(EPHE_PATH))
-    raw_planets = []; planet_longitudes = {}
-    for name, num in PLANET_NUMBERS.items():
-        pos_data, ret_flag = swe.calc_ut(julian_day_utc, num, 0) if name == 'Lilith' else swe.calc_ut(julian_day_utc, num, swe.FLG_SPEED)
-        if ret_flag < 0: continue
-        longitude = pos_data[0]
-        eq_data, ret_flag_eq = swe.calc_ut(julian_day_utc, num, swe.FLG_EQUATORIAL)
-        declination = eq_data[1] if ret_flag_eq >= 0 else 0.0
-        is_retrograde, speed = False, 0.0
-        if len(pos_data) > 3 and name != 'Lilith':
-            speed = pos_data[3]
-            if name not in ['True Node', 'Sun', 'Moon'] and speed < 0: is_retrograde = True
-        raw_planets.append({"planet": name, "longitude": longitude, "is_retrograde": is_retrograde, "speed": speed,
-                            "declination": declination, "declination_formatted": format_declination(declination)})
-        planet_longitudes[name] = longitude
-    try:
-        house_cusps_raw, ascmc = swe.houses(julian_day_utc, birth_data.lat, birth_data.lon, bytes(birth_data.house_system.value, "utf-8"))
-    except swe.Error as e: return {"error": f"Evler hesaplanamadı. Detay: {e}"}
+def calculate_natal_chart(birth_data: BirthData, timezone_str: Optional[str] = None) -> Union[NatalChart, Dict[str, str]]:
+    """Doğum haritasını `NatalChart` olarak hesaplar; hata durumunda `{"error": ...}` sözlüğü döner."""
+    # timezone_str önceden çözüldüyse (ör. toplu isteklerde `timezone_at_many` ile) doğrudan kullanılır.
+    if timezone_str is None:
+        with metrics.stage("timezone"): timezone_str = timezone_resolver.timezone_at(birth_data.lat, birth_data.lon)
+    if not timezone_str: return {"error": TIMEZONE_NOT_FOUND_ERROR}
+    utc_dt = birth_moment_utc(birth_data, timezone_str)
+    ensure_ephe_path()
+    # Swiss Ephemeris global durum tuttuğu için tüm `swe` çağrıları tek kilit altında yapılır.
+    with swe_lock:
+        with metrics.stage("utc_to_jd"):
+            julian_day_utc = swe.utc_to_jd(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour, utc_dt.minute, utc_dt.second, 1)[0]
+        with metrics.stage("ephemeris"): raw_bodies = _body_positions(julian_day_utc)
+        try:
+            with metrics.stage("houses"):
+                house_cusps, ascmc = swe.houses(julian_day_utc, birth_data.lat, birth_data.lon, bytes(birth_data.house_system.value, "utf-8"))
+        except swe.Error as e: return {"error": f"Evler hesaplanamadı. Detay: {e}"}
+    planet_longitudes = {name: longitude for name, longitude, *_ in raw_bodies}
     asc_longitude = ascmc[0]; sun_longitude = planet_longitudes.get('Sun', 0); moon_longitude = planet_longitudes.get('Moon', 0)
     horizon_diff = (sun_longitude - asc_longitude + 360) % 360; is_day_chart = 0 <= horizon_diff < 180
     if is_day_chart: fortune_longitude = (asc_longitude + moon_longitude - sun_longitude + 360) % 360
     else: fortune_longitude = (asc_longitude + sun_longitude - moon_longitude + 360) % 360
-    raw_planets.append({"planet": "Part of Fortune", "longitude": fortune_longitude, "is_retrograde": False,
-                        "speed": 0.0, "declination": 0.0, "declination_formatted": "N/A"})
-    planets_with_details = []
-    for p in raw_planets:
-        details = get_zodiac_sign_details(p['longitude'])
-        house = _find_planet_in_house(p['longitude'], list(house_cusps_raw))
-        planets_with_details.append({**p, **details, "house": house})
-    planet_to_planet_aspects = calculate_aspects(planets_with_details)
-    aspect_patterns = recognize_aspect_patterns(planets_with_details, planet_to_planet_aspects)
-    all_points_for_aspects = planets_with_details + [{"planet": "Ascendant", "longitude": ascmc[0], "speed": None},{"planet": "Midheaven", "longitude": ascmc[1], "speed": None}]
-    longitude_aspects = calculate_aspects(all_points_for_aspects)
-    declination_aspects = calculate_declination_aspects(planets_with_details)
-    all_aspects = longitude_aspects + declination_aspects
-    house_rulers = _find_house_rulers(list(house_cusps_raw), planets_with_details, birth_data.rulership_system.value)
-    balance_data = _calculate_balance(planets_with_details)
-    return {
-        "planets": planets_with_details, "house_cusps": list(house_cusps_raw), "ascmc": list(ascmc),
-        "aspects": all_aspects, "aspect_patterns": aspect_patterns, "house_rulers": house_rulers,
-        "balance": balance_data
-    }
\ No newline at end of file
+    raw_bodies.append((PART_OF_FORTUNE, fortune_longitude, False, 0.0, 0.0))
+    house_cusps = list(house_cusps)
+    bodies = [ChartBody(name, longitude, is_retrograde, speed, declination, _find_planet_in_house(longitude, house_cusps))
+              for name, longitude, is_retrograde, speed, declination in raw_bodies]
+    with metrics.stage("aspects"): aspects, planet_to_planet_aspects = _natal_aspects(bodies, ascmc)
+    with metrics.stage("aspect_patterns"): aspect_patterns = recognize_aspect_patterns(bodies, planet_to_planet_aspects)
+    return NatalChart(bodies, house_cusps, ascmc, aspects, aspect_patterns, birth_data.rulership_system.value)
+
+def calculate_natal_data(birth_data: BirthData, timezone_str: Optional[str] = None) -> Dict[str, Any]:
+    """`calculate_natal_chart` sonucunu API'nin sözlük yapısında döndürür."""
+    chart = calculate_natal_chart(birth_data, timezone_str)
+    return chart if isinstance(chart, dict) else chart.to_dict()
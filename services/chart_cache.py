@@ -0,0 +1,190 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+
+from core.config import (
+    NATAL_CACHE_EXPIRE_SECONDS, CHART_CACHE_L1_SIZE, CHART_CACHE_COORD_PRECISION,
+    CHART_CACHE_BREAKER_FAILURES, CHART_CACHE_BREAKER_RESET_SECONDS
+)
+from models.pydantic_models import BirthData
+from services.astrology_engine import birth_moment_utc, NATAL_ENGINE_VERSION
+from services.chart_model import NatalChart
+from services.ephemeris_table import ephemeris_table
+from services.timezone_resolver import timezone_resolver
+
+
+def chart_fingerprint(birth_data: BirthData, timezone_str: Optional[str] = None) -> Optional[str]:
+    """
+    Doğum verisinin normalleştirilmiş özetini üretir: yuvarlanmış koordinatlar, doğumun UTC anı,
+    ev ve yöneticilik sistemi, motor sürümü. Anlamca aynı istekler (41.0 / 41.00001, alan sırası,
+    aynı anı gösteren farklı yerel saatler) aynı anahtarı alır. Zaman dilimi bulunamazsa None döner.
+    """
+    if timezone_str is None: timezone_str = timezone_resolver.timezone_at(birth_data.lat, birth_data.lon)
+    if not timezone_str: return None
+    fields = {"lat": round(birth_data.lat, CHART_CACHE_COORD_PRECISION), "lon": round(birth_data.lon, CHART_CACHE_COORD_PRECISION),
+              "utc": birth_moment_utc(birth_data, timezone_str).isoformat(), "house_system": birth_data.house_system.value,
+              "rulership_system": birth_data.rulership_system.value, "engine": NATAL_ENGINE_VERSION,
+              "ephemeris": "table" if ephemeris_table.enabled else "swisseph"}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class CircuitBreaker:
+    """
+    Art arda `failures` Redis hatasından sonra devreyi açar; `reset_seconds` boyunca Redis'e hiç gidilmez.
+    Süre dolunca tek bir deneme isteğine izin verilir (yarı açık): başarılıysa devre kapanır, değilse yeniden açılır.
+    """
+
+    def __init__(self, failures: int = CHART_CACHE_BREAKER_FAILURES, reset_seconds: float = CHART_CACHE_BREAKER_RESET_SECONDS):
+        self.max_failures = max(1, failures)
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None: return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed": return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0; self._opened_at = None; self._probing = False
+
+    def record_failure(self):
+        self._failures += 1; self._probing = False
+        if self._opened_at is not None or self._failures >= self.max_failures: self.trip()
+
+    def trip(self):
+        if self.state != "open": self.opened += 1
+        self._opened_at = time.monotonic()
+
+
+class ChartCache:
+    """
+    Hesaplanmış doğum haritalarını (`NatalChart`) `chart_fingerprint` anahtarıyla saklar.
+    Birinci katman, kayıt sayısı sınırlı bir hafıza içi LRU'dur; ikinci katman tüm worker'ların
+    paylaştığı Redis'tir; Redis'te haritanın `to_compact` biçimi saklanır. Redis hata verirse devre
+    kesici Redis'i geçici olarak devre dışı bırakır ve önbellek yalnızca L1 ile çalışmaya devam eder;
+    süre dolunca bağlantı yeniden denenir.
+    L1'deki nesneler istekler arasında paylaşılır, çağıranlar değiştirmemelidir.
+    """
+
+    def __init__(self, max_entries: int = CHART_CACHE_L1_SIZE, redis_ttl: int = NATAL_CACHE_EXPIRE_SECONDS):
+        self.max_entries = max_entries
+        self.redis_ttl = redis_ttl
+        self._items: "OrderedDict[str, NatalChart]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self.breaker = CircuitBreaker()
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self.redis_skipped = 0
+
+    def attach_redis(self, redis, reachable: bool = True):
+        """`decode_responses=True` ile açılmış istemci beklenir. Başlangıçta ulaşılamadıysa devre açık başlar ve daha sonra yeniden denenir."""
+        self._redis = redis
+        if not reachable: self.breaker.trip()
+
+    def _redis_key(self, key: str) -> str:
+        return f"chart_cache:{key}"
+
+    def _remember(self, key: str, chart: NatalChart):
+        if self.max_entries <= 0: return
+        with self._lock:
+            self._items[key] = chart; self._items.move_to_end(key)
+            while len(self._items) > self.max_entries: self._items.popitem(last=False)
+
+    def _redis_available(self) -> bool:
+        if self._redis is None: return False
+        if self.breaker.allow(): return True
+        self.redis_skipped += 1
+        return False
+
+    async def get(self, key: str) -> Optional[NatalChart]:
+        with self._lock:
+            chart = self._items.get(key)
+            if chart is not None:
+                self._items.move_to_end(key); self.l1_hits += 1
+                return chart
+            self.l1_misses += 1
+        if not self._redis_available(): return None
+        try:
+            cached = await self._redis.get(self._redis_key(key))
+        except Exception as e:
+            self.redis_errors += 1; self.breaker.record_failure()
+            print(f"UYARI: Harita önbelleği Redis'ten okunamadı. Detay: {e}")
+            return None
+        self.breaker.record_success()
+        if cached is None:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        chart = NatalChart.from_compact(orjson.loads(cached)); self._remember(key, chart)
+        return chart
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[NatalChart]]:
+        """
+        Birden fazla haritayı okur; L1'de olmayanlar Redis'ten tek bir MGET ile alınır. Toplu okumalar L1'deki
+        sık kullanılan haritaları dışarı itmesin diye Redis'ten gelen haritalar L1'e yazılmaz.
+        """
+        charts: List[Optional[NatalChart]] = [None] * len(keys); missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                chart = self._items.get(key)
+                if chart is None: missing.append(i); continue
+                self._items.move_to_end(key); charts[i] = chart
+            self.l1_hits += len(keys) - len(missing); self.l1_misses += len(missing)
+        if not missing or not self._redis_available(): return charts
+        try:
+            cached = await self._redis.mget([self._redis_key(keys[i]) for i in missing])
+        except Exception as e:
+            self.redis_errors += 1; self.breaker.record_failure()
+            print(f"UYARI: Harita önbelleği Redis'ten okunamadı. Detay: {e}")
+            return charts
+        self.breaker.record_success()
+        for i, value in zip(missing, cached):
+            if value is None: self.redis_misses += 1; continue
+            self.redis_hits += 1; charts[i] = NatalChart.from_compact(orjson.loads(value))
+        return charts
+
+    async def set(self, key: str, chart: NatalChart):
+        self._remember(key, chart)
+        if not self._redis_available(): return
+        try:
+            await self._redis.set(self._redis_key(key), orjson.dumps(chart.to_compact()), ex=self.redis_ttl)
+        except Exception as e:
+            self.redis_errors += 1; self.breaker.record_failure()
+            print(f"UYARI: Harita önbelleği Redis'e yazılamadı. Detay: {e}")
+            return
+        self.breaker.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.l1_hits + self.l1_misses
+        redis_lookups = self.redis_hits + self.redis_misses
+        return {"l1": {"hits": self.l1_hits, "misses": self.l1_misses, "hit_ratio": round(self.l1_hits / lookups, 4) if lookups else 0.0,
+                       "entries": len(self._items), "max_entries": self.max_entries},
+                "redis": {"enabled": self._redis is not None, "hits": self.redis_hits, "misses": self.redis_misses,
+                          "hit_ratio": round(self.redis_hits / redis_lookups, 4) if redis_lookups else 0.0,
+                          "errors": self.redis_errors, "skipped": self.redis_skipped,
+                          "breaker_state": self.breaker.state, "breaker_opened": self.breaker.opened},
+                "overall_hit_ratio": round((self.l1_hits + self.redis_hits) / lookups, 4) if lookups else 0.0}
+
+
+# Worker başına tek bir harita önbelleği
+chart_cache = ChartCache()
@@ -1,11 +1,15 @@
 import io
-from typing import List, Dict, Any
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 import matplotlib
 # 'AGG' backend'i, bir grafik arayüzü olmadan (sunucu ortamı için ideal)
 # dosyaya çizim yapmamızı sağlar.
 matplotlib.use('AGG')
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.collections import LineCollection
 from matplotlib.patches import Wedge
 
 # Gerekli tüm sabitler ve yardımcı fonksiyonlar merkezi yerlerden import ediliyor.
@@ -14,19 +18,151 @@ from core.config import (
     SIGN_TO_ELEMENT, ZODIAC_GLYPHS, ZODIAC_SIGNS
 )
 from services.astrology_engine import get_zodiac_sign_details
+from services.metrics import metrics
 
+# DEĞİŞİKLİK: Sürüm, figür boyutu ve önbellek girdileri matplotlib'siz `render_spec` modülündedir (API süreci
+# bu modülü yüklemeden görsel anahtarı üretebilsin diye); mevcut içe aktarmalar için buradan da sunulur.
+from services.render_spec import (
+    RENDERER_VERSION, FIGURE_SIZE_INCHES, DEFAULT_DPI, png_dpi_for_width, natal_render_inputs, synastry_render_inputs
+)
+
+
+# --- YENİ: STATİK ZODYAK HALKASI VE YERLEŞİM ÖNBELLEĞİ ---
+# Burç dilimleri, derece çentikleri ve glifler hiçbir haritada değişmez. Bu katman worker başına
+# bir kez, haritanın ekranda kaplayacağı piksel boyutunda rasterize edilir ve her çizimde tek bir
+# `imshow` ile alta yerleştirilir; yalnızca haritaya özgü katmanlar (evler, gezegenler, açılar,
+# tablolar) yeniden çizilir.
+_LAYOUT_PARAMS = ("left", "right", "top", "bottom", "wspace", "hspace")
+_layout_cache: Dict[Tuple[str, float], Dict[str, float]] = {}
+
+
+def _polar(radius, degrees):
+    """Ekliptik boylamını (saat yönünün tersine, 0° solda) eksen koordinatına çevirir."""
+    rad = np.deg2rad(180 - np.asarray(degrees, dtype=float))
+    return radius * np.cos(rad), radius * np.sin(rad)
+
+
+def _radial_segments(degrees, inner, outer) -> np.ndarray:
+    """Verilen boylamlarda `inner` ile `outer` yarıçapları arasındaki doğru parçalarını (N, 2, 2) döndürür."""
+    x1, y1 = _polar(inner, degrees); x2, y2 = _polar(outer, degrees)
+    return np.stack([np.stack([x1, y1], axis=-1), np.stack([x2, y2], axis=-1)], axis=1)
+
+
+def _draw_zodiac_wedges(ax):
+    for i in range(12):
+        start_angle, end_angle = 180 - (i * 30 + 30), 180 - (i * 30)
+        color = ELEMENT_COLORS[SIGN_TO_ELEMENT[ZODIAC_SIGNS[i]]] # Burcun elementine göre renk seçilir.
+        ax.add_artist(Wedge((0,0), 1.0, start_angle, end_angle, facecolor=color, edgecolor='darkgray', lw=0.5, zorder=0))
+
+
+def _draw_zodiac_glyphs(ax):
+    # Her burcun ortasına kendi glifi (sembolü) yerleştirilir.
+    for i in range(12):
+        x, y = _polar(0.9, i * 30 + 15)
+        ax.text(x, y, ZODIAC_GLYPHS[i], ha='center', va='center', fontsize=18, zorder=1)
+
+
+def _rasterize_ring(side_px: int, dpi: float, limit: float, draw) -> np.ndarray:
+    fig = plt.figure(figsize=(side_px / dpi, side_px / dpi), dpi=dpi)
+    fig.patch.set_alpha(0)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_xlim(-limit, limit); ax.set_ylim(-limit, limit); ax.axis('off')
+    draw(ax)
+    fig.canvas.draw()
+    ring = np.asarray(fig.canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return ring
+
+
+def _draw_natal_ring(ax):
+    # 360 derecelik çember üzerine derece çentikleri tek bir LineCollection ile çizilir.
+    degrees = np.arange(360)
+    lengths = np.where(degrees % 10 == 0, 0.09, np.where(degrees % 5 == 0, 0.06, 0.03))
+    x1, y1 = _polar(1.0, degrees); x2, y2 = _polar(1.0 + lengths, degrees)
+    ticks = np.stack([np.stack([x1, y1], axis=-1), np.stack([x2, y2], axis=-1)], axis=1)
+    ax.add_collection(LineCollection(ticks, colors='gray', linewidths=np.where(degrees % 5 == 0, 1.0, 0.5), zorder=1))
+    for i in range(0, 360, 10): # Her 10 derecede bir derece sayısı yazılır.
+        x, y = _polar(1.18, i)
+        ax.text(x, y, str(i % 30), ha='center', va='center', fontsize=7, color='black', rotation = -i + 90)
+    _draw_zodiac_wedges(ax)
+    _draw_zodiac_glyphs(ax)
+
+
+def _draw_biwheel_ring(ax):
+    _draw_zodiac_wedges(ax)
+    # Burç çizgileri
+    ax.add_collection(LineCollection(_radial_segments(np.arange(0, 360, 30), 0.8, 1.0), colors='#FFFFFF', linewidths=1.5, zorder=1))
+    _draw_zodiac_glyphs(ax)
+
+
+@lru_cache(maxsize=8)
+def _natal_static_ring(side_px: int, dpi: float) -> np.ndarray:
+    return _rasterize_ring(side_px, dpi, 1.5, _draw_natal_ring)
+
+
+@lru_cache(maxsize=8)
+def _biwheel_static_ring(side_px: int, dpi: float) -> np.ndarray:
+    return _rasterize_ring(side_px, dpi, 1.1, _draw_biwheel_ring)
 
-def draw_final_professional_chart(natal_data: Dict[str, Any]) -> bytes:
+
+def _apply_cached_layout(fig, kind: str, dpi: float, **tight_layout_kwargs):
+    """
+    `tight_layout` tüm metinleri ölçtüğü için pahalıdır; panellerin yapısı her haritada aynı
+    olduğundan sonuç (kenar boşlukları) ilk çizimden sonra worker başına saklanır.
+    """
+    params = _layout_cache.get((kind, dpi))
+    if params is None:
+        fig.tight_layout(**tight_layout_kwargs)
+        params = _layout_cache.setdefault((kind, dpi), {name: getattr(fig.subplotpars, name) for name in _LAYOUT_PARAMS})
+    else: fig.subplots_adjust(**params)
+
+
+class _StaticRaster(Artist):
+    """Önceden hazırlanmış bir RGBA rasterını, yeniden örneklemeden verilen piksel konumuna basar."""
+
+    def __init__(self, rgba: np.ndarray, x0: int, y0: int):
+        super().__init__()
+        self.rgba, self.x0, self.y0 = rgba, x0, y0
+
+    def draw(self, renderer):
+        if not self.get_visible(): return
+        gc = renderer.new_gc()
+        renderer.draw_image(gc, self.x0, self.y0, self.rgba[::-1])
+        gc.restore()
+
+
+def _composite_static_ring(fig, ax, dpi: float, ring_factory):
+    """
+    Yerleşim kesinleştikten sonra halka rasterını eksenin tam piksel konumuna, eksenlerin altına
+    yerleştirir. Raster piksel piksel basıldığı için figür, kaydedileceği `dpi` ile oluşturulmalıdır.
+    """
+    ax.apply_aspect()
+    bbox = ax.get_window_extent()
+    fig.add_artist(_StaticRaster(ring_factory(int(round(bbox.width)), dpi), int(round(bbox.x0)), int(round(bbox.y0)))).set_zorder(-1)
+
+
+def _encode_png(fig, dpi: float, started: float) -> bytes:
+    """Figürü PNG'ye çevirir; figürün kurulma süresi `chart_draw`, kaydetme (rasterize + sıkıştırma) `png_encode` olarak ölçülür."""
+    metrics.observe_stage("chart_draw", time.perf_counter() - started)
+    with metrics.stage("png_encode"):
+        buf = io.BytesIO() # Görseli diske değil, hafızadaki bir tampona (buffer) kaydet
+        fig.savefig(buf, format='png', dpi=dpi, facecolor='white')
+    plt.close(fig) # Hafızada yer kaplamaması için figürü kapat
+    return buf.getvalue() # Buffer'ın içeriğini byte olarak döndür
+
+
+def draw_final_professional_chart(natal_data: Dict[str, Any], dpi: float = DEFAULT_DPI) -> bytes:
     """
     Verilen natal harita verileriyle detaylı, profesyonel bir doğum haritası görseli oluşturur
     ve bu görseli PNG formatında byte olarak döndürür.
     """
     # --- 1. FIGÜR VE YERLEŞİM AYARLARI ---
+    started = time.perf_counter()
     # Genel font ayarları ve çizim alanı (figure) oluşturulması
     plt.rcParams['font.family'] = 'sans-serif'
     # 'Segoe UI Symbol' fontu, astrolojik glifleri (sembolleri) düzgün göstermek için önemlidir.
     plt.rcParams['font.sans-serif'] = ['Segoe UI Symbol', 'Arial']
-    fig = plt.figure(figsize=(17, 10), facecolor='white')
+    fig = plt.figure(figsize=FIGURE_SIZE_INCHES, dpi=dpi, facecolor='white')
     # `gridspec` ile çizim alanını ızgaralara bölerek farklı panelleri (harita, tablolar) yerleştiriyoruz.
     gs = fig.add_gridspec(10, 4)
     # Ana harita çemberi, ızgaranın sol yarısını kaplayacak.
@@ -37,38 +173,16 @@ def draw_final_professional_chart(natal_data: Dict[str, Any]) -> bytes:
     ax_chart.axis('off') # Eksenleri (x,y) gizler.
 
     # --- 2. ZODYAK ÇEMBERİ VE DERECELER ---
-    # 360 derecelik çember üzerine derece çentikleri çizilir.
-    for i in range(360):
-        rad = np.deg2rad(180 - i) # Matplotlib radyan cinsinden ve saat yönünün tersine çalışır.
-        linewidth = 0.5 if i % 5 != 0 else 1.0
-        length = 0.03 if i % 5 != 0 else 0.06
-        if i % 10 == 0: length = 0.09 # Her 10 derecede bir daha belirgin çentik.
-        ax_chart.plot([1.0 * np.cos(rad), (1.0+length) * np.cos(rad)], [1.0 * np.sin(rad), (1.0+length) * np.sin(rad)], color='gray', lw=linewidth, zorder=1)
-        if i % 10 == 0: # Her 10 derecede bir derece sayısı yazılır.
-            ax_chart.text(1.18 * np.cos(rad), 1.18 * np.sin(rad), str(i % 30), ha='center', va='center', fontsize=7, color='black', rotation = -i + 90)
-
-    # 12 Zodyak burcu için renkli dilimler (wedge) çizilir.
-    for i in range(12):
-        start_angle, end_angle = 180 - (i * 30 + 30), 180 - (i * 30)
-        sign_name = ZODIAC_SIGNS[i]
-        element = SIGN_TO_ELEMENT[sign_name]
-        color = ELEMENT_COLORS[element] # Burcun elementine göre renk seçilir.
-        wedge = Wedge((0,0), 1.0, start_angle, end_angle, facecolor=color, edgecolor='darkgray', lw=0.5, zorder=0)
-        ax_chart.add_artist(wedge)
-        # Her burcun ortasına kendi glifi (sembolü) yerleştirilir.
-        glyph_angle = i * 30 + 15
-        glyph_rad = np.deg2rad(180 - glyph_angle)
-        ax_chart.text(0.9 * np.cos(glyph_rad), 0.9 * np.sin(glyph_rad), ZODIAC_GLYPHS[i], ha='center', va='center', fontsize=18, zorder=1)
+    # Statik halka (dilimler, derece çentikleri, glifler) yerleşim kesinleştikten sonra önbellekteki
+    # rasterdan eklenir; bkz. `_composite_static_ring`.
 
     # --- 3. EV (HOUSE) ÇİZGİLERİ ---
     house_circle = plt.Circle((0, 0), 0.8, color='black', fill=False, lw=0.5, zorder=2)
     ax_chart.add_artist(house_circle)
+    is_major_cusp = np.isin(np.arange(12), [0, 3, 6, 9]) # ASC, IC, DSC, MC
+    ax_chart.add_collection(LineCollection(_radial_segments(natal_data['house_cusps'][:12], 0, 0.8), colors=np.where(is_major_cusp, 'black', 'darkgray'),
+                                           linewidths=np.where(is_major_cusp, 1.0, 0.4), zorder=3))
     for i, cusp_deg in enumerate(natal_data['house_cusps'][:12]):
-        rad = np.deg2rad(180 - cusp_deg)
-        is_major_cusp = (i == 0 or i == 3 or i == 6 or i == 9) # ASC, IC, DSC, MC
-        color = 'black' if is_major_cusp else 'darkgray'
-        linewidth = 1.0 if is_major_cusp else 0.4
-        ax_chart.plot([0, 0.8 * np.cos(rad)], [0, 0.8 * np.sin(rad)], color=color, linestyle='-', lw=linewidth, zorder=3)
         # Her evin ortasına ev numarası yazılır.
         house_mid_angle_deg = cusp_deg + ( (natal_data['house_cusps'][i+1 if i<11 else 0] - cusp_deg + 360) % 360 ) / 2
         num_rad = np.deg2rad(180 - house_mid_angle_deg)
@@ -81,14 +195,16 @@ def draw_final_professional_chart(natal_data: Dict[str, Any]) -> bytes:
     aspects = natal_data.get('aspects', [])
     planet_coords = {p['planet']: (np.cos(np.deg2rad(180 - p['longitude'])), np.sin(np.deg2rad(180 - p['longitude']))) for p in natal_data['planets']}
     aspect_circle_radius = 0.6
+    aspect_segments, aspect_colors, aspect_styles = [], [], []
     for aspect in aspects:
         p1_name, p2_name = aspect['planet1'], aspect['planet2']
         if p1_name not in planet_coords or p2_name not in planet_coords: continue
-        color = ASPECT_COLORS.get(aspect['aspect'], 'gray')
-        linestyle = '-' if aspect.get('type') in ['Major', 'Creative'] else '--' # Minör açılar kesikli çizgi
-        x1, y1 = (coord * aspect_circle_radius for coord in planet_coords[p1_name])
-        x2, y2 = (coord * aspect_circle_radius for coord in planet_coords[p2_name])
-        ax_chart.plot([x1, x2], [y1, y2], color=color, lw=0.8, alpha=0.9, zorder=5, linestyle=linestyle)
+        aspect_colors.append(ASPECT_COLORS.get(aspect['aspect'], 'gray'))
+        aspect_styles.append('-' if aspect.get('type') in ['Major', 'Creative'] else '--') # Minör açılar kesikli çizgi
+        aspect_segments.append([tuple(coord * aspect_circle_radius for coord in planet_coords[p1_name]),
+                                tuple(coord * aspect_circle_radius for coord in planet_coords[p2_name])])
+    if aspect_segments:
+        ax_chart.add_collection(LineCollection(aspect_segments, colors=aspect_colors, linestyles=aspect_styles, linewidths=0.8, alpha=0.9, zorder=5))
 
     # Gezegen glifleri (sembolleri) haritaya yerleştirilir.
     for planet in natal_data['planets']:
@@ -169,23 +285,21 @@ def draw_final_professional_chart(natal_data: Dict[str, Any]) -> bytes:
     ax_grid.set_aspect('equal')
 
     # --- 6. GÖRSELİ KAYDETME VE DÖNDÜRME ---
-    fig.tight_layout(pad=1.0, h_pad=0.5, w_pad=3.0)
-    buf = io.BytesIO() # Görseli diske değil, hafızadaki bir tampona (buffer) kaydet
-    plt.savefig(buf, format='png', dpi=200, facecolor='white')
-    plt.close(fig) # Hafızada yer kaplamaması için figürü kapat
-    buf.seek(0) # Buffer'ın okuma imlecini başa al
-    return buf.getvalue() # Buffer'ın içeriğini byte olarak döndür
+    _apply_cached_layout(fig, "natal-wheel", dpi, pad=1.0, h_pad=0.5, w_pad=3.0)
+    _composite_static_ring(fig, ax_chart, dpi, _natal_static_ring)
+    return _encode_png(fig, dpi, started)
 
 
-def draw_synastry_biwheel_chart(p1_data: Dict[str, Any], p2_data: Dict[str, Any], synastry_aspects: List[Dict[str, Any]]) -> bytes:
+def draw_synastry_biwheel_chart(p1_data: Dict[str, Any], p2_data: Dict[str, Any], synastry_aspects: List[Dict[str, Any]], dpi: float = DEFAULT_DPI) -> bytes:
     """
     İki doğum haritasını iç içe (bi-wheel) çizen ve aralarındaki sinastri açılarını
     gösteren profesyonel bir harita üretir.
     """
     # --- 1. FIGÜR VE YERLEŞİM AYARLARI ---
+    started = time.perf_counter()
     plt.rcParams['font.family'] = 'sans-serif'
     plt.rcParams['font.sans-serif'] = ['Segoe UI Symbol', 'Arial']
-    fig = plt.figure(figsize=(17, 10), facecolor='white')
+    fig = plt.figure(figsize=FIGURE_SIZE_INCHES, dpi=dpi, facecolor='white')
     gs = fig.add_gridspec(10, 4)
     ax_chart = fig.add_subplot(gs[:, 0:2])
     ax_chart.set_xlim(-1.1, 1.1)
@@ -194,31 +308,14 @@ def draw_synastry_biwheel_chart(p1_data: Dict[str, Any], p2_data: Dict[str, Any]
     ax_chart.axis('off')
 
     # --- 2. DIŞ ÇEMBER (KİŞİ 2) - ZODYAK VE EVLER ---
-    # Zodyak halkası
-    for i in range(12):
-        start_angle, end_angle = 180 - (i * 30 + 30), 180 - (i * 30)
-        sign_name = ZODIAC_SIGNS[i]
-        element = SIGN_TO_ELEMENT[sign_name]
-        color = ELEMENT_COLORS[element]
-        wedge = Wedge((0,0), 1.0, start_angle, end_angle, facecolor=color, edgecolor='darkgray', lw=0.5, zorder=0)
-        ax_chart.add_artist(wedge)
-    # Burç çizgileri ve glifleri
-    for i in range(12):
-        angle = i * 30
-        rad = np.deg2rad(180 - angle)
-        ax_chart.plot([0.8 * np.cos(rad), 1.0 * np.cos(rad)], [0.8 * np.sin(rad), 1.0 * np.sin(rad)], color='#FFFFFF', lw=1.5, zorder=1)
-        glyph_angle = i * 30 + 15
-        glyph_rad = np.deg2rad(180 - glyph_angle)
-        ax_chart.text(0.9 * np.cos(glyph_rad), 0.9 * np.sin(glyph_rad), ZODIAC_GLYPHS[i], ha='center', va='center', fontsize=18, zorder=1)
+    # Zodyak halkası, burç çizgileri ve glifleri önbellekteki rasterdan eklenir; bkz. `_composite_static_ring`.
 
     # Kişi 2'nin ev çizgileri (dış çemberde)
+    # Ev çizgileri, gezegenlerin olduğu alandan (0.8) başlar
+    is_major_cusp = np.isin(np.arange(12), [0, 3, 6, 9])
+    ax_chart.add_collection(LineCollection(_radial_segments(p2_data['house_cusps'][:12], 0.8, 1.0), colors=np.where(is_major_cusp, 'black', 'darkgray'),
+                                           linewidths=np.where(is_major_cusp, 1.0, 0.4), zorder=3))
     for i, cusp_deg in enumerate(p2_data['house_cusps'][:12]):
-        rad = np.deg2rad(180 - cusp_deg)
-        is_major_cusp = (i in [0, 3, 6, 9])
-        color = 'black' if is_major_cusp else 'darkgray'
-        linewidth = 1.0 if is_major_cusp else 0.4
-        # Ev çizgileri, gezegenlerin olduğu alandan (0.8) başlar
-        ax_chart.plot([0.8 * np.cos(rad), 1.0 * np.cos(rad)], [0.8 * np.sin(rad), 1.0 * np.sin(rad)], color=color, linestyle='-', lw=linewidth, zorder=3)
         house_mid_angle_deg = cusp_deg + ( (p2_data['house_cusps'][i+1 if i<11 else 0] - cusp_deg + 360) % 360 ) / 2
         num_rad = np.deg2rad(180 - house_mid_angle_deg)
         ax_chart.text(0.88 * np.cos(num_rad), 0.88 * np.sin(num_rad), str(i+1), ha='center', va='center', fontsize=10, color='gray', zorder=4, bbox=dict(facecolor='white', edgecolor='none', boxstyle='circle,pad=0.2'))
@@ -244,13 +341,14 @@ def draw_synastry_biwheel_chart(p1_data: Dict[str, Any], p2_data: Dict[str, Any]
     # Her bir gezegenin koordinatlarını kendi çemberine göre hesapla
     p1_coords = {p['planet']: (0.30 * np.cos(np.deg2rad(180 - p['longitude'])), 0.30 * np.sin(np.deg2rad(180 - p['longitude']))) for p in p1_data['planets']}
     p2_coords = {p['planet']: (0.70 * np.cos(np.deg2rad(180 - p['longitude'])), 0.70 * np.sin(np.deg2rad(180 - p['longitude']))) for p in p2_data['planets']}
+    aspect_segments, aspect_colors = [], []
     for aspect in synastry_aspects:
         p1_name, p2_name = aspect['planet1'], aspect['planet2']
         if p1_name not in p1_coords or p2_name not in p2_coords: continue
-        color = ASPECT_COLORS.get(aspect['aspect'], 'gray')
-        x1, y1 = p1_coords[p1_name]
-        x2, y2 = p2_coords[p2_name]
-        ax_chart.plot([x1, x2], [y1, y2], color=color, lw=0.7, alpha=0.8, zorder=1)
+        aspect_colors.append(ASPECT_COLORS.get(aspect['aspect'], 'gray'))
+        aspect_segments.append([p1_coords[p1_name], p2_coords[p2_name]])
+    if aspect_segments:
+        ax_chart.add_collection(LineCollection(aspect_segments, colors=aspect_colors, linewidths=0.7, alpha=0.8, zorder=1))
 
     # --- 5. BİLGİ PANELLERİ ---
     # Kişi 1 (İç Çember) Bilgi Paneli
@@ -303,9 +401,6 @@ def draw_synastry_biwheel_chart(p1_data: Dict[str, Any], p2_data: Dict[str, Any]
     ax_grid.set_aspect('equal')
 
     # --- 6. GÖRSELİ KAYDETME VE DÖNDÜRME ---
-    fig.tight_layout(pad=1.0, h_pad=0.5, w_pad=2.0)
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=200, facecolor='white')
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
\ No newline at end of file
+    _apply_cached_layout(fig, "synastry-biwheel", dpi, pad=1.0, h_pad=0.5, w_pad=2.0)
+    _composite_static_ring(fig, ax_chart, dpi, _biwheel_static_ring)
+    return _encode_png(fig, dpi, started)
\ No newline at end of file
@@ -0,0 +1,129 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.config import ZODIAC_SIGNS, ZODIAC_GLYPHS, SIGN_TO_ELEMENT, SIGN_TO_MODALITY, SIGN_RULERS
+
+# Motorun iç harita gösterimi. Gökcisimleri, açılar ve ev başlangıçları `__slots__` sınıflarında
+# tutulur; burç, element, nitelik, ev yöneticileri ve denge gibi türetilebilen alanlar saklanmaz.
+# API'nin döndürdüğü sözlük yapısı yalnızca `NatalChart.to_dict` ile, yanıtın hemen öncesinde üretilir.
+# Önbellekte (L1) bu nesneler, Redis'te ise `to_compact` ile üretilen konumsal liste saklanır.
+
+PART_OF_FORTUNE = "Part of Fortune"
+BALANCE_PLANETS = ('Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto')
+
+
+def format_declination(dec: float) -> str:
+    direction = "N" if dec >= 0 else "S"; dec = abs(dec); degrees = int(dec); minutes = int((dec - degrees) * 60)
+    return f"{degrees:02d}° {direction} {minutes:02d}'"
+
+
+def get_zodiac_sign_details(degree: float) -> Dict[str, Any]:
+    sign_index = int(degree / 30); degree_in_sign = degree % 30; sign_name = ZODIAC_SIGNS[sign_index]
+    return {"sign": sign_name, "sign_glyph": ZODIAC_GLYPHS[sign_index], "degree": int(degree_in_sign),
+            "minute": int((degree_in_sign - int(degree_in_sign)) * 60), "element": SIGN_TO_ELEMENT.get(sign_name),
+            "modality": SIGN_TO_MODALITY.get(sign_name)}
+
+
+class ChartBody:
+    """Haritadaki tek bir gökcismi veya hesaplanmış nokta (ör. Part of Fortune)."""
+    __slots__ = ("planet", "longitude", "is_retrograde", "speed", "declination", "house")
+
+    def __init__(self, planet: str, longitude: float, is_retrograde: bool, speed: float, declination: float, house: int):
+        self.planet = planet; self.longitude = longitude; self.is_retrograde = is_retrograde
+        self.speed = speed; self.declination = declination; self.house = house
+
+    @property
+    def sign(self) -> str:
+        return ZODIAC_SIGNS[int(self.longitude / 30)]
+
+    @property
+    def element(self) -> Optional[str]:
+        return SIGN_TO_ELEMENT.get(self.sign)
+
+    @property
+    def modality(self) -> Optional[str]:
+        return SIGN_TO_MODALITY.get(self.sign)
+
+    @property
+    def declination_formatted(self) -> str:
+        # Part of Fortune hesaplanmış bir noktadır, gerçek bir deklinasyonu yoktur.
+        return "N/A" if self.planet == PART_OF_FORTUNE else format_declination(self.declination)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"planet": self.planet, "longitude": self.longitude, "is_retrograde": self.is_retrograde, "speed": self.speed,
+                "declination": self.declination, "declination_formatted": self.declination_formatted,
+                **get_zodiac_sign_details(self.longitude), "house": self.house}
+
+    def to_compact(self) -> list:
+        return [self.planet, self.longitude, self.is_retrograde, self.speed, self.declination, self.house]
+
+
+class ChartAspect:
+    """İki nokta arasındaki tek bir boylam veya deklinasyon açısı."""
+    __slots__ = ("planet1", "aspect", "planet2", "orb", "type", "nature")
+
+    def __init__(self, planet1: str, aspect: str, planet2: str, orb: float, type: Optional[str], nature: str):
+        self.planet1 = planet1; self.aspect = aspect; self.planet2 = planet2
+        self.orb = orb; self.type = type; self.nature = nature
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"planet1": self.planet1, "aspect": self.aspect, "planet2": self.planet2,
+                "orb": self.orb, "type": self.type, "nature": self.nature}
+
+    def to_compact(self) -> list:
+        return [self.planet1, self.aspect, self.planet2, self.orb, self.type, self.nature]
+
+
+class NatalChart:
+    """
+    Hesaplanmış doğum haritası. `house_cusps` 12, `ascmc` 8 elemanlıdır (Swiss Ephemeris sırası).
+    Nesneler önbellekte istekler arasında paylaşılır; oluşturulduktan sonra değiştirilmemelidir.
+    """
+    __slots__ = ("bodies", "house_cusps", "ascmc", "aspects", "aspect_patterns", "rulership_system")
+
+    def __init__(self, bodies: List[ChartBody], house_cusps: Sequence[float], ascmc: Sequence[float],
+                 aspects: List[ChartAspect], aspect_patterns: List[Dict[str, Any]], rulership_system: str):
+        self.bodies = bodies; self.house_cusps = tuple(house_cusps); self.ascmc = tuple(ascmc)
+        self.aspects = aspects; self.aspect_patterns = aspect_patterns; self.rulership_system = rulership_system
+
+    def house_rulers(self) -> List[Dict[str, Any]]:
+        rulerships = []
+        bodies_map = {body.planet: body for body in self.bodies}
+        for i in range(12):
+            cusp_sign = ZODIAC_SIGNS[int(self.house_cusps[i] / 30)]
+            ruler_info = SIGN_RULERS.get(cusp_sign)
+            if not ruler_info: continue
+            ruler_planet_name = ruler_info['traditional']
+            if self.rulership_system == 'modern' and ruler_info['modern'] is not None: ruler_planet_name = ruler_info['modern']
+            ruler_body = bodies_map.get(ruler_planet_name)
+            if ruler_body:
+                rulerships.append({"house": i + 1, "sign": cusp_sign, "ruler_planet": ruler_planet_name,
+                                   "ruler_in_house": ruler_body.house, "rulership_system_used": self.rulership_system})
+        return rulerships
+
+    def balance(self) -> Dict[str, Any]:
+        elements = {'Fire': 0, 'Earth': 0, 'Air': 0, 'Water': 0}
+        modalities = {'Cardinal': 0, 'Fixed': 0, 'Mutable': 0}
+        for body in self.bodies:
+            if body.planet in BALANCE_PLANETS:
+                element, modality = body.element, body.modality
+                if element: elements[element] += 1
+                if modality: modalities[modality] += 1
+        return {"elements": elements, "modalities": modalities}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """API'nin kullandığı (eski `calculate_natal_data` çıktısıyla birebir aynı) sözlük yapısı."""
+        return {
+            "planets": [body.to_dict() for body in self.bodies], "house_cusps": list(self.house_cusps), "ascmc": list(self.ascmc),
+            "aspects": [aspect.to_dict() for aspect in self.aspects], "aspect_patterns": self.aspect_patterns,
+            "house_rulers": self.house_rulers(), "balance": self.balance()
+        }
+
+    def to_compact(self) -> list:
+        return [[body.to_compact() for body in self.bodies], list(self.house_cusps), list(self.ascmc),
+                [aspect.to_compact() for aspect in self.aspects], self.aspect_patterns, self.rulership_system]
+
+    @classmethod
+    def from_compact(cls, data: Tuple) -> "NatalChart":
+        bodies, house_cusps, ascmc, aspects, aspect_patterns, rulership_system = data
+        return cls([ChartBody(*row) for row in bodies], house_cusps, ascmc, [ChartAspect(*row) for row in aspects],
+                   aspect_patterns, rulership_system)
@@ -0,0 +1,56 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+import swisseph as swe
+
+from core.config import EPHE_PATH, COMPUTE_EXECUTOR_WORKERS
+
+T = TypeVar("T")
+
+# Swiss Ephemeris, efemeris yolu ve dosya tamponları gibi global durum tutar ve C kütüphanesi yeniden
+# girişli (re-entrant) değildir. Bu süreçteki tüm `swe.*` çağrıları bu kilit altında yapılmalıdır.
+swe_lock = threading.RLock()
+# pyswisseph bu durumu thread'e özel (TLS) tutar: efemeris yolu her thread'de ayrıca ayarlanmalıdır.
+# Ayarlanmamış bir thread'de gezegenler sessizce Moshier'e düşer, asteroitler ise hata verir.
+_thread_state = threading.local()
+
+
+def ensure_ephe_path():
+    """Efemeris yolunu thread başına bir kez ayarlar (her hesaplamada `swe.set_ephe_path` çağrılmaz)."""
+    if getattr(_thread_state, "ephe_path_ready", False): return
+    with swe_lock:
+        swe.set_ephe_path(str(EPHE_PATH)); _thread_state.ephe_path_ready = True
+
+
+class ComputeExecutor:
+    """
+    Efemeris hesaplamaları için ayrılmış thread havuzu. Starlette'in ortak thread havuzundan
+    bağımsızdır; böylece hesaplamalar diğer senkron işlerle (ve birbirleriyle) aynı kuyrukta
+    yarışmaz. Varsayılan tek thread, GIL altında bir worker'ın bir çekirdeği kilit çekişmesi
+    olmadan doldurmasını sağlar.
+    """
+
+    def __init__(self, workers: int = COMPUTE_EXECUTOR_WORKERS):
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ephemeris", initializer=ensure_ephe_path)
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # Bağlam kopyalanır; böylece havuzda ölçülen aşamalar isteğin `Server-Timing` kaydına da yazılır.
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self):
+        if self._executor is not None: self._executor.shutdown(wait=False, cancel_futures=True); self._executor = None
+
+
+# Worker başına tek bir hesaplama havuzu
+compute_executor = ComputeExecutor()
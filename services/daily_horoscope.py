@@ -0,0 +1,74 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence
+
+from core.config import PLANET_ASSOCIATIONS
+from services.interpretation_store import interpretation_store
+from services.transit_lookup import transit_lookup_table
+
+# Günlük yorumun API ve toplu iş (`python -m jobs.daily`) tarafından ortak kullanılan parçaları.
+NO_TRANSITS_MESSAGE = "Bugün için özel bir gezegen etkileşimi bulunmuyor. Sakin bir gün geçirebilirsiniz."
+
+
+def calculate_active_transits(natal_planets: Sequence[Dict[str, Any]], sky: Dict[str, Any]) -> List[Dict]:
+    """
+    Doğum haritası gezegenleri ile gökyüzü görüntüsündeki transit gezegenler arasındaki açılar.
+    DEĞİŞİKLİK: Her kişi için transit x natal x açı döngüsü yerine görüntünün paylaşılan derece tablosuna bakılır.
+    """
+    return transit_lookup_table(sky).active_transits(natal_planets)
+
+
+def generate_daily_horoscope(active_transits: List[Dict]) -> Dict[str, Any]:
+    horoscope_by_category = defaultdict(list)
+    for transit in active_transits:
+        transit_planet_name_full = transit.get('transit_planet', '')
+        if not transit_planet_name_full: continue
+        
+        parts = transit_planet_name_full.split(" ")
+        if len(parts) < 2: continue
+        
+        transit_planet_name = parts[1]
+        natal_planet_name = transit['natal_planet']
+        aspect = transit['aspect']
+        
+        aspect_interpretations = interpretation_store.lookup("daily_transits.json", transit_planet_name, natal_planet_name, aspect)
+        
+        if aspect_interpretations:
+            for category, text in aspect_interpretations.items():
+                if isinstance(text, (list, tuple)):
+                    horoscope_by_category[category].extend(text)
+                else:
+                    horoscope_by_category[category].append(text)
+
+    lucky_aspect = None; min_orb = 100
+    for transit in active_transits:
+        transit_planet_name_full = transit.get('transit_planet', '')
+        if not transit_planet_name_full: continue
+        parts = transit_planet_name_full.split(" ")
+        if len(parts) < 2: continue
+        transit_planet = parts[1]
+        aspect = transit['aspect']
+        if transit_planet in ["Jupiter", "Venus"] and aspect in ["Conjunction", "Trine", "Sextile"]:
+            if transit['orb'] < min_orb:
+                min_orb = transit['orb']
+                lucky_aspect = transit
+    if lucky_aspect:
+        lucky_planet_name = lucky_aspect['transit_planet'].split(" ")[1]
+        planet_luck_info = PLANET_ASSOCIATIONS.get(lucky_planet_name)
+        if planet_luck_info:
+            horoscope_by_category['luck'].append(f"Şanslı Renginiz: {planet_luck_info['color']}")
+            horoscope_by_category['luck'].append(f"Şanslı Sayınız: {planet_luck_info['number']}")
+
+    final_horoscope = {}
+    for category, texts in horoscope_by_category.items():
+        if category == 'luck':
+            final_horoscope[category] = sorted(list(set(texts)))
+        else:
+            final_horoscope[category] = " ".join(texts)
+    return final_horoscope
+
+
+def daily_horoscope_payload(active_transits: List[Dict], transit_time_utc: str) -> Dict[str, Any]:
+    """`/daily-horoscope` yanıtının `birth_data` dışındaki alanları; önceden üretilen yorumlar da bu biçimde saklanır."""
+    if not active_transits:
+        return {"transit_time_utc": transit_time_utc, "horoscope": {"personal": NO_TRANSITS_MESSAGE}}
+    return {"transit_time_utc": transit_time_utc, "horoscope": generate_daily_horoscope(active_transits), "contributing_transits": active_transits}
@@ -0,0 +1,227 @@
+import argparse
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import swisseph as swe
+
+from core.config import (
+    PLANET_NUMBERS, EPHEMERIS_TABLE_ENABLED, EPHEMERIS_TABLE_PATH,
+    EPHEMERIS_TABLE_START_YEAR, EPHEMERIS_TABLE_END_YEAR, EPHEMERIS_TABLE_MAX_ERROR_ARCSEC
+)
+from services.compute_executor import ensure_ephe_path, swe_lock
+
+# Önceden hesaplanmış efemeris tablosu: her gövde için zaman sabit uzunluklu aralıklara bölünür ve
+# her aralıkta ekliptik boylam ile ekvatoral deklinasyon, Chebyshev serisi katsayılarıyla saklanır.
+# Katsayılar tek bir `.npy` dosyasında durur ve `mmap_mode="r"` ile açılır; böylece dosya işletim
+# sisteminin sayfa önbelleği üzerinden tüm gunicorn worker'larınca paylaşılır. Hız, boylam serisinin
+# türevinden elde edilir. Tablo, Swiss Ephemeris'in yerine değil önüne konur: kapsam dışındaki
+# tarihler ve tabloda olmayan gövdeler için her zaman `swe.calc_ut` kullanılır.
+
+TABLE_FORMAT_VERSION = 1
+_COEFFICIENTS_FILE = "coefficients.npy"
+_INDEX_FILE = "index.json"
+_DEGREE = 12
+# Aralık uzunlukları (gün); 12. derece seriyle enterpolasyon hatası 1 yay saniyesinin altında kalacak şekilde seçildi.
+_INTERVAL_DAYS = {
+    'Sun': 32, 'Moon': 8, 'Mercury': 8, 'Venus': 8, 'Mars': 16, 'Jupiter': 32, 'Saturn': 32,
+    'Uranus': 32, 'Neptune': 32, 'Pluto': 32, 'True Node': 8, 'Chiron': 32, 'Lilith': 2,
+    'Ceres': 32, 'Pallas': 32, 'Juno': 32, 'Vesta': 32
+}
+
+
+def _chebyshev_nodes(count: int) -> Tuple[np.ndarray, np.ndarray]:
+    theta = np.pi * (np.arange(count) + 0.5) / count
+    return np.cos(theta), np.cos(np.outer(np.arange(count), theta))
+
+
+def _fit_body(name: str, start_jd: float, intervals: int, interval_days: float) -> np.ndarray:
+    """(aralık, [boylam, deklinasyon], katsayı) boyutlu katsayı dizisini Chebyshev düğümlerinde örnekleyerek üretir."""
+    count = _DEGREE + 1
+    nodes, basis = _chebyshev_nodes(count)
+    julian_days = start_jd + interval_days * (np.arange(intervals)[:, None] + (nodes[None, :] + 1) / 2)
+    num = PLANET_NUMBERS[name]
+    with swe_lock:
+        longitudes = np.array([swe.calc_ut(jd, num, 0)[0][0] for jd in julian_days.ravel()]).reshape(julian_days.shape)
+        declinations = np.array([swe.calc_ut(jd, num, swe.FLG_EQUATORIAL)[0][1] for jd in julian_days.ravel()]).reshape(julian_days.shape)
+    # Düğümler azalan sırada (cos); 0/360 geçişi için boylam ters çevrilmiş sırada açılır (unwrap)
+    longitudes = np.unwrap(longitudes[:, ::-1], period=360.0, axis=1)[:, ::-1]
+    coefficients = np.stack([longitudes, declinations], axis=1) @ basis.T * (2.0 / count)
+    coefficients[..., 0] /= 2
+    return coefficients
+
+
+def build_table(path: Path, start_year: int, end_year: int):
+    """Tabloyu oluşturur ve `path` klasörüne (katsayılar + indeks) yazar."""
+    ensure_ephe_path()
+    start_jd = swe.julday(start_year, 1, 1, 0.0); end_jd = swe.julday(end_year + 1, 1, 1, 0.0)
+    blocks, bodies, offset = [], {}, 0
+    for name, interval_days in _INTERVAL_DAYS.items():
+        intervals = int(np.ceil((end_jd - start_jd) / interval_days))
+        block = _fit_body(name, start_jd, intervals, interval_days)
+        bodies[name] = {"offset": offset, "intervals": intervals, "interval_days": interval_days}
+        blocks.append(block.ravel()); offset += block.size
+        print(f"{name}: {intervals} aralık", flush=True)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / _COEFFICIENTS_FILE, np.concatenate(blocks))
+    index = {"format_version": TABLE_FORMAT_VERSION, "swisseph_version": swe.version, "degree": _DEGREE,
+             "start_jd": start_jd, "end_jd": end_jd, "start_year": start_year, "end_year": end_year, "bodies": bodies}
+    (path / _INDEX_FILE).write_text(json.dumps(index, indent=2), encoding="utf-8")
+
+
+def _clenshaw(coefficients: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """(n, ..., katsayı) boyutlu serileri, her satır kendi `x` değerinde olmak üzere Clenshaw yöntemiyle hesaplar."""
+    x = x.reshape(-1, *([1] * (coefficients.ndim - 2)))
+    b1 = np.zeros(coefficients.shape[:-1]); b2 = np.zeros_like(b1)
+    for k in range(coefficients.shape[-1] - 1, 0, -1):
+        b1, b2 = coefficients[..., k] + 2 * x * b1 - b2, b1
+    return coefficients[..., 0] + x * b1 - b2
+
+
+class EphemerisTable:
+    """
+    Chebyshev tablosunu okuyan ve dizi halindeki Julian günleri için boylam, hız ve deklinasyonu
+    tek seferde (vektörel) hesaplayan sınıf. Tablo ilk kullanımda yüklenir; yoksa veya bozuksa
+    bir kez uyarı basılır ve `available` False döner (çağıranlar Swiss Ephemeris'e düşer).
+    """
+
+    def __init__(self, path: Path = EPHEMERIS_TABLE_PATH, enabled: bool = EPHEMERIS_TABLE_ENABLED):
+        self.path = Path(path)
+        self.enabled = enabled
+        self._index: Optional[Dict[str, Any]] = None
+        self._coefficients: Optional[np.ndarray] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.table_evaluations = 0
+        self.fallbacks = 0
+
+    def _load(self):
+        with self._lock:
+            if self._loaded: return
+            try:
+                index = json.loads((self.path / _INDEX_FILE).read_text(encoding="utf-8"))
+                if index.get("format_version") != TABLE_FORMAT_VERSION: raise ValueError(f"Beklenmeyen tablo sürümü: {index.get('format_version')}")
+                self._coefficients = np.load(self.path / _COEFFICIENTS_FILE, mmap_mode="r")
+                self._index = index
+            except Exception as e:
+                print(f"UYARI: Efemeris tablosu yüklenemedi, Swiss Ephemeris kullanılacak. Detay: {e}")
+            self._loaded = True
+
+    @property
+    def available(self) -> bool:
+        if not self.enabled: return False
+        if not self._loaded: self._load()
+        return self._index is not None
+
+    def covers(self, name: str, first_jd: float, last_jd: float) -> bool:
+        if not self.available or name not in self._index["bodies"]: return False
+        return self._index["start_jd"] <= first_jd and last_jd < self._index["end_jd"]
+
+    def _body_block(self, name: str) -> np.ndarray:
+        body = self._index["bodies"][name]
+        size = body["intervals"] * 2 * (self._index["degree"] + 1)
+        return self._coefficients[body["offset"]:body["offset"] + size].reshape(body["intervals"], 2, self._index["degree"] + 1)
+
+    def _coefficients_at(self, name: str, julian_days: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+        body = self._index["bodies"][name]; interval_days = body["interval_days"]
+        position = (julian_days - self._index["start_jd"]) / interval_days
+        interval = np.minimum(position.astype(np.int64), body["intervals"] - 1)
+        return np.asarray(self._body_block(name)[interval]), 2.0 * (position - interval) - 1.0, interval_days
+
+    def _evaluate(self, coefficients: np.ndarray, x: np.ndarray, interval_days) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # coefficients: (n, [boylam, deklinasyon], derece + 1); hız, boylam serisinin türevidir
+        values = _clenshaw(coefficients, x)
+        derivative = _clenshaw(np.polynomial.chebyshev.chebder(coefficients[:, :1, :], axis=2), x)[:, 0]
+        self.table_evaluations += x.size
+        return values[:, 0] % 360.0, derivative * 2.0 / interval_days, values[:, 1]
+
+    def evaluate(self, name: str, julian_days: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Verilen Julian günleri (UT) için (boylam [0, 360), hız [derece/gün], deklinasyon) dizilerini döndürür.
+        Çağırmadan önce `covers` ile kapsam kontrol edilmelidir.
+        """
+        coefficients, x, interval_days = self._coefficients_at(name, np.atleast_1d(np.asarray(julian_days, dtype=float)))
+        return self._evaluate(coefficients, x, interval_days)
+
+    def evaluate_bodies(self, names: List[str], julian_day: float) -> Dict[str, Tuple[float, float, float]]:
+        """Tek bir an için birden fazla gövdeyi tek Clenshaw geçişinde hesaplar; tablonun kapsamadığı gövdeler sonuçta yer almaz."""
+        names = [name for name in names if self.covers(name, julian_day, julian_day)]
+        if not names: return {}
+        moment = np.array([julian_day])
+        parts = [self._coefficients_at(name, moment) for name in names]
+        longitude, speed, declination = self._evaluate(np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]),
+                                                       np.array([p[2] for p in parts], dtype=float))
+        return {name: (float(longitude[i]), float(speed[i]), float(declination[i])) for i, name in enumerate(names)}
+
+    def stats(self) -> Dict[str, Any]:
+        info = {"enabled": self.enabled, "available": self.available, "table_evaluations": self.table_evaluations, "fallbacks": self.fallbacks}
+        if self._index is not None:
+            info.update({"start_year": self._index["start_year"], "end_year": self._index["end_year"], "bodies": len(self._index["bodies"])})
+        return info
+
+
+# Worker başına tek bir tablo okuyucu (katsayılar mmap ile süreçler arasında paylaşılır)
+ephemeris_table = EphemerisTable()
+
+
+def longitudes(name: str, julian_days: np.ndarray) -> np.ndarray:
+    """Gövdenin boylamlarını tablodan (kapsıyorsa) veya Swiss Ephemeris'ten tek tek hesaplayarak döndürür."""
+    julian_days = np.asarray(julian_days, dtype=float)
+    if julian_days.size and ephemeris_table.covers(name, float(julian_days.min()), float(julian_days.max())):
+        return ephemeris_table.evaluate(name, julian_days)[0]
+    if ephemeris_table.enabled: ephemeris_table.fallbacks += 1
+    ensure_ephe_path(); num = PLANET_NUMBERS[name]
+    with swe_lock:
+        return np.array([swe.calc_ut(jd, num, 0)[0][0] for jd in julian_days.ravel()]).reshape(julian_days.shape)
+
+
+def check_table(path: Path, samples: int) -> Dict[str, Dict[str, float]]:
+    """Tabloyu rastgele anlarda Swiss Ephemeris ile karşılaştırır; gövde başına hataları (yay saniyesi, hız için derece/gün) döndürür."""
+    ensure_ephe_path()
+    table = EphemerisTable(path, enabled=True)
+    if not table.available: raise SystemExit(f"HATA: {path} altında geçerli bir efemeris tablosu bulunamadı.")
+    rng = np.random.default_rng(0)
+    report = {}
+    for name in table._index["bodies"]:
+        julian_days = rng.uniform(table._index["start_jd"], table._index["end_jd"] - 1e-6, samples)
+        longitude, speed, declination = table.evaluate(name, julian_days)
+        num = PLANET_NUMBERS[name]
+        with swe_lock:
+            reference = np.array([swe.calc_ut(jd, num, swe.FLG_SPEED)[0] for jd in julian_days])
+            reference_dec = np.array([swe.calc_ut(jd, num, swe.FLG_EQUATORIAL)[0][1] for jd in julian_days])
+        longitude_error = np.abs((longitude - reference[:, 0] + 180) % 360 - 180) * 3600
+        report[name] = {"longitude_arcsec": float(longitude_error.max()), "longitude_p99_arcsec": float(np.percentile(longitude_error, 99)),
+                        "declination_arcsec": float(np.abs(declination - reference_dec).max() * 3600),
+                        "speed_deg_per_day": float(np.abs(speed - reference[:, 3]).max())}
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m services.ephemeris_table", description="Chebyshev efemeris tablosunu oluşturur veya doğrular.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Tabloyu Swiss Ephemeris dosyalarından oluşturur.")
+    build.add_argument("--start-year", type=int, default=EPHEMERIS_TABLE_START_YEAR)
+    build.add_argument("--end-year", type=int, default=EPHEMERIS_TABLE_END_YEAR)
+    build.add_argument("--path", type=Path, default=EPHEMERIS_TABLE_PATH)
+    check = commands.add_parser("check", help="Tabloyu rastgele anlarda Swiss Ephemeris ile karşılaştırır.")
+    check.add_argument("--samples", type=int, default=2000)
+    check.add_argument("--path", type=Path, default=EPHEMERIS_TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_table(args.path, args.start_year, args.end_year)
+        print(f"Efemeris tablosu yazıldı: {args.path}")
+        return 0
+    report = check_table(args.path, args.samples); failed = False
+    for name, errors in report.items():
+        worst = max(errors["longitude_arcsec"], errors["declination_arcsec"]); failed |= worst > EPHEMERIS_TABLE_MAX_ERROR_ARCSEC
+        print(f"{name:10} boylam {errors['longitude_arcsec']:.4f}\" (p99 {errors['longitude_p99_arcsec']:.4f}\")  deklinasyon {errors['declination_arcsec']:.4f}\"  hız {errors['speed_deg_per_day']:.2e} °/gün"
+              f"{'  <-- SINIR AŞILDI' if worst > EPHEMERIS_TABLE_MAX_ERROR_ARCSEC else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+import orjson
+from redis import Redis
+
+from core.config import DAILY_HOROSCOPE_STORE, DAILY_HOROSCOPE_DB_PATH, DAILY_HOROSCOPE_REDIS_TTL_SECONDS
+
+# Önceden üretilmiş günlük yorumlar (gün, harita parmak izi) anahtarıyla saklanır. Yazan taraf toplu iştir
+# (`python -m jobs.daily`); API yalnızca okur. Değer, `daily_horoscope_payload` çıktısının orjson kodlamasıdır.
+
+# SQLite'ın tek sorguda kabul ettiği parametre sayısı sınırının altında kalınır.
+_SQLITE_BATCH = 500
+
+
+def horoscope_redis_key(day: str, fingerprint: str) -> str:
+    return f"daily_horoscope:{day}:{fingerprint}"
+
+
+class SqliteHoroscopeStore:
+    """
+    Tek dosyalık yerel depo. WAL kipinde açıldığı için API worker'ları, toplu iş yazarken de okuyabilir.
+    Bağlantılar thread başınadır; `read_only` açılışta dosya yoksa oluşturulmaz ve okumalar boş döner.
+    """
+
+    def __init__(self, path: Path = DAILY_HOROSCOPE_DB_PATH, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+        self._local = threading.local()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None: return connection
+        if self.read_only:
+            if not self.path.exists(): return None
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS horoscopes (day TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                               "payload BLOB NOT NULL, PRIMARY KEY (day, fingerprint)) WITHOUT ROWID")
+        self._local.connection = connection
+        return connection
+
+    def get(self, day: str, fingerprint: str) -> Optional[bytes]:
+        connection = self._connection()
+        if connection is None: return None
+        try:
+            row = connection.execute("SELECT payload FROM horoscopes WHERE day = ? AND fingerprint = ?", (day, fingerprint)).fetchone()
+        except sqlite3.OperationalError:
+            # Dosya var ama tablo henüz oluşturulmamış (toplu iş yeni başlıyor)
+            return None
+        return row[0] if row else None
+
+    def existing(self, day: str, fingerprints: Sequence[str]) -> Set[str]:
+        connection = self._connection(); found: Set[str] = set()
+        for start in range(0, len(fingerprints), _SQLITE_BATCH):
+            batch = list(fingerprints[start:start + _SQLITE_BATCH])
+            query = f"SELECT fingerprint FROM horoscopes WHERE day = ? AND fingerprint IN ({','.join('?' * len(batch))})"
+            found.update(row[0] for row in connection.execute(query, (day, *batch)))
+        return found
+
+    def put_many(self, day: str, items: Iterable[Tuple[str, bytes]]):
+        connection = self._connection()
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO horoscopes (day, fingerprint, payload) VALUES (?, ?, ?)",
+                                   [(day, fingerprint, payload) for fingerprint, payload in items])
+
+    def prune(self, before_day: str) -> int:
+        connection = self._connection()
+        with connection:
+            return connection.execute("DELETE FROM horoscopes WHERE day < ?", (before_day,)).rowcount
+
+
+class RedisHoroscopeStore:
+    """Toplu işin Redis'e yazan tarafı (senkron istemci). Kayıtlar TTL ile kendiliğinden silinir."""
+
+    def __init__(self, redis, ttl: int = DAILY_HOROSCOPE_REDIS_TTL_SECONDS):
+        self._redis = redis
+        self.ttl = ttl
+
+    def existing(self, day: str, fingerprints: Sequence[str]) -> Set[str]:
+        pipeline = self._redis.pipeline(transaction=False)
+        for fingerprint in fingerprints: pipeline.exists(horoscope_redis_key(day, fingerprint))
+        return {fingerprint for fingerprint, exists in zip(fingerprints, pipeline.execute()) if exists}
+
+    def put_many(self, day: str, items: Iterable[Tuple[str, bytes]]):
+        pipeline = self._redis.pipeline(transaction=False)
+        for fingerprint, payload in items: pipeline.set(horoscope_redis_key(day, fingerprint), payload, ex=self.ttl)
+        pipeline.execute()
+
+    def prune(self, before_day: str) -> int:
+        return 0
+
+
+class DailyHoroscopeReader:
+    """
+    API tarafı: `/daily-horoscope` önce burada önceden üretilmiş yorumu arar; bulamazsa yorum canlı hesaplanır.
+    Depo kapalıysa, dosya yoksa veya Redis hata verirse None döner (istek asla bu yüzden başarısız olmaz).
+    """
+
+    def __init__(self, backend: str = DAILY_HOROSCOPE_STORE, path: Path = DAILY_HOROSCOPE_DB_PATH):
+        self.backend = backend
+        self._sqlite = SqliteHoroscopeStore(path, read_only=True) if backend == "sqlite" else None
+        self._redis = None
+        self.hits = 0
+        self.misses = 0
+
+    def attach_redis(self, redis):
+        """`decode_responses` ile açılmış istemci de kullanılabilir; değer orjson ile çözülür."""
+        if self.backend == "redis": self._redis = redis
+
+    async def get(self, day: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        payload = None
+        try:
+            if self._sqlite is not None: payload = self._sqlite.get(day, fingerprint)
+            elif self._redis is not None: payload = await self._redis.get(horoscope_redis_key(day, fingerprint))
+        except Exception as e:
+            print(f"UYARI: Önceden üretilmiş günlük yorum okunamadı. Detay: {e}")
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return orjson.loads(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"backend": self.backend, "hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hits / total, 4) if total else 0.0}
+
+
+def open_writer(backend: str = DAILY_HOROSCOPE_STORE, path: Path = DAILY_HOROSCOPE_DB_PATH, redis_url: Optional[str] = None):
+    """Toplu işin yazacağı depoyu açar."""
+    if backend == "sqlite": return SqliteHoroscopeStore(path)
+    if backend == "redis": return RedisHoroscopeStore(Redis.from_url(redis_url or "redis://localhost"))
+    raise ValueError(f"Bilinmeyen depo türü: {backend}")
+
+
+# Worker başına tek bir okuyucu
+daily_horoscope_reader = DailyHoroscopeReader()
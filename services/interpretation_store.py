@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from core.config import INTERPRETATION_PATH, INTERPRETATION_RELOAD_CHECK_SECONDS
+
+_EMPTY: Mapping = MappingProxyType({})
+
+
+def _freeze(value: Any) -> Any:
+    """JSON verisini değiştirilemez hale getirir (dict -> MappingProxyType, list -> tuple)."""
+    if isinstance(value, dict): return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list): return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _normalize_key_part(part: str) -> Any:
+    # Ev numaraları dosyalarda "1".."12" şeklinde; aramalar doğrudan int ile yapılabilsin.
+    return int(part) if part.isdigit() else part
+
+
+def _index_nested(data: Mapping) -> Dict[Tuple, Any]:
+    """İç içe sözlükleri yaprak değerlere kadar düzleştirir: {"Sun": {"1": "..."}} -> {("Sun", 1): "..."}."""
+    index: Dict[Tuple, Any] = {}
+    def walk(prefix: Tuple, node: Mapping):
+        for key, value in node.items():
+            path = prefix + (_normalize_key_part(key),)
+            if isinstance(value, Mapping): walk(path, value)
+            else: index[path] = value
+    walk((), data)
+    return index
+
+
+def _index_aspects(data: Mapping) -> Dict[Tuple, Any]:
+    """"Sun-Moon" -> {"Trine": "..."} yapısını (gezegen1, gezegen2, açı) anahtarına çevirir; gezegen çifti alfabetik sıralanır."""
+    index: Dict[Tuple, Any] = {}
+    for pair, aspects in data.items():
+        if not isinstance(aspects, Mapping): continue
+        planet1, planet2 = sorted(pair.split("-", 1))
+        for aspect_name, text in aspects.items(): index[(planet1, planet2, aspect_name)] = text
+    return index
+
+
+def _index_daily_transits(data: Mapping) -> Dict[Tuple, Any]:
+    """"Transit Sun-Natal Moon" -> {"Trine": {...}} yapısını (transit gezegen, natal gezegen, açı) anahtarına çevirir."""
+    index: Dict[Tuple, Any] = {}
+    for pair, aspects in data.items():
+        if not isinstance(aspects, Mapping) or not pair.startswith("Transit ") or "-Natal " not in pair: continue
+        transit_planet, natal_planet = pair[len("Transit "):].split("-Natal ", 1)
+        for aspect_name, categories in aspects.items(): index[(transit_planet, natal_planet, aspect_name)] = categories
+    return index
+
+
+_INDEXERS: Dict[str, Callable[[Mapping], Dict[Tuple, Any]]] = {
+    "aspects.json": _index_aspects,
+    "daily_transits.json": _index_daily_transits,
+}
+
+
+class _Entry:
+    __slots__ = ("mtime", "data", "index", "checked_at")
+
+    def __init__(self, mtime: float, data: Mapping, index: Mapping):
+        self.mtime, self.data, self.index = mtime, data, index
+        self.checked_at = time.monotonic()
+
+
+class InterpretationStore:
+    """
+    `data/interpretations/` altındaki tüm yorum dosyalarını bir kez yükleyip değiştirilemez
+    sözlükler ve tuple anahtarlı arama tabloları olarak tutar. Bir dosyanın değişiklik zamanı
+    (mtime) değiştiğinde, en fazla `check_interval` saniyede bir yapılan kontrolle yeniden yüklenir.
+    Gunicorn `--preload` ile ana süreçte yüklendiğinde bu veri worker'lar arasında paylaşılır.
+    """
+
+    def __init__(self, directory: Path = INTERPRETATION_PATH, check_interval: float = INTERPRETATION_RELOAD_CHECK_SECONDS):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, file_name: str) -> Optional[_Entry]:
+        path = self.directory / file_name
+        try:
+            mtime = path.stat().st_mtime
+            with open(path, 'r', encoding='utf-8') as f: raw = json.load(f)
+        except FileNotFoundError: return None
+        except ValueError as e:
+            print(f"HATA: Yorum dosyası '{file_name}' okunamadı, önceki sürüm kullanılmaya devam edecek. Detay: {e}")
+            return self._entries.get(file_name)
+        indexer = _INDEXERS.get(file_name, _index_nested)
+        return _Entry(mtime, _freeze(raw), MappingProxyType(indexer(raw)))
+
+    def load_all(self) -> "InterpretationStore":
+        with self._lock:
+            for path in sorted(self.directory.glob("*.json")):
+                entry = self._load(path.name)
+                if entry is not None: self._entries[path.name] = entry
+        return self
+
+    def _entry(self, file_name: str) -> Optional[_Entry]:
+        entry = self._entries.get(file_name)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval: return entry
+        with self._lock:
+            entry = self._entries.get(file_name)
+            if entry is not None:
+                entry.checked_at = now
+                try: changed = (self.directory / file_name).stat().st_mtime != entry.mtime
+                except FileNotFoundError: changed = False
+                if not changed: return entry
+            entry = self._load(file_name)
+            if entry is not None: self._entries[file_name] = entry
+            return entry
+
+    def get(self, file_name: str) -> Mapping:
+        """Dosyanın tamamını değiştirilemez bir sözlük olarak döndürür (dosya yoksa boş sözlük)."""
+        entry = self._entry(file_name)
+        return entry.data if entry is not None else _EMPTY
+
+    def lookup(self, file_name: str, *key: Any, default: Any = None) -> Any:
+        """Ön-anahtarlanmış tablodan arama yapar, ör. `lookup("planets_in_houses.json", "Sun", 10)`."""
+        entry = self._entry(file_name)
+        if entry is None: return default
+        return entry.index.get(key, default)
+
+
+# Süreç başına (preload ile tüm worker'lar için) tek bir yorum deposu
+interpretation_store = InterpretationStore()
@@ -0,0 +1,157 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import METRICS_ENABLED, METRICS_BUCKETS_SECONDS
+
+# İstek başına aşama süreleri (aşama -> toplam saniye). Ara katman her istekte yeni bir sözlük atar;
+# hesaplama havuzuna gönderilen işler bağlamı kopyaladığı için aynı sözlüğe yazar.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+# Çizim süreci gibi başka bir süreçte ölçülen aşamalar burada toplanıp sonuçla birlikte geri gönderilir.
+_captured_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("captured_timings", default=None)
+
+
+class Histogram:
+    """Prometheus tarzı sabit kovalı histogram. Kova sayaçları birikimsiz tutulur, çıktıda toplanır."""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value; self.count += 1
+
+
+def _labels(**labels: Any) -> str:
+    return ",".join(f'{key}="{str(value)}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    """
+    Aşama (timezone, ephemeris, houses, png_encode...) ve istek süresi histogramlarını tutar.
+    Kayıt, bir `perf_counter` farkı ve kilit altında bir kova artırımıdır; sürekli açık kalabilir.
+    Önbellek isabet sayaçları kopyalanmaz; `register_cache` ile verilen fonksiyonlar `/metrics`
+    okunurken çağrılır. Değerler worker başınadır (Gunicorn'da her worker kendi sayaçlarını sunar).
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, buckets: Sequence[float] = METRICS_BUCKETS_SECONDS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._stages: Dict[str, Histogram] = {}
+        self._requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._counters: Dict[str, Tuple[str, List[Callable[[], Sequence[Tuple[Dict[str, Any], float]]]]]] = {}
+        self._lock = threading.Lock()
+
+    def observe_stage(self, name: str, seconds: float):
+        if not self.enabled: return
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None: histogram = self._stages[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        timings = _request_timings.get()
+        if timings is not None: timings[name] = timings.get(name, 0.0) + seconds
+        captured = _captured_timings.get()
+        if captured is not None: captured.append((name, seconds))
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try: yield
+        finally: self.observe_stage(name, time.perf_counter() - started)
+
+    def merge(self, stages: Sequence[Tuple[str, float]]):
+        """Başka bir süreçte `capture_stages` ile toplanmış aşamaları bu sürecin sayaçlarına ve isteğine ekler."""
+        for name, seconds in stages: self.observe_stage(name, seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, f"{status // 100}xx")
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None: histogram = self._requests[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def begin_request(self) -> Tuple[Dict[str, float], Any]:
+        timings: Dict[str, float] = {}
+        return timings, _request_timings.set(timings)
+
+    def end_request(self, token: Any):
+        _request_timings.reset(token)
+
+    def register_cache(self, name: str, counters: Callable[[], Tuple[int, int]]):
+        """`counters()` (isabet, ıska) döndürmelidir."""
+        self._caches[name] = counters
+
+    def register_counter(self, metric: str, help_text: str, counters: Callable[[], Sequence[Tuple[Dict[str, Any], float]]]):
+        """
+        `/metrics` okunurken çağrılan sayaç kaynağı ekler; `counters()` (etiketler, değer) çiftleri döndürmelidir.
+        Aynı metrik adına birden fazla kaynak eklenebilir (ör. her single-flight tablosu kendi etiketleriyle).
+        """
+        self._counters.setdefault(metric, (help_text, []))[1].append(counters)
+
+    def _histogram_lines(self, metric: str, series: Dict[str, Histogram]) -> List[str]:
+        lines = []
+        for labels, histogram in series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return lines
+
+    def render_prometheus(self) -> str:
+        """Prometheus metin biçimi (0.0.4)."""
+        with self._lock:
+            stages = {_labels(stage=name): histogram for name, histogram in sorted(self._stages.items())}
+            requests = {_labels(method=method, route=route, status=status): histogram
+                        for (method, route, status), histogram in sorted(self._requests.items())}
+            stage_lines = self._histogram_lines("cosmicapi_stage_duration_seconds", stages)
+            request_lines = self._histogram_lines("cosmicapi_http_request_duration_seconds", requests)
+        lines = ["# HELP cosmicapi_stage_duration_seconds İstek içi aşama süreleri.",
+                 "# TYPE cosmicapi_stage_duration_seconds histogram", *stage_lines,
+                 "# HELP cosmicapi_http_request_duration_seconds Route başına istek süreleri.",
+                 "# TYPE cosmicapi_http_request_duration_seconds histogram", *request_lines]
+        cache_counters = {name: counters() for name, counters in self._caches.items()}
+        lines += ["# HELP cosmicapi_cache_hits_total Önbellek isabetleri.", "# TYPE cosmicapi_cache_hits_total counter"]
+        lines += [f'cosmicapi_cache_hits_total{{cache="{name}"}} {hits}' for name, (hits, _) in cache_counters.items()]
+        lines += ["# HELP cosmicapi_cache_misses_total Önbellek ıskaları.", "# TYPE cosmicapi_cache_misses_total counter"]
+        lines += [f'cosmicapi_cache_misses_total{{cache="{name}"}} {misses}' for name, (_, misses) in cache_counters.items()]
+        lines += ["# HELP cosmicapi_cache_hit_ratio Süreç başından beri isabet oranı.", "# TYPE cosmicapi_cache_hit_ratio gauge"]
+        lines += [f'cosmicapi_cache_hit_ratio{{cache="{name}"}} {hits / (hits + misses) if hits + misses else 0.0:.4f}'
+                  for name, (hits, misses) in cache_counters.items()]
+        for metric, (help_text, sources) in self._counters.items():
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            lines += [f"{metric}{{{_labels(**labels)}}} {value}" for counters in sources for labels, value in counters()]
+        return "\n".join(lines) + "\n"
+
+
+def server_timing_header(timings: Dict[str, float], total_seconds: float) -> str:
+    """`Server-Timing` değeri; süreler milisaniyedir."""
+    return ", ".join([f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items()] + [f"total;dur={total_seconds * 1000:.3f}"])
+
+
+def capture_stages(func: Callable[..., Any], *args: Any) -> Tuple[Any, List[Tuple[str, float]]]:
+    """
+    `func`'ı çalıştırır ve bu sırada kaydedilen aşamaları sonuçla birlikte döndürür. Süreç havuzlarında
+    (çizim, toplu hesaplama) çağrılır; ana süreç dönen aşamaları `metrics.merge` ile ekler.
+    """
+    captured: List[Tuple[str, float]] = []
+    token = _captured_timings.set(captured)
+    try: return func(*args), captured
+    finally: _captured_timings.reset(token)
+
+
+# Worker başına tek bir ölçüm kaydı
+metrics = MetricsRegistry()
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from core.config import RENDER_CACHE_MAX_BYTES, RENDER_CACHE_REDIS_TTL_SECONDS
+
+
+def make_render_key(kind: str, renderer_version: str, render_inputs: Any) -> str:
+    """
+    Çizim girdilerinin (gezegenler, ev başlangıçları, açılar...) kararlı bir özetini üretir.
+    Aynı girdiler her zaman aynı anahtarı verir; bu anahtar aynı zamanda yanıtın ETag'idir.
+    """
+    payload = json.dumps(render_inputs, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{kind}:{renderer_version}:{payload}".encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Üretilmiş harita görsellerini (ham byte) içerik özetine göre saklar. Birinci katman,
+    toplam boyutu `max_bytes` ile sınırlı bir hafıza içi LRU'dur; Redis bağlıysa ikinci katman
+    olarak görseller tüm worker'larla paylaşılır.
+    """
+
+    def __init__(self, max_bytes: int = RENDER_CACHE_MAX_BYTES, redis_ttl: int = RENDER_CACHE_REDIS_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.redis_ttl = redis_ttl
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def attach_redis(self, redis):
+        """Görseller ham byte olduğundan, `decode_responses=False` ile açılmış bir istemci verilmelidir."""
+        self._redis = redis
+
+    @property
+    def shared(self) -> bool:
+        """Görseller Redis'te tüm worker'larla paylaşılıyor mu (worker'lar arası single-flight yalnızca bu durumda işe yarar)."""
+        return self._redis is not None
+
+    def _redis_key(self, key: str) -> str:
+        return f"render_cache:{key}"
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_bytes: return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None: self._size -= len(previous)
+            self._items[key] = data; self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False); self._size -= len(evicted)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key); self.memory_hits += 1
+                return data
+        if self._redis is not None:
+            try:
+                data = await self._redis.get(self._redis_key(key))
+            except Exception as e:
+                print(f"UYARI: Görsel önbelleği Redis'ten okunamadı. Detay: {e}"); data = None
+            if data is not None:
+                self.redis_hits += 1; self._remember(key, data)
+                return data
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, data: bytes):
+        self._remember(key, data)
+        if self._redis is not None:
+            try:
+                await self._redis.set(self._redis_key(key), data, ex=self.redis_ttl)
+            except Exception as e:
+                print(f"UYARI: Görsel önbelleği Redis'e yazılamadı. Detay: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.redis_hits + self.misses
+        return {"memory_hits": self.memory_hits, "redis_hits": self.redis_hits, "misses": self.misses,
+                "hit_ratio": round((self.memory_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._items), "bytes": self._size, "max_bytes": self.max_bytes,
+                "redis_enabled": self._redis is not None}
+
+
+# Worker başına tek bir görsel önbelleği
+render_cache = RenderCache()
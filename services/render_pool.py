@@ -0,0 +1,140 @@
+import asyncio
+import importlib
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.config import RENDER_POOL_WORKERS, RENDER_QUEUE_SIZE
+from services.metrics import metrics, capture_stages
+
+
+class RenderPoolOverloaded(Exception):
+    """Çizim kuyruğu dolu olduğunda fırlatılır; `retry_after` istemciye önerilecek bekleme süresidir (saniye)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Çizim kuyruğu dolu, {retry_after} saniye sonra tekrar deneyin.")
+        self.retry_after = retry_after
+
+
+class LazyRenderer:
+    """
+    Çizim fonksiyonuna modül ve isim üzerinden başvurur. Çizim sürecine yalnızca bu iki isim gönderilir;
+    modül (ve matplotlib) o süreçte ilk çizimde içe aktarılır, API süreci onu hiç yüklemez.
+    """
+    __slots__ = ("module", "name")
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+
+    def __call__(self, *args: Any) -> bytes:
+        return getattr(importlib.import_module(self.module), self.name)(*args)
+
+    def __repr__(self) -> str:
+        return f"LazyRenderer({self.module}.{self.name})"
+
+
+def _import_module(name: str) -> float:
+    started = time.perf_counter()
+    importlib.import_module(name)
+    return time.perf_counter() - started
+
+
+def _timed_render(render: Callable[..., bytes], args: Tuple[Any, ...]) -> Tuple[bytes, float, List[Tuple[str, float]]]:
+    # Çizim sürecinde çalışır; kuyrukta bekleme süresini ayırabilmek için saf çizim süresini ve
+    # çizicinin kaydettiği aşamaları (chart_draw, png_encode) da döndürür.
+    started = time.perf_counter()
+    image, stages = capture_stages(render, *args)
+    return image, time.perf_counter() - started, stages
+
+
+class RenderPool:
+    """
+    Matplotlib (pyplot) çizimlerini ayrı süreçlerde çalıştırır. pyplot'un global durumu thread-safe
+    olmadığı gibi, uzun çizimler FastAPI'nin thread havuzunu da meşgul ederek JSON endpoint'lerini
+    yavaşlatır. Aynı anda en fazla `workers` çizim yapılır, `max_queue` kadarı sırada bekler;
+    fazlası beklemeden `RenderPoolOverloaded` ile reddedilir.
+    """
+
+    def __init__(self, workers: int = RENDER_POOL_WORKERS, max_queue: int = RENDER_QUEUE_SIZE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self._render_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._max_render_seconds = 0.0
+        self._prewarm_task: Optional[asyncio.Task] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Gunicorn `--preload` ile ana süreçte değil, her worker'da ilk çizimde oluşturulur.
+        if self._executor is None: self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    def _average_render_seconds(self) -> float:
+        return self._render_seconds / self.completed if self.completed else 1.0
+
+    def retry_after(self) -> int:
+        """Kuyruğun boşalması için tahmini süre: (bekleyen iş / süreç sayısı) x ortalama çizim süresi."""
+        return max(1, math.ceil((self.queue_depth + 1) / self.workers * self._average_render_seconds()))
+
+    async def render(self, render: Callable[..., bytes], *args: Any) -> bytes:
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise RenderPoolOverloaded(self.retry_after())
+        self._in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            image, render_seconds, stages = await asyncio.get_running_loop().run_in_executor(self._get_executor(), _timed_render, render, args)
+        except BrokenProcessPool:
+            # Bir çizim süreci çöktüyse havuz kullanılamaz hale gelir; bir sonraki istekte yenisi kurulur.
+            self.failed += 1; self._executor = None
+            raise
+        finally:
+            self._in_flight -= 1
+        self.completed += 1
+        wait_seconds = max(0.0, time.perf_counter() - submitted - render_seconds)
+        self._render_seconds += render_seconds
+        self._wait_seconds += wait_seconds
+        metrics.merge(stages); metrics.observe_stage("render_queue_wait", wait_seconds)
+        self._max_render_seconds = max(self._max_render_seconds, render_seconds)
+        return image
+
+    def start_prewarm(self, module: str = "services.chart_drawer"):
+        """
+        Çizim süreçlerini başlatıp çizici modülünü içlerinde içe aktaran arka plan görevini başlatır;
+        uygulama başlangıcını bekletmez, ilk PNG isteği de içe aktarma maliyetini ödemez.
+        """
+        self._prewarm_task = asyncio.get_running_loop().create_task(self._prewarm(module))
+
+    async def _prewarm(self, module: str):
+        loop = asyncio.get_running_loop()
+        try:
+            seconds = await asyncio.gather(*(loop.run_in_executor(self._get_executor(), _import_module, module) for _ in range(self.workers)))
+            print(f"Çizim süreçleri hazır ({self.workers} süreç, en uzun içe aktarma {max(seconds):.2f} sn).")
+        except Exception as e:
+            print(f"UYARI: Çizim süreçleri önceden başlatılamadı, ilk çizimde başlatılacak. Detay: {e}")
+
+    def shutdown(self):
+        if self._prewarm_task is not None: self._prewarm_task.cancel(); self._prewarm_task = None
+        if self._executor is not None: self._executor.shutdown(wait=False, cancel_futures=True); self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "max_queue": self.max_queue, "in_flight": self._in_flight, "queue_depth": self.queue_depth,
+                "completed": self.completed, "rejected": self.rejected, "failed": self.failed,
+                "avg_render_ms": round(self._render_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+                "max_render_ms": round(self._max_render_seconds * 1000, 1),
+                "avg_queue_wait_ms": round(self._wait_seconds / self.completed * 1000, 1) if self.completed else 0.0}
+
+
+# Worker başına tek bir çizim havuzu
+render_pool = RenderPool()
@@ -0,0 +1,27 @@
+from typing import Any, Dict, List
+
+# Matplotlib çizicisinin (`chart_drawer.py`) sürümü, figür boyutu ve önbellek anahtarına giren girdileri.
+# Çizicinin kendisi yalnızca çizim süreçlerinde yüklenir; API süreci matplotlib'i hiç içe aktarmadan
+# görsel önbelleği anahtarını bu modülle üretir.
+
+# YENİ: Çizim kodunda görseli değiştiren her düzenlemede artırılmalıdır; görsel önbelleğinin
+# anahtarına dahil edildiği için eski görseller kendiliğinden geçersiz olur.
+RENDERER_VERSION = "2"
+# Figür boyutu (inç); PNG genişliği piksel olarak istendiğinde dpi bu genişlikten türetilir.
+FIGURE_SIZE_INCHES = (17, 10)
+DEFAULT_DPI = 200
+
+
+def png_dpi_for_width(width_px: int) -> float:
+    return width_px / FIGURE_SIZE_INCHES[0]
+
+
+def natal_render_inputs(natal_data: Dict[str, Any]) -> Dict[str, Any]:
+    """`draw_final_professional_chart` fonksiyonunun okuduğu verileri (önbellek anahtarı için) döndürür."""
+    return {"planets": natal_data['planets'], "house_cusps": natal_data['house_cusps'][:12], "aspects": natal_data.get('aspects', [])}
+
+
+def synastry_render_inputs(p1_data: Dict[str, Any], p2_data: Dict[str, Any], synastry_aspects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """`draw_synastry_biwheel_chart` fonksiyonunun okuduğu verileri (önbellek anahtarı için) döndürür."""
+    return {"p1_planets": p1_data['planets'], "p2_planets": p2_data['planets'],
+            "p2_house_cusps": p2_data['house_cusps'][:12], "aspects": synastry_aspects}
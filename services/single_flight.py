@@ -0,0 +1,121 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.config import (
+    SINGLE_FLIGHT_ENABLED, SINGLE_FLIGHT_LOCK_TTL_SECONDS, SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS, SINGLE_FLIGHT_POLL_INTERVAL_SECONDS
+)
+from services.chart_cache import CircuitBreaker
+
+# Aynı haritanın (ör. paylaşılan bir bağlantı) binlerce istemci tarafından aynı anda istenmesi durumunda her istek
+# önbellekte ıskalar ve sonuç yazılmadan önce aynı hesaplama/çizim paralel yapılırdı. Single-flight ile worker
+# içinde aynı anahtar için tek bir görev çalışır, diğer istekler onun sonucunu bekler. Worker'lar arasında ise
+# görevi yürüten worker kısa ömürlü bir Redis kilidi alır; kilidi alamayanlar kilit düşene kadar bekleyip sonucu
+# ortak önbellekten okur.
+
+# Kilit yalnızca alan tarafından (token eşleşirse) silinir; süresi dolup başka worker'a geçmiş kilit silinmez.
+_UNLOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Anahtar başına tek uçuş. `do(key, compute, cached)`: aynı anahtar için süren bir görev varsa onu bekler,
+    yoksa `compute`'u (sonucu önbelleğe de yazmalıdır) yeni bir görevde başlatır. `cached` verilmişse ve Redis
+    bağlıysa görev önce worker'lar arası kilidi dener; kilit başka worker'daysa kilit düşene kadar bekler ve
+    `cached()` ile sonucu okur. Sonuç yoksa, süre dolarsa veya Redis hata verirse hesaplamayı kendisi yapar.
+    Görev bekleyen isteklerden bağımsızdır: ilk istemcinin bağlantısı kopsa da diğerleri için sürer.
+    """
+
+    def __init__(self, name: str, enabled: bool = SINGLE_FLIGHT_ENABLED, lock_ttl: float = SINGLE_FLIGHT_LOCK_TTL_SECONDS,
+                 wait_timeout: float = SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS, poll_interval: float = SINGLE_FLIGHT_POLL_INTERVAL_SECONDS):
+        self.name = name
+        self.enabled = enabled
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._flights: Dict[str, asyncio.Task] = {}
+        self._redis = None
+        self._unlock_script = None
+        self.breaker = CircuitBreaker()
+        self.leaders = 0
+        self.coalesced = 0
+        self.redis_coalesced = 0
+        self.lock_timeouts = 0
+        self.redis_errors = 0
+
+    def attach_redis(self, redis, reachable: bool = True):
+        """Kısa zaman aşımlı, `decode_responses=True` ile açılmış istemci beklenir; kilit değerleri metindir."""
+        self._redis = redis; self._unlock_script = redis.register_script(_UNLOCK_LUA)
+        if not reachable: self.breaker.trip()
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]], cached: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        if not self.enabled: return await compute()
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.get_running_loop().create_task(self._lead(key, compute, cached))
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        # Bekleyen isteklerden biri iptal edilirse (istemci bağlantıyı kopardı) ortak görev iptal edilmez.
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task: del self._flights[key]
+        # Tüm bekleyenler iptal edildiyse hata hiç okunmaz; "Task exception was never retrieved" uyarısı önlenir.
+        if not task.cancelled(): task.exception()
+
+    def _redis_failed(self, e: Exception):
+        self.redis_errors += 1; self.breaker.record_failure()
+        print(f"UYARI: Single-flight kilidi ({self.name}) Redis'te kullanılamadı; hesaplama kilitsiz yapılıyor. Detay: {e}")
+
+    async def _lead(self, key: str, compute: Callable[[], Awaitable[Any]], cached: Optional[Callable[[], Awaitable[Any]]]) -> Any:
+        if cached is None or self._redis is None or not self.breaker.allow(): return await compute()
+        lock_key, token = f"single_flight:{self.name}:{key}", uuid.uuid4().hex
+        try:
+            acquired = await self._redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            self._redis_failed(e)
+            return await compute()
+        self.breaker.record_success()
+        if acquired:
+            try: return await compute()
+            finally: await self._unlock(lock_key, token)
+        value = await self._wait_for_peer(lock_key, cached)
+        if value is None: return await compute()
+        self.redis_coalesced += 1
+        return value
+
+    async def _unlock(self, lock_key: str, token: str):
+        try: await self._unlock_script(keys=[lock_key], args=[token])
+        except Exception as e: self._redis_failed(e)
+
+    async def _wait_for_peer(self, lock_key: str, cached: Callable[[], Awaitable[Any]]) -> Any:
+        """Kilit düşene kadar bekler ve sonucu önbellekten okur; süre dolar veya Redis hata verirse None döner."""
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            try: held = await self._redis.exists(lock_key)
+            except Exception as e:
+                self._redis_failed(e)
+                return None
+            if not held: return await cached()
+        self.lock_timeouts += 1
+        return None
+
+    def counters(self) -> List[Tuple[Dict[str, Any], int]]:
+        return [({"flight": self.name, "scope": "worker"}, self.coalesced), ({"flight": self.name, "scope": "redis"}, self.redis_coalesced)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "in_flight": len(self._flights), "leaders": self.leaders, "coalesced": self.coalesced,
+                "redis_coalesced": self.redis_coalesced, "lock_timeouts": self.lock_timeouts, "redis_errors": self.redis_errors,
+                "redis_enabled": self._redis is not None, "breaker_state": self.breaker.state}
+
+
+# Worker başına: harita hesaplamaları ve görsel çizimleri için ayrı uçuş tabloları (anahtar uzayları farklı)
+chart_flight = SingleFlight("natal_chart")
+render_flight = SingleFlight("render")
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+import swisseph as swe
+
+from core.config import (
+    PLANET_NUMBERS, TRANSIT_PLANETS,
+    SKY_SNAPSHOT_QUANTUM_SECONDS, SKY_SNAPSHOT_USE_REDIS
+)
+from services.compute_executor import compute_executor, ensure_ephe_path, swe_lock
+from services.ephemeris_table import ephemeris_table
+
+
+def compute_sky(moment: datetime) -> Dict[str, Any]:
+    """Transit gezegenlerinin verilen UTC anındaki konumları. Günlük yorum toplu işi de günün gökyüzünü bununla hesaplar."""
+    ensure_ephe_path()
+    planets = []
+    with swe_lock:
+        julian_day = swe.utc_to_jd(moment.year, moment.month, moment.day, moment.hour, moment.minute, moment.second, 1)[0]
+        table_positions = ephemeris_table.evaluate_bodies(TRANSIT_PLANETS, julian_day) if ephemeris_table.enabled else {}
+        for name in TRANSIT_PLANETS:
+            if name in table_positions:
+                longitude, speed, _ = table_positions[name]
+                planets.append({"planet": name, "longitude": longitude, "speed": speed}); continue
+            pos_data, ret_flag = swe.calc_ut(julian_day, PLANET_NUMBERS[name], swe.FLG_SPEED)
+            if ret_flag >= 0:
+                planets.append({"planet": name, "longitude": pos_data[0], "speed": pos_data[3]})
+    return {"time_utc": moment.isoformat(), "julian_day": julian_day, "planets": planets}
+
+
+class SkySnapshotService:
+    """
+    Transit gezegenlerinin anlık konumlarını, zamanı sabit aralıklara (quantum) bölerek
+    bir kez hesaplar ve tüm istekler arasında paylaştırır. Aynı aralıktaki her transit
+    isteği, yeniden Swiss Ephemeris çağrısı yapmak yerine bu anlık görüntüyü okur.
+    """
+
+    def __init__(self, quantum_seconds: int = SKY_SNAPSHOT_QUANTUM_SECONDS):
+        self.quantum_seconds = max(1, quantum_seconds)
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._redis = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _bucket_for(self, moment: datetime) -> int:
+        return int(moment.timestamp()) // self.quantum_seconds
+
+    def _redis_key(self, bucket: int) -> str:
+        return f"sky_snapshot:{self.quantum_seconds}:{bucket}"
+
+    def _compute(self, bucket: int) -> Dict[str, Any]:
+        return {"bucket": bucket, **compute_sky(datetime.fromtimestamp(bucket * self.quantum_seconds, tz=timezone.utc))}
+
+    def get_current(self) -> Dict[str, Any]:
+        """
+        Şu anki zaman aralığına ait gökyüzünü döndürür. Arka plan yenilemesi henüz
+        yetişmediyse (veya hiç başlatılmadıysa) görüntü burada, kilit altında bir kez hesaplanır.
+        """
+        bucket = self._bucket_for(datetime.now(timezone.utc))
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot["bucket"] == bucket: return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot["bucket"] != bucket:
+                self._snapshot = self._compute(bucket)
+            return self._snapshot
+
+    async def current(self) -> Dict[str, Any]:
+        """`get_current` ile aynıdır; görüntü bayatsa hesaplama olay döngüsü yerine hesaplama havuzunda yapılır."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot["bucket"] == self._bucket_for(datetime.now(timezone.utc)): return snapshot
+        return await compute_executor.run(self.get_current)
+
+    async def refresh(self) -> Dict[str, Any]:
+        """
+        Geçerli aralığın görüntüsünü hazırlar. Redis bağlıysa önce oradaki ortak kopyayı
+        dener; yoksa hesaplayıp diğer worker'lar için Redis'e yazar.
+        """
+        bucket = self._bucket_for(datetime.now(timezone.utc))
+        snapshot = None
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self._redis_key(bucket))
+                if raw: snapshot = json.loads(raw)
+            except Exception as e:
+                print(f"UYARI: Gökyüzü görüntüsü Redis'ten okunamadı. Detay: {e}")
+        if snapshot is None:
+            snapshot = await compute_executor.run(self._compute, bucket)
+            if self._redis is not None:
+                try:
+                    await self._redis.set(self._redis_key(bucket), json.dumps(snapshot), ex=self.quantum_seconds * 2, nx=True)
+                except Exception as e:
+                    print(f"UYARI: Gökyüzü görüntüsü Redis'e yazılamadı. Detay: {e}")
+        with self._lock:
+            if self._snapshot is None or self._snapshot["bucket"] <= snapshot["bucket"]: self._snapshot = snapshot
+        return snapshot
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"HATA: Gökyüzü görüntüsü yenilenemedi. Detay: {e}")
+            now = datetime.now(timezone.utc).timestamp()
+            await asyncio.sleep(self.quantum_seconds - (now % self.quantum_seconds))
+
+    def start(self, redis=None):
+        """Arka plan yenileme görevini başlatır. Uygulamanın 'startup' olayında çağrılır."""
+        self._redis = redis if SKY_SNAPSHOT_USE_REDIS else None
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+# Worker başına tek bir gökyüzü servisi
+sky_snapshot = SkySnapshotService()
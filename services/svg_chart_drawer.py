@@ -0,0 +1,161 @@
+import math
+from html import escape
+from typing import List, Dict, Any, Iterable, Tuple
+
+from core.config import (
+    PLANET_GLYPHS, ASPECT_COLORS, ELEMENT_COLORS,
+    SIGN_TO_ELEMENT, ZODIAC_GLYPHS, ZODIAC_SIGNS
+)
+
+# Matplotlib kullanmadan, harita çemberini doğrudan SVG metni olarak üreten hafif çizici.
+# Yerleşim `chart_drawer.py` ile aynıdır (yarıçaplar, renkler, glifler); birim çember 100 birimdir.
+# Bilgi panelleri (tablolar) çizilmez: istemciler bu verileri JSON endpoint'lerinden alır.
+
+# YENİ: SVG çıktısını değiştiren her düzenlemede artırılmalıdır (görsel önbelleği anahtarının parçasıdır).
+SVG_RENDERER_VERSION = "1"
+
+_SCALE = 100
+_FONT_FAMILY = "Segoe UI Symbol, DejaVu Sans, Arial, sans-serif"
+# 1 punto ≈ 0.48 birim: PNG'deki (200 dpi) çizgi kalınlıkları ve yazı boyutlarıyla aynı oranı korur.
+_PT = 0.48
+
+
+def _num(value: float) -> str:
+    text = f"{value:.1f}"
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _xy(radius: float, degree: float) -> Tuple[str, str]:
+    """Ekliptik boylamını (0° solda, saat yönünün tersine) SVG koordinatına çevirir; SVG'de y ekseni aşağı bakar."""
+    rad = math.radians(180 - degree)
+    return _num(radius * _SCALE * math.cos(rad)), _num(-radius * _SCALE * math.sin(rad))
+
+
+def _text(radius: float, degree: float, content: str, font_pt: float, fill: str = "black", extra: str = "") -> str:
+    x, y = _xy(radius, degree)
+    return f'<text x="{x}" y="{y}" font-size="{_num(font_pt * _PT)}" fill="{fill}"{extra}>{escape(content)}</text>'
+
+
+def _segments_path(segments: Iterable[Tuple[float, float, float, float]]) -> str:
+    """(r1, derece1, r2, derece2) doğru parçalarını tek bir `path` verisine çevirir."""
+    parts = []
+    for r1, d1, r2, d2 in segments:
+        (x1, y1), (x2, y2) = _xy(r1, d1), _xy(r2, d2)
+        parts.append(f"M{x1} {y1}L{x2} {y2}")
+    return "".join(parts)
+
+
+def _circle(radius: float, fill: str = "none", stroke: str = "none", stroke_pt: float = 0.0, extra: str = "") -> str:
+    stroke_attrs = f' stroke="{stroke}" stroke-width="{_num(stroke_pt * _PT)}"' if stroke != "none" else ""
+    return f'<circle r="{_num(radius * _SCALE)}" fill="{fill}"{stroke_attrs}{extra}/>'
+
+
+def _zodiac_wedges() -> List[str]:
+    wedges, r = [], _num(_SCALE)
+    for i in range(12):
+        (x1, y1), (x2, y2) = _xy(1.0, i * 30), _xy(1.0, i * 30 + 30)
+        color = ELEMENT_COLORS[SIGN_TO_ELEMENT[ZODIAC_SIGNS[i]]]
+        wedges.append(f'<path d="M0 0L{x1} {y1}A{r} {r} 0 0 1 {x2} {y2}Z" fill="{color}" stroke="darkgray" stroke-width="{_num(0.5 * _PT)}"/>')
+    return wedges
+
+
+def _zodiac_glyphs() -> List[str]:
+    return [_text(0.9, i * 30 + 15, ZODIAC_GLYPHS[i], 18) for i in range(12)]
+
+
+def _degree_ticks() -> List[str]:
+    # 360 çentik tek tek çizilmez: her uzunluk için kesikli (dasharray) bir çember kullanılır.
+    ticks = []
+    for length, count, width_pt in ((0.03, 360, 0.5), (0.06, 72, 1.0), (0.09, 36, 1.0)):
+        radius = (1.0 + length / 2) * _SCALE; width = width_pt * _PT
+        gap = 2 * math.pi * radius / count - width
+        ticks.append(f'<circle r="{radius:.2f}" fill="none" stroke="gray" stroke-width="{_num(length * _SCALE)}" '
+                     f'stroke-dasharray="{width:.3f} {gap:.3f}" stroke-dashoffset="{width / 2:.3f}"/>')
+    return ticks
+
+
+def _degree_labels() -> List[str]:
+    labels = []
+    for i in range(0, 360, 10):
+        x, y = _xy(1.18, i)
+        labels.append(f'<text x="{x}" y="{y}" font-size="{_num(7 * _PT)}" transform="rotate({i - 90} {x} {y})">{i % 30}</text>')
+    return labels
+
+
+def _house_cusps(house_cusps: List[float], inner: float, outer: float) -> List[str]:
+    major = [(inner, c, outer, c) for i, c in enumerate(house_cusps[:12]) if i in (0, 3, 6, 9)]
+    minor = [(inner, c, outer, c) for i, c in enumerate(house_cusps[:12]) if i not in (0, 3, 6, 9)]
+    return [f'<path d="{_segments_path(minor)}" stroke="darkgray" stroke-width="{_num(0.4 * _PT)}"/>',
+            f'<path d="{_segments_path(major)}" stroke="black" stroke-width="{_num(1.0 * _PT)}"/>']
+
+
+def _house_numbers(house_cusps: List[float], radius: float) -> List[str]:
+    numbers = []
+    for i, cusp_deg in enumerate(house_cusps[:12]):
+        mid = cusp_deg + ((house_cusps[i + 1 if i < 11 else 0] - cusp_deg + 360) % 360) / 2
+        x, y = _xy(radius, mid)
+        numbers.append(f'<circle cx="{x}" cy="{y}" r="{_num(10 * _PT)}" fill="white"/>'
+                       f'<text x="{x}" y="{y}" font-size="{_num(10 * _PT)}" fill="gray">{i + 1}</text>')
+    return numbers
+
+
+def _aspect_lines(groups: Dict[Tuple[str, bool], List[Tuple[float, float, float, float]]], width_pt: float, opacity: float) -> List[str]:
+    lines = []
+    for (color, dashed), segments in groups.items():
+        dash = f' stroke-dasharray="{_num(3.7 * width_pt * _PT)} {_num(1.6 * width_pt * _PT)}"' if dashed else ""
+        lines.append(f'<path d="{_segments_path(segments)}" stroke="{color}" stroke-width="{_num(width_pt * _PT)}" stroke-opacity="{opacity}"{dash}/>')
+    return lines
+
+
+def _planet_glyphs(planets: List[Dict[str, Any]], radius: float, fill: str) -> List[str]:
+    return [_text(radius, p['longitude'], PLANET_GLYPHS.get(p['planet'], '?'), 14, fill, ' font-weight="bold"') for p in planets]
+
+
+def _svg_document(limit: float, size: int, body: List[str]) -> bytes:
+    v = _num(limit * _SCALE); w = _num(2 * limit * _SCALE)
+    header = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="-{v} -{v} {w} {w}" '
+              f'font-family="{_FONT_FAMILY}" text-anchor="middle" dominant-baseline="central">'
+              f'<rect x="-{v}" y="-{v}" width="{w}" height="{w}" fill="white"/>')
+    return (header + "".join(body) + "</svg>").encode("utf-8")
+
+
+def draw_natal_chart_svg(natal_data: Dict[str, Any], size: int) -> bytes:
+    """Doğum haritası çemberini `size` x `size` piksellik bir SVG olarak üretir."""
+    body = _zodiac_wedges() + _degree_ticks() + _degree_labels() + _zodiac_glyphs()
+    # Evler
+    body.append(_circle(0.8, stroke="black", stroke_pt=0.5))
+    body += _house_cusps(natal_data['house_cusps'], 0, 0.8)
+    body += _house_numbers(natal_data['house_cusps'], 0.72)
+    # Açılar ve gezegenler
+    body.append(_circle(0.6, fill="white"))
+    longitudes = {p['planet']: p['longitude'] for p in natal_data['planets']}
+    groups: Dict[Tuple[str, bool], List[Tuple[float, float, float, float]]] = {}
+    for aspect in natal_data.get('aspects', []):
+        p1_name, p2_name = aspect['planet1'], aspect['planet2']
+        if p1_name not in longitudes or p2_name not in longitudes: continue
+        key = (ASPECT_COLORS.get(aspect['aspect'], 'gray'), aspect.get('type') not in ['Major', 'Creative']) # Minör açılar kesikli çizgi
+        groups.setdefault(key, []).append((0.6, longitudes[p1_name], 0.6, longitudes[p2_name]))
+    body += _aspect_lines(groups, 0.8, 0.9)
+    body += _planet_glyphs(natal_data['planets'], 0.65, "black")
+    return _svg_document(1.5, size, body)
+
+
+def draw_synastry_biwheel_svg(p1_data: Dict[str, Any], p2_data: Dict[str, Any], synastry_aspects: List[Dict[str, Any]], size: int) -> bytes:
+    """Sinastri (bi-wheel) çemberini `size` x `size` piksellik bir SVG olarak üretir; iç çember kişi 1, dış çember kişi 2'dir."""
+    body = _zodiac_wedges()
+    body.append(f'<path d="{_segments_path((0.8, d, 1.0, d) for d in range(0, 360, 30))}" stroke="#FFFFFF" stroke-width="{_num(1.5 * _PT)}"/>')
+    body += _zodiac_glyphs()
+    p1_longitudes = {p['planet']: p['longitude'] for p in p1_data['planets']}
+    p2_longitudes = {p['planet']: p['longitude'] for p in p2_data['planets']}
+    groups: Dict[Tuple[str, bool], List[Tuple[float, float, float, float]]] = {}
+    for aspect in synastry_aspects:
+        p1_name, p2_name = aspect['planet1'], aspect['planet2']
+        if p1_name not in p1_longitudes or p2_name not in p2_longitudes: continue
+        groups.setdefault((ASPECT_COLORS.get(aspect['aspect'], 'gray'), False), []).append((0.30, p1_longitudes[p1_name], 0.70, p2_longitudes[p2_name]))
+    body += _aspect_lines(groups, 0.7, 0.8)
+    body.append(_circle(0.5, fill="white", stroke="black", stroke_pt=0.7))
+    body += _house_cusps(p2_data['house_cusps'], 0.8, 1.0)
+    body += _house_numbers(p2_data['house_cusps'], 0.88)
+    body += _planet_glyphs(p2_data['planets'], 0.65, "blue")
+    body += _planet_glyphs(p1_data['planets'], 0.35, "red")
+    return _svg_document(1.1, size, body)
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+from datetime import tzinfo
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import pytz
+
+from core.config import TIMEZONE_CACHE_SIZE, TIMEZONE_CACHE_PRECISION
+
+
+def _new_finder():
+    # YENİ: timezonefinder (ve poligon dizileri) ilk kullanımda içe aktarılır; yalnızca içe aktarmanın maliyeti
+    # soğuk başlangıçta ~50 ms'dir.
+    from timezonefinder import TimezoneFinder
+    return TimezoneFinder(in_memory=True)
+
+
+class TimezoneResolver:
+    """
+    Süreç genelinde tek bir `TimezoneFinder` örneği (poligon verisi hafızada) üzerinden
+    koordinatları zaman dilimine çevirir. Sonuçlar yuvarlanmış (enlem, boylam) anahtarıyla
+    bir LRU önbellekte, `pytz` zaman dilimi nesneleri ise isimleriyle saklanır.
+    """
+
+    def __init__(self, cache_size: int = TIMEZONE_CACHE_SIZE, precision: int = TIMEZONE_CACHE_PRECISION):
+        self.cache_size = cache_size
+        self.precision = precision
+        self._finder = None
+        self._names: "OrderedDict[Tuple[float, float], Optional[str]]" = OrderedDict()
+        self._zones: Dict[str, tzinfo] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> "TimezoneResolver":
+        """Poligon verisini hafızaya yükler. Uygulama başlarken bir kez çağrılması yeterlidir."""
+        with self._lock:
+            if self._finder is None: self._finder = _new_finder()
+        return self
+
+    def _key(self, lat: float, lon: float) -> Tuple[float, float]:
+        return round(lat, self.precision), round(lon, self.precision)
+
+    def _lookup(self, key: Tuple[float, float]) -> Optional[str]:
+        # Çağıran tarafından kilit altında çalıştırılır.
+        if key in self._names:
+            self._names.move_to_end(key); self.hits += 1
+            return self._names[key]
+        self.misses += 1
+        if self._finder is None: self._finder = _new_finder()
+        name = self._finder.timezone_at(lng=key[1], lat=key[0])
+        self._names[key] = name
+        if len(self._names) > self.cache_size: self._names.popitem(last=False)
+        return name
+
+    def timezone_at(self, lat: float, lon: float) -> Optional[str]:
+        with self._lock:
+            return self._lookup(self._key(lat, lon))
+
+    def timezone_at_many(self, coordinates: Iterable[Tuple[float, float]]) -> List[Optional[str]]:
+        """(enlem, boylam) listesini tek kilit altında çözer; tekrar eden konumlar bir kez aranır."""
+        keys = [self._key(lat, lon) for lat, lon in coordinates]
+        with self._lock:
+            resolved = {key: self._lookup(key) for key in dict.fromkeys(keys)}
+        return [resolved[key] for key in keys]
+
+    def get_zone(self, name: str) -> tzinfo:
+        zone = self._zones.get(name)
+        if zone is None: zone = self._zones.setdefault(name, pytz.timezone(name))
+        return zone
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._names), "max_size": self.cache_size, "zones": len(self._zones)}
+
+
+# Süreç başına tek bir çözümleyici
+timezone_resolver = TimezoneResolver()
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from core.config import TRANSIT_ASPECTS, TRANSIT_LOOKUP_BINS_PER_DEGREE, TRANSIT_LOOKUP_CACHE_SIZE
+
+# Günlük transit açıları için gökyüzü başına bir kez kurulan derece tablosu. Ekliptik, `1 / bins_per_degree`
+# genişliğinde kovalara bölünür; her kova için, o kovadaki herhangi bir boylamla açı yapabilecek transit
+# gezegenler işaretlenir. Bir kişinin transitleri, natal boylamlarının kovalarına tek bir numpy indekslemesiyle
+# bakılarak bulunur; yalnızca işaretli (transit, natal) çiftleri için açı kesin olarak hesaplanır.
+# Sonuç, tablosuz döngüyle (her transit x her natal nokta x her açı) birebir aynıdır: sıra, ilk eşleşen açı,
+# sınırların dahil olması ve orb yuvarlaması korunur.
+
+_ASPECT_NAMES = list(TRANSIT_ASPECTS)
+_ASPECT_ANGLE_VALUES = [info['angle'] for info in TRANSIT_ASPECTS.values()]
+_ASPECT_LOW = np.array([info['angle'] - info['orb'] for info in TRANSIT_ASPECTS.values()], dtype=float)
+_ASPECT_HIGH = np.array([info['angle'] + info['orb'] for info in TRANSIT_ASPECTS.values()], dtype=float)
+# Kova sınırlarında kayan nokta hatası yüzünden bir adayın kaçmaması için tablo bu kadar geniş tutulur.
+_EPSILON = 1e-9
+
+
+def _separation(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """İki boylam arasındaki açı (0-180); tablosuz hesapla aynı işlem sırası."""
+    angle = np.abs(a - b)
+    return np.where(angle > 180, 360 - angle, angle)
+
+
+class TransitLookupTable:
+    """
+    Tek bir gökyüzü görüntüsünün transit tablosu. `candidates[kova, t]`, t. transit gezegenin o kovadaki
+    bir boylamla herhangi bir transit açısı yapabileceğini gösterir (kova genişliği kadar pay bırakılarak).
+    Nesneler oluşturulduktan sonra değiştirilmez; istekler ve thread'ler arasında paylaşılır.
+    """
+    __slots__ = ("names", "longitudes", "bins_per_degree", "candidates")
+
+    def __init__(self, sky_planets: Sequence[Dict[str, Any]], bins_per_degree: int = TRANSIT_LOOKUP_BINS_PER_DEGREE):
+        self.names = [f"Transit {p['planet']}" for p in sky_planets]
+        self.longitudes = np.array([p['longitude'] for p in sky_planets], dtype=float)
+        self.bins_per_degree = bins_per_degree
+        half_width = 0.5 / bins_per_degree
+        centers = (np.arange(360 * bins_per_degree) + 0.5) / bins_per_degree
+        separation = _separation(centers[:, None], self.longitudes[None, :])[:, :, None]
+        # Boylam kova içinde en fazla yarım genişlik kaydığında açı da en fazla o kadar değişir.
+        self.candidates = ((separation + half_width + _EPSILON >= _ASPECT_LOW) & (separation - half_width - _EPSILON <= _ASPECT_HIGH)).any(axis=2)
+
+    def active_transits(self, natal_planets: Sequence[Dict[str, Any]]) -> List[Dict]:
+        if not natal_planets or not self.names: return []
+        natal_longitudes = np.array([p['longitude'] for p in natal_planets], dtype=float)
+        bins = np.minimum((natal_longitudes % 360 * self.bins_per_degree).astype(np.intp), self.candidates.shape[0] - 1)
+        # (transit, natal) sırasıyla dolaşılır; tablosuz döngüdeki dış/iç döngü sırası budur.
+        transit_index, natal_index = np.nonzero(self.candidates[bins].T)
+        if not len(transit_index): return []
+        angles = _separation(self.longitudes[transit_index], natal_longitudes[natal_index])
+        hits = (_ASPECT_LOW <= angles[:, None]) & (angles[:, None] <= _ASPECT_HIGH)
+        rows = np.flatnonzero(hits.any(axis=1))
+        aspects, angles = hits.argmax(axis=1)[rows].tolist(), angles[rows].tolist()
+        transit_index, natal_index = transit_index[rows].tolist(), natal_index[rows].tolist()
+        transit_aspects = []
+        for aspect, angle, t, n in zip(aspects, angles, transit_index, natal_index):
+            transit_aspects.append({
+                "transit_planet": self.names[t], "aspect": _ASPECT_NAMES[aspect], "natal_planet": natal_planets[n]['planet'],
+                # Python'un `round`'u kullanılır; numpy'ın yuvarlaması sınır değerlerde farklı sonuç verebilir.
+                "orb": round(abs(angle - _ASPECT_ANGLE_VALUES[aspect]), 2)
+            })
+        return transit_aspects
+
+
+_tables: "OrderedDict[Tuple, TransitLookupTable]" = OrderedDict()
+
+
+def transit_lookup_table(sky: Dict[str, Any]) -> TransitLookupTable:
+    """
+    Gökyüzü görüntüsünün tablosunu döndürür; aynı görüntü (zaman ve konumlar) için tablo bir kez kurulur.
+    Görüntüler quantum süresince değişmediğinden tüm kullanıcılar aynı tabloyu paylaşır.
+    """
+    key = (sky.get('time_utc'), tuple(p['longitude'] for p in sky['planets']))
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = TransitLookupTable(sky['planets'])
+        while len(_tables) > TRANSIT_LOOKUP_CACHE_SIZE: _tables.popitem(last=False)
+    return table
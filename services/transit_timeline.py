@@ -0,0 +1,132 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import swisseph as swe
+
+from core.config import (
+    PLANET_NUMBERS, TRANSIT_ASPECTS,
+    TRANSIT_TIMELINE_STEP_DAYS, TRANSIT_TIMELINE_DEFAULT_STEP_DAYS,
+    TRANSIT_TIMELINE_TOLERANCE_DAYS, TRANSIT_TIMELINE_MAX_ITERATIONS
+)
+from services.compute_executor import ensure_ephe_path, swe_lock
+from services.ephemeris_table import longitudes
+
+# Bir doğum haritasının belirli bir tarih aralığındaki transit açılarını, her açının orba giriş,
+# tam (exact) olma ve orbdan çıkış anlarıyla birlikte bulur. Her transit gezegen için konumlar
+# önce sabit adımlarla (ör. Ay için 6 saat, diğerleri için 1 gün) örneklenir; tüm natal noktalar ve
+# açılar için sapmalar numpy ile tek seferde hesaplanır. Yalnızca işaret değiştiren aralıklar,
+# Swiss Ephemeris konumları üzerinde kök bulma (Illinois yöntemi) ile inceltilir. Böylece bir
+# gezegenin maliyeti (aralık / adım) örnek + olay başına birkaç çağrı ile sınırlı kalır.
+
+
+def _longitude(julian_day: float, planet_number: int) -> float:
+    with swe_lock:
+        return swe.calc_ut(julian_day, planet_number, 0)[0][0]
+
+
+def _wrap(delta: np.ndarray) -> np.ndarray:
+    """Açı farkını (-180, 180] aralığına indirger."""
+    return (delta + 180.0) % 360.0 - 180.0
+
+
+def _refine_root(func: Callable[[float], float], a: float, b: float, fa: float, fb: float) -> float:
+    """`func`'ın [a, b] içindeki kökünü Illinois (değiştirilmiş regula falsi) yöntemiyle bulur."""
+    side = 0; c = a
+    for _ in range(TRANSIT_TIMELINE_MAX_ITERATIONS):
+        previous = c
+        c = (a * fb - b * fa) / (fb - fa)
+        fc = func(c)
+        if fc == 0 or abs(c - previous) < TRANSIT_TIMELINE_TOLERANCE_DAYS: break
+        if fc * fb > 0:
+            b, fb = c, fc
+            if side == -1: fa /= 2
+            side = -1
+        else:
+            a, fa = c, fc
+            if side == 1: fb /= 2
+            side = 1
+    return c
+
+
+def _julian_day_to_iso(julian_day: float) -> str:
+    year, month, day, hours = swe.revjul(julian_day)
+    moment = datetime(year, month, day, tzinfo=timezone.utc) + timedelta(hours=hours)
+    return (moment + timedelta(microseconds=500_000)).replace(microsecond=0).isoformat()
+
+
+def _targets(natal_planets: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray]:
+    """
+    Her (natal nokta, açı) çifti için transit gezegenin tam açı yapacağı boylamları üretir.
+    Kavuşum ve karşıt açı tek, diğer açılar iki boylam (natal ± açı) verir.
+    """
+    labels, longitudes, orbs = [], [], []
+    for n_planet in natal_planets:
+        for aspect_name, aspect_info in TRANSIT_ASPECTS.items():
+            angle = aspect_info['angle']
+            for sign in ((1,) if angle in (0, 180) else (1, -1)):
+                labels.append((n_planet['planet'], aspect_name))
+                longitudes.append((n_planet['longitude'] + sign * angle) % 360.0)
+                orbs.append(aspect_info['orb'])
+    return labels, np.array(longitudes), np.array(orbs, dtype=float)
+
+
+def transit_timeline_for_planet(natal_data: Dict[str, Any], transit_planet: str, start_jd: float, end_jd: float) -> List[Dict[str, Any]]:
+    """
+    Tek bir transit gezegenin [start_jd, end_jd] aralığında natal noktalarla yaptığı açıları, orba
+    giriş sırasına göre döndürür. Aralığın başında zaten orbda olan açıların `orb_entry`, sonunda
+    hâlâ orbda olanların `orb_exit` değeri None'dır. Retro hareketlerde `exact` birden fazla an içerebilir.
+    """
+    ensure_ephe_path()
+    planet_number = PLANET_NUMBERS[transit_planet]
+    step = TRANSIT_TIMELINE_STEP_DAYS.get(transit_planet, TRANSIT_TIMELINE_DEFAULT_STEP_DAYS)
+    samples = max(2, int(np.ceil((end_jd - start_jd) / step)) + 1)
+    julian_days = np.linspace(start_jd, end_jd, samples)
+    labels, target_longitudes, orbs = _targets(natal_data['planets'])
+
+    # (hedef, örnek) matrisleri: işaretli sapma ve orb içinde olma durumu
+    # Örnekler, açıksa efemeris tablosundan tek vektörel çağrıyla okunur; kökler yine Swiss Ephemeris üzerinde inceltilir
+    deviation = _wrap(longitudes(transit_planet, julian_days)[None, :] - target_longitudes[:, None])
+    inside = np.abs(deviation) <= orbs[:, None]
+    entering = ~inside[:, :-1] & inside[:, 1:]
+    leaving = inside[:, :-1] & ~inside[:, 1:]
+    # Sıfırdan geçiş; ±180 sıçramaları, iki uçtan en az biri orb içinde olma şartıyla elenir
+    crossing = ((deviation[:, :-1] < 0) != (deviation[:, 1:] < 0)) & (inside[:, :-1] | inside[:, 1:])
+
+    active = np.flatnonzero(inside.any(axis=1))
+    passes: List[Dict[str, Any]] = []
+    for k in active:
+        target, orb = target_longitudes[k], orbs[k]
+        def signed(jd: float) -> float: return float(_wrap(_longitude(jd, planet_number) - target))
+        def edge(jd: float, sign: float) -> float: return sign * signed(jd) - orb
+
+        events = []
+        for i in np.flatnonzero(entering[k] | leaving[k]):
+            d0, d1 = deviation[k, i], deviation[k, i + 1]
+            sign = 1.0 if d0 + d1 > 0 else -1.0 # Orb sınırında iki uç da aynı taraftadır
+            jd = _refine_root(lambda t: edge(t, sign), julian_days[i], julian_days[i + 1], sign * d0 - orb, sign * d1 - orb)
+            events.append((jd, "entry" if entering[k, i] else "exit"))
+        for i in np.flatnonzero(crossing[k]):
+            d0, d1 = deviation[k, i], deviation[k, i + 1]
+            events.append((_refine_root(signed, julian_days[i], julian_days[i + 1], d0, d1), "exact"))
+        events.sort()
+
+        natal_planet, aspect_name = labels[k]
+        def new_pass(orb_entry): return {"transit_planet": f"Transit {transit_planet}", "aspect": aspect_name, "natal_planet": natal_planet,
+                                         "orb_entry": orb_entry, "exact": [], "orb_exit": None}
+        current = new_pass(None) if inside[k, 0] else None
+        for jd, kind in events:
+            if kind == "entry": current = new_pass(_julian_day_to_iso(jd))
+            elif current is None: continue
+            elif kind == "exact": current["exact"].append(_julian_day_to_iso(jd))
+            else: current["orb_exit"] = _julian_day_to_iso(jd); passes.append(current); current = None
+        if current is not None: passes.append(current)
+
+    passes.sort(key=lambda item: item["orb_entry"] or "")
+    return passes
+
+
+def timeline_julian_days(start_date: date, end_date: date) -> Tuple[float, float]:
+    """Aralık UTC'dir ve bitiş günü dahildir: [start_date 00:00, end_date + 1 gün 00:00]."""
+    end = end_date + timedelta(days=1)
+    return swe.julday(start_date.year, start_date.month, start_date.day, 0.0), swe.julday(end.year, end.month, end.day, 0.0)
@@ -0,0 +1,131 @@
+import asyncio
+import gc
+import os
+import resource
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import swisseph as swe
+
+from core.config import (
+    EPHE_PATH, PLANET_NUMBERS, EPHEMERIS_WARMUP_ENABLED, EPHEMERIS_WARMUP_BACKGROUND, EPHEMERIS_WARMUP_START_YEAR,
+    EPHEMERIS_WARMUP_END_YEAR, EPHEMERIS_WARMUP_STEP_DAYS, EPHEMERIS_WARMUP_BODIES
+)
+from services.compute_executor import compute_executor, ensure_ephe_path, swe_lock
+from services.ephemeris_table import ephemeris_table
+from services.interpretation_store import interpretation_store
+from services.timezone_resolver import timezone_resolver
+
+# Gunicorn `--preload` ile uygulama ana süreçte (master) bir kez yüklenir ve worker'lar fork ile oluşturulur.
+# Isınma bu yüklemede çalışır: yorum dosyaları ve zaman dilimi poligonları hafızaya alınır, efemeris dosyalarının
+# istenen tarih aralığı ve gökcisimleri için gereken kısımları okunarak işletim sisteminin sayfa önbelleğine
+# getirilir. Worker'lar bu hafızayı yazma-anında-kopyalama (copy-on-write) ile paylaşır; ilk istekler dosya okuması
+# ve poligon yüklemesi beklemez.
+
+_MB = 1024 * 1024
+
+
+def memory_usage() -> Dict[str, float]:
+    """
+    Sürecin hafıza kullanımı (MB). Linux'ta `smaps_rollup`'tan PSS ve paylaşılan/özel sayfalar da okunur;
+    worker'lar arasında paylaşılan sayfaların payı `pss` ile `rss` arasındaki farktır.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as handle:
+            fields = {line.split(":")[0]: int(line.split()[1]) * 1024 for line in handle if line.rstrip().endswith("kB")}
+        return {"rss": round(fields["Rss"] / _MB, 1), "pss": round(fields["Pss"] / _MB, 1),
+                "shared": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / _MB, 1),
+                "private": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / _MB, 1)}
+    except (OSError, KeyError, ValueError):
+        # Linux dışı sistemler: yalnızca en yüksek RSS (macOS'ta byte, Linux'ta KB cinsinden döner)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"max_rss": round(peak / (_MB if os.uname().sysname == "Darwin" else 1024), 1)}
+
+
+class EphemerisWarmUp:
+    """
+    Süreç başında bir kez çalışan ısınma. `run` ana süreçte (veya tek süreçli çalışmada uygulama yüklenirken)
+    çağrılır; `warm_worker` her worker'da, hesaplama thread'inin efemeris dosyalarını ilk istekten önce açar.
+    `background` açıksa ikisi de başlangıçtan sonra `start_background` ile arka planda çalışır.
+    """
+
+    def __init__(self, enabled: bool = EPHEMERIS_WARMUP_ENABLED, background: bool = EPHEMERIS_WARMUP_BACKGROUND,
+                 start_year: int = EPHEMERIS_WARMUP_START_YEAR, end_year: int = EPHEMERIS_WARMUP_END_YEAR,
+                 step_days: float = EPHEMERIS_WARMUP_STEP_DAYS, bodies: Sequence[str] = EPHEMERIS_WARMUP_BODIES):
+        self.enabled = enabled
+        self.background = background
+        self.start_year = start_year
+        self.end_year = end_year
+        self.step_days = step_days
+        self.bodies = [name for name in bodies if name in PLANET_NUMBERS]
+        self.seconds: Dict[str, float] = {}
+        self.positions = 0
+        self.errors = 0
+        self.pid: Optional[int] = None
+        self.memory_after: Dict[str, float] = {}
+        self.worker_seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _touch_ephemeris(self):
+        first_jd = swe.julday(self.start_year, 1, 1, 0.0); last_jd = swe.julday(self.end_year, 12, 31, 0.0)
+        numbers = [PLANET_NUMBERS[name] for name in self.bodies]
+        with swe_lock:
+            swe.set_ephe_path(str(EPHE_PATH))
+            julian_day = first_jd
+            while julian_day <= last_jd:
+                for number in numbers:
+                    try: swe.calc_ut(julian_day, number, swe.FLG_SPEED); self.positions += 1
+                    except swe.Error: self.errors += 1
+                julian_day += self.step_days
+            # Açık efemeris dosyaları fork ile worker'lara geçerse dosya konumu süreçler arasında paylaşılır ve
+            # eşzamanlı okumalar birbirini bozar. Dosyalar kapatılır; sayfalar işletim sisteminin önbelleğinde kalır.
+            swe.close(); swe.set_ephe_path(str(EPHE_PATH))
+
+    def _stage(self, name: str, func):
+        started = time.perf_counter()
+        func()
+        self.seconds[name] = round(time.perf_counter() - started, 3)
+
+    def run(self) -> "EphemerisWarmUp":
+        if not self.enabled or self.pid is not None: return self
+        self.pid = os.getpid()
+        self._stage("interpretations", interpretation_store.load_all)
+        self._stage("timezone", timezone_resolver.load)
+        self._stage("ephemeris", self._touch_ephemeris)
+        if ephemeris_table.enabled: self._stage("ephemeris_table", lambda: ephemeris_table.available)
+        # Isınmada oluşan nesneler kalıcı kuşağa alınır; çöp toplayıcı worker'larda bunlara dokunup
+        # paylaşılan sayfaları kopyalatmaz.
+        gc.collect(); gc.freeze()
+        self.memory_after = memory_usage()
+        print(f"Isınma tamamlandı ({sum(self.seconds.values()):.2f} sn; "
+              + ", ".join(f"{name} {seconds:.2f} sn" for name, seconds in self.seconds.items())
+              + f"). {self.positions} konum okundu ({self.start_year}-{self.end_year}, {len(self.bodies)} gökcismi). Hafıza: {self.memory_after}")
+        if self.errors: print(f"UYARI: Isınmada {self.errors} konum hesaplanamadı (efemeris dosyası eksik olabilir).")
+        return self
+
+    def warm_worker(self):
+        """Hesaplama thread'inde çalışır: efemeris yolu ayarlanır ve tüm gökcisimleri için dosyalar açılır."""
+        started = time.perf_counter()
+        ensure_ephe_path()
+        julian_day = swe.julday(2000, 1, 1, 12.0)
+        with swe_lock:
+            for name in self.bodies:
+                try: swe.calc_ut(julian_day, PLANET_NUMBERS[name], swe.FLG_SPEED)
+                except swe.Error: pass
+        self.worker_seconds = round(time.perf_counter() - started, 4)
+
+    def start_background(self):
+        """Isınmayı ve worker ısınmasını hesaplama thread'inde, başlangıcı bekletmeden çalıştırır."""
+        async def warm():
+            try: await compute_executor.run(self.run); await compute_executor.run(self.warm_worker)
+            except Exception as e: print(f"UYARI: Arka plan ısınması tamamlanamadı. Detay: {e}")
+        self._task = asyncio.get_running_loop().create_task(warm())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "background": self.background, "warmed_in_pid": self.pid, "pid": os.getpid(),
+                "seconds": self.seconds, "positions": self.positions, "errors": self.errors, "worker_seconds": self.worker_seconds,
+                "memory_after_warmup_mb": self.memory_after, "memory_mb": memory_usage()}
+
+
+# Süreç başına tek bir ısınma nesnesi; fork'tan sonra worker'lar master'daki sonuçları da görür.
+ephemeris_warmup = EphemerisWarmUp()